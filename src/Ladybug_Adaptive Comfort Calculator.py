@@ -72,7 +72,6 @@ except: pass
 
 
 import Grasshopper.Kernel as gh
-import math
 import scriptcontext as sc
 
 
@@ -195,34 +194,8 @@ def checkTheInputs():
     if len(_outdoorTemperature) != 0:
         try:
             if _outdoorTemperature[2] == 'Dry Bulb Temperature' and _outdoorTemperature[3] == 'C' and _outdoorTemperature[4] == 'Hourly' and _outdoorTemperature[5] == (1, 1, 1) and _outdoorTemperature[6] == (12, 31, 24):
-                if avgMonthOrRunMean == True:
-                    #Calculate the monthly average temperatures.
-                    monthPrevailList = [float(sum(_outdoorTemperature[7:751])/744), float(sum(_outdoorTemperature[751:1423])/672), float(sum(_outdoorTemperature[1423:2167])/744), float(sum(_outdoorTemperature[2167:2887])/720), float(sum(_outdoorTemperature[2887:3631])/744), float(sum(_outdoorTemperature[3631:4351])/720), float(sum(_outdoorTemperature[4351:5095])/744), float(sum(_outdoorTemperature[5095:5839])/744), float(sum(_outdoorTemperature[5839:6559])/720), float(sum(_outdoorTemperature[6559:7303])/744), float(sum(_outdoorTemperature[7303:8023])/720), float(sum(_outdoorTemperature[8023:])/744)]
-                    hoursInMonth = [744, 672, 744, 720, 744, 720, 744, 744, 720, 744, 720, 744]
-                    for monthCount, monthPrevailTemp in enumerate(monthPrevailList):
-                        prevailTemp.extend(duplicateData([monthPrevailTemp], hoursInMonth[monthCount]))
-                        if monthPrevailTemp < 10: coldTimes.append(monthCount+1)
-                else:
-                    #Calculate a running mean temperature.
-                    alpha = 0.8
-                    divisor = 1 + alpha + math.pow(alpha,2) + math.pow(alpha,3) + math.pow(alpha,4) + math.pow(alpha,5)
-                    dividend = (sum(_outdoorTemperature[-24:-1] + [_outdoorTemperature[-1]])/24) + (alpha*(sum(_outdoorTemperature[-48:-24])/24)) + (math.pow(alpha,2)*(sum(_outdoorTemperature[-72:-48])/24)) + (math.pow(alpha,3)*(sum(_outdoorTemperature[-96:-72])/24)) + (math.pow(alpha,4)*(sum(_outdoorTemperature[-120:-96])/24)) + (math.pow(alpha,5)*(sum(_outdoorTemperature[-144:-120])/24))
-                    startingTemp = dividend/divisor
-                    if startingTemp < 10: coldTimes.append(0)
-                    outdoorTemp = _outdoorTemperature[7:]
-                    startingMean = sum(outdoorTemp[:24])/24
-                    dailyRunMeans = [startingTemp]
-                    dailyMeans = [startingMean]
-                    prevailTemp.extend(duplicateData([startingTemp], 24))
-                    startHour = 24
-                    for count in range(364):
-                        dailyMean = sum(outdoorTemp[startHour:startHour+24])/24
-                        dailyRunMeanTemp = ((1-alpha)*dailyMeans[-1]) + alpha*dailyRunMeans[-1]
-                        if dailyRunMeanTemp < 10: coldTimes.append(count+1)
-                        prevailTemp.extend(duplicateData([dailyRunMeanTemp], 24))
-                        dailyRunMeans.append(dailyRunMeanTemp)
-                        dailyMeans.append(dailyMean)
-                        startHour +=24
+                #Calculate the monthly average or the running mean temperatures.
+                prevailTemp, coldTimes = sc.sticky["ladybug_AdaptiveComfort"].prevailingTemperature(_outdoorTemperature[7:], avgMonthOrRunMean)
                 checkData3 = True
                 epwPrevailTemp = True
                 epwPrevailStr = _outdoorTemperature[0:7]
@@ -421,26 +394,12 @@ def main(checkData, epwData, epwStr, calcLength, airTemp, radTemp, prevailTemp,
         lowerTemperatureBound.extend([epwStr[0], epwStr[1], 'Adaptive Lower Comfort Temperature' + ' for ' + epwStr[2].split('for ')[-1], 'C', epwStr[4], runPeriod[0], runPeriod[1]])
     if checkData == True:
         try:
-            comfOrNot = []
-            extColdComfHot = []
-            upperTemp = []
-            lowerTemp = []
-            comfortTemp = []
-            degreesTarget = []
-            for count in HOYS:
-                # let the user cancel the process
-                if gh.GH_Document.IsEscapeKeyDown(): assert False
-                
-                if ASHRAEorEN == True: comfTemp, distFromTarget, lowTemp, upTemp, comf, condition = lb_comfortModels.comfAdaptiveComfortASH55(airTemp[count-1], radTemp[count-1], prevailTemp[count-1], windSpeed[count-1], comfClass, levelOfConditioning)
-                else: comfTemp, distFromTarget, lowTemp, upTemp, comf, condition = lb_comfortModels.comfAdaptiveComfortEN15251(airTemp[count-1], radTemp[count-1], prevailTemp[count-1], windSpeed[count-1], comfClass, levelOfConditioning)
-                
-                if comf == True:comfOrNot.append(1)
-                else: comfOrNot.append(0)
-                extColdComfHot.append(condition)
-                upperTemp.append(upTemp)
-                lowerTemp.append(lowTemp)
-                comfortTemp.append(comfTemp)
-                degreesTarget.append(distFromTarget)
+            # let the user cancel the process
+            if gh.GH_Document.IsEscapeKeyDown(): assert False
+            
+            #Evaluate all of the hours in one pass.
+            adaptiveComfort = sc.sticky["ladybug_AdaptiveComfort"]([airTemp[count-1] for count in HOYS], [radTemp[count-1] for count in HOYS], [prevailTemp[count-1] for count in HOYS], [windSpeed[count-1] for count in HOYS], ASHRAEorEN)
+            comfortTemp, degreesTarget, lowerTemp, upperTemp, comfOrNot, extColdComfHot = adaptiveComfort.evaluate(comfClass, levelOfConditioning)
             percentOfTimeComfortable = [((sum(comfOrNot))/calcLength)*100]
             extreme = []
             hot = []
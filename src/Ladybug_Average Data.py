@@ -128,11 +128,46 @@ def main(annualHourlyData, analysisPeriod):
             # read analysis period
             stMonth, stDay, stHour, endMonth, endDay, endHour = lb_preparation.readRunPeriod(analysisPeriod)
             
-            def average(list):
-                return sum(list)/len(list)
+            if totalOrAverage_: method = 'sum'
+            else: method = 'mean'
             
-            def total(list):
-                return sum(list)
+            # check it goes from the end of the year to the start of the year
+            stAnnualHour = lb_preparation.date2Hour(stMonth, stDay, stHour)
+            endAnnualHour = lb_preparation.date2Hour(endMonth, endDay, endHour)
+            type = stAnnualHour < endAnnualHour
+            
+            # the hours of each day and each month are found once and the values
+            # of all of the lists are reduced over them in one pass for each list
+            hourRange = endHour - stHour + 1
+            if type:
+                JDs = range(lb_preparation.getJD(stMonth,stDay), lb_preparation.getJD(endMonth,endDay) + 1)
+                months = range(stMonth, endMonth + 1)
+            else:
+                JDs = range(lb_preparation.getJD(stMonth,stDay), 365 + 1) + range(1, lb_preparation.getJD(endMonth,endDay) +1)
+                months = range(stMonth, 12 + 1) + range(1, endMonth + 1)
+            
+            dailyHours = []; dayIds = []
+            for dayCount, JD in enumerate(JDs):
+                dayHours = range(lb_preparation.getHour(JD, stHour)-1, lb_preparation.getHour(JD, endHour))
+                dailyHours.extend(dayHours)
+                dayIds.extend([dayCount] * len(dayHours))
+            
+            monthDays = [0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+            monthlyHours = []; monthIds = []; monthHourIds = []
+            for monthCount, month in enumerate(months):
+                stJD = lb_preparation.getJD(month, 1)
+                endJD = lb_preparation.getJD(month, monthDays[month])
+                for hour in range(lb_preparation.getHour(stJD, stHour)-1, lb_preparation.getHour(endJD , endHour)):
+                    if stHour-1 <= hour%24 <= endHour-1:
+                        monthlyHours.append(hour)
+                        monthIds.append(monthCount)
+                        monthHourIds.append(monthCount * hourRange + hour%24 - stHour + 1)
+            
+            dailyLists = [[values[hour] for hour in dailyHours] for values in separatedLists]
+            monthlyLists = [[values[hour] for hour in monthlyHours] for values in separatedLists]
+            avDaily = lb_preparation.groupReduce(dailyLists, dayIds, len(JDs), [method])
+            avMonthly = lb_preparation.groupReduce(monthlyLists, monthIds, len(months), [method])
+            monthlyPerHour = lb_preparation.groupReduce(monthlyLists, monthHourIds, len(months) * hourRange, [method, 'min', 'max', 'count'])
             
             selHourlyData =[];
             selDailyData = []; avDailyData = []
@@ -143,178 +178,57 @@ def main(annualHourlyData, analysisPeriod):
             selMonthlyDataMax = []; selMonthlyDataMin = []
             
             for l in range(len(separatedLists)):
-                [selHourlyData.append(item) for item in listInfo[l][:4]]
-                selHourlyData.append('Hourly')
-                selHourlyData.append((stMonth, stDay, stHour))
-                selHourlyData.append((endMonth, endDay, endHour))
                 # select data
-                stAnnualHour = lb_preparation.date2Hour(stMonth, stDay, stHour)
-                endAnnualHour = lb_preparation.date2Hour(endMonth, endDay, endHour)
-                
-                # check it goes from the end of the year to the start of the year
-                selectedData = []
-                if stAnnualHour < endAnnualHour:
-                    for i, item in enumerate(separatedLists[l][stAnnualHour-1:endAnnualHour]):
-                        if stHour-1 <= (i + stHour - 1)%24 <= endHour-1:
-                            selHourlyData.append(item)
-                            selectedData.append(item)
-                    type = True
-                else:
-                    for i, item in enumerate(separatedLists[l][stAnnualHour-1:]):
-                        if stHour-1 <= (i + stHour - 1)%24 <= endHour-1:
-                            selHourlyData.append(item)
-                            selectedData.append(item)
-                    for i, item in enumerate(separatedLists[l][:endAnnualHour]):
-                        if stHour-1 <= i %24 <= endHour-1:
-                            selHourlyData.append(item)
-                            selectedData.append(item)
-                    type = False
+                selectedData = sc.sticky["ladybug_DataCollection"](listInfo[l], separatedLists[l]).selectPeriod(analysisPeriod)
+                selHourlyData.extend(selectedData.toLegacyList())
                 
                 [avrAnalysisPeriod.append(item) for item in listInfo[l][:4]]
-                if totalOrAverage_:
-                    avrAnalysisPeriod.append('Analysis Period -> total')
-                    avrAnalysisPeriod.append((stMonth, stDay, stHour))
-                    avrAnalysisPeriod.append((endMonth, endDay, endHour))
-                    avrAnalysisPeriod.append(total(selectedData))
-                else:
-                    avrAnalysisPeriod.append('Analysis Period -> averaged')
-                    avrAnalysisPeriod.append((stMonth, stDay, stHour))
-                    avrAnalysisPeriod.append((endMonth, endDay, endHour))
-                    avrAnalysisPeriod.append(average(selectedData))
-                
+                if totalOrAverage_: avrAnalysisPeriod.append('Analysis Period -> total')
+                else: avrAnalysisPeriod.append('Analysis Period -> averaged')
+                avrAnalysisPeriod.append((stMonth, stDay, stHour))
+                avrAnalysisPeriod.append((endMonth, endDay, endHour))
+                if totalOrAverage_: avrAnalysisPeriod.append(sum(selectedData))
+                else: avrAnalysisPeriod.append(sum(selectedData)/len(selectedData))
                 
                 # add list informations
                 [selDailyData.append(item) for item in listInfo[l][:4]]
                 selDailyData.append('Daily-> averaged for each hour')
                 selDailyData.append((stMonth, stDay, stHour))
                 selDailyData.append((endMonth, endDay, endHour))
+                selDailyData.extend(dailyLists[l])
                 
                 [avDailyData.append(item) for item in listInfo[l][:4]]
                 if totalOrAverage_: avDailyData.append('Daily-> total')
                 else: avDailyData.append('Daily-> averaged')
                 avDailyData.append((stMonth, stDay, stHour))
                 avDailyData.append((endMonth, endDay, endHour))
+                avDailyData.extend(avDaily[l][method])
                 
-                if type:
-                    for JD in range(lb_preparation.getJD(stMonth,stDay), lb_preparation.getJD(endMonth,endDay) + 1):
-                        dailyData = separatedLists[l][lb_preparation.getHour(JD, stHour)-1 : lb_preparation.getHour(JD, endHour)]
-                        if totalOrAverage_: avDailyData.append(total(dailyData))
-                        else: avDailyData.append(average(dailyData))
-                        for hour in range(endHour - stHour + 1): selDailyData.append(dailyData[hour])
-                else:
-                    for JD in range(lb_preparation.getJD(stMonth,stDay), 365 + 1):
-                        dailyData = separatedLists[l][lb_preparation.getHour(JD, stHour)-1 : lb_preparation.getHour(JD, endHour)]
-                        if totalOrAverage_: avDailyData.append(total(dailyData))
-                        else: avDailyData.append(average(dailyData))
-                        for hour in range(endHour - stHour + 1): selDailyData.append(dailyData[hour])
-                    
-                    for JD in range(1, lb_preparation.getJD(endMonth,endDay) +1):
-                        dailyData = separatedLists[l][lb_preparation.getHour(JD, stHour)-1 : lb_preparation.getHour(JD, endHour)]
-                        avDailyData.append(average(dailyData))
-                        for hour in range(endHour - stHour + 1): selDailyData.append(dailyData[hour])
-                
-
                 # average monthly
-                [selMonthlyData.append(item) for item in listInfo[l][:4]]
-                
-                ###########################
-                [selMonthlyDataMax.append(item) for item in listInfo[l][:4]]
-                [selMonthlyDataMin.append(item) for item in listInfo[l][:4]]
-                ###########################
-                
-                if totalOrAverage_:
-                    selMonthlyData.append('Monthly-> total for each hour')
-                    selMonthlyDataMin.append('Monthly-> total for each hour')
-                    selMonthlyDataMax.append('Monthly-> total for each hour')
-                else: 
-                    selMonthlyData.append('Monthly-> averaged for each hour')
-                    ###########################
-                    selMonthlyDataMax.append('Monthly-> averaged for each hour')
-                    selMonthlyDataMin.append('Monthly-> averaged for each hour')
-                    ##########################
-                
-                selMonthlyData.append((stMonth, stDay, stHour))
-                selMonthlyData.append((endMonth, endDay, endHour))
-
-                ###########################
-                selMonthlyDataMax.append((stMonth, stDay, stHour))
-                selMonthlyDataMax.append((endMonth, endDay, endHour))
-
-                selMonthlyDataMin.append((stMonth, stDay, stHour))
-                selMonthlyDataMin.append((endMonth, endDay, endHour))
-                ###########################
+                if totalOrAverage_: monthlyHeading = 'Monthly-> total for each hour'
+                else: monthlyHeading = 'Monthly-> averaged for each hour'
+                for monthlyList in (selMonthlyData, selMonthlyDataMin, selMonthlyDataMax):
+                    monthlyList.extend(listInfo[l][:4])
+                    monthlyList.append(monthlyHeading)
+                    monthlyList.append((stMonth, stDay, stHour))
+                    monthlyList.append((endMonth, endDay, endHour))
                 
                 [avMonthlyData.append(item) for item in listInfo[l][:4]]
                 if totalOrAverage_: 
                     avMonthlyData.append('Monthly-> total')
                 else: avMonthlyData.append('Monthly-> averaged')
-                    
                 avMonthlyData.append((stMonth, stDay, stHour))
                 avMonthlyData.append((endMonth, endDay, endHour))
+                avMonthlyData.extend(avMonthly[l][method])
                 
-                monthDays = [0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31] 
-                if type:
-                    for month in range(stMonth, endMonth + 1):
-                        stJD = lb_preparation.getJD(month, 1)
-                        endJD = lb_preparation.getJD(month, monthDays[month])
-                        monthlyData = separatedLists[l][lb_preparation.getHour(stJD, stHour)-1 : lb_preparation.getHour(endJD , endHour)]
-                        selMonthly = []
-                        for i, item in enumerate(monthlyData):
-                            if stHour-1 <= (i + stHour -1)%24 <= endHour-1: selMonthly.append(item)
-                        
-                        if totalOrAverage_: 
-                            avMonthlyData.append(total(selMonthly))
-                        else: avMonthlyData.append(average(selMonthly))
-                        
-                        for hour in range(endHour - stHour + 1):
-                            eachHourData = []
-                            for day in range(monthDays[month]):
-                                eachHourData.append(monthlyData[hour + (day * (endHour - stHour + 1))])
-                            if totalOrAverage_:
-                                selMonthlyData.append(total(eachHourData))
-                                selMonthlyDataMax.append(total([max(eachHourData) for x in range(len(eachHourData))]))
-                                selMonthlyDataMin.append(total([min(eachHourData) for x in range(len(eachHourData))]))
-                            else: 
-                                selMonthlyData.append(average(eachHourData))
-                                
-                                ###########################
-                                selMonthlyDataMax.append(max(eachHourData))
-                                selMonthlyDataMin.append(min(eachHourData))
-                                ###########################
+                perHour = monthlyPerHour[l]
+                selMonthlyData.extend(perHour[method])
+                if totalOrAverage_:
+                    selMonthlyDataMax.extend([maxVal * count for maxVal, count in zip(perHour['max'], perHour['count'])])
+                    selMonthlyDataMin.extend([minVal * count for minVal, count in zip(perHour['min'], perHour['count'])])
                 else:
-                    for month in range(stMonth, 12 + 1):
-                        stJD = lb_preparation.getJD(month, 1)
-                        endJD = lb_preparation.getJD(month, monthDays[month])
-                        
-                        #for item in 
-                        monthlyData = separatedLists[l][lb_preparation.getHour(stJD, stHour)-1 : lb_preparation.getHour(endJD , endHour)]
-                        selMonthly = []
-                        for i, item in enumerate(monthlyData):
-                            if stHour-1 <= (i + stHour -1)%24 <= endHour-1: selMonthly.append(item)
-                        
-                        if totalOrAverage_: avMonthlyData.append(total(selMonthly))
-                        else: avMonthlyData.append(average(selMonthly))
-                        
-                        for hour in range(endHour - stHour + 1):
-                            eachHourData = []
-                            for day in range(monthDays[month]):
-                                eachHourData.append(monthlyData[hour + (day * (endHour - stHour + 1))])
-                            if totalOrAverage_: selMonthlyData.append(total(eachHourData))
-                            else: selMonthlyData.append(average(eachHourData))
-                    
-                    for month in range(1, endMonth + 1):
-                        stJD = lb_preparation.getJD(month, 1)
-                        endJD = lb_preparation.getJD(month, monthDays[month])
-                        monthlyData = separatedLists[l][lb_preparation.getHour(stJD, stHour)-1 : lb_preparation.getHour(endJD , endHour)]
-                        if totalOrAverage_: avMonthlyData.append(total(monthlyData))
-                        else: avMonthlyData.append(average(monthlyData))
-                        
-                        for hour in range(endHour - stHour + 1):
-                            eachHourData = []
-                            for day in range(monthDays[month]):
-                                eachHourData.append(monthlyData[hour + (day * (endHour - stHour + 1))])
-                            if totalOrAverage_: selMonthlyData.append(average(eachHourData))
-                            else: selMonthlyData.append(average(eachHourData))
+                    selMonthlyDataMax.extend(perHour['max'])
+                    selMonthlyDataMin.extend(perHour['min'])
                 
             return selHourlyData, avDailyData, selDailyData, selWeeklyData, selMonthlyData, avMonthlyData, avrAnalysisPeriod, selMonthlyDataMin, selMonthlyDataMax
         elif _annualHourlyData[0] == "Connect Data Here!":
@@ -95,8 +95,8 @@ def main(sourceSrfs, gridSizeOrPoints, sunVectors, context, numOfBounce, firstBo
     contextSrfs = contextMesh + contextMeshedBrep
     joinedContext = lb_mesh.joinMesh(contextSrfs)
     
-    # Get rid of trimmed parts
-    cleanBrep = rc.Geometry.Brep.CreateFromMesh(joinedContext, False)
+    joinedContext.FaceNormals.ComputeFaceNormals()
+    rayTracer = sc.sticky["ladybug_RayTracer"](joinedContext)
     
     try:
         gridSize = float(gridSizeOrPoints[0])
@@ -104,7 +104,7 @@ def main(sourceSrfs, gridSizeOrPoints, sunVectors, context, numOfBounce, firstBo
     except:
         basedOnGrid = False
         initialTestPoints = rs.coerce3dpointlist(gridSizeOrPoints)
-        ptsNormals = [cleanBrep.ClosestPoint(intPt, sc.doc.ModelAbsoluteTolerance)[5] for intPt in initialTestPoints]
+        ptsNormals = [rc.Geometry.Vector3d(joinedContext.FaceNormals[joinedContext.ClosestMeshPoint(intPt, 0).FaceIndex]) for intPt in initialTestPoints]
         
     
     # generate the test points
@@ -124,56 +124,51 @@ def main(sourceSrfs, gridSizeOrPoints, sunVectors, context, numOfBounce, firstBo
         
     
     # find the distance for moving the points backward
+    maxPt =joinedContext.GetBoundingBox(True).Max
+    minPt = joinedContext.GetBoundingBox(True).Min
     try:
         firstBounceLen = float(firstBounceLen)
     except:
-        maxPt =joinedContext.GetBoundingBox(True).Max
-        minPt = joinedContext.GetBoundingBox(True).Min
         firstBounceLen = maxPt.DistanceTo(minPt)
-        
-    rays = []
+    try:
+        lastBounceLen = float(lastBounceLen)
+    except:
+        lastBounceLen = maxPt.DistanceTo(minPt)
+    
+    # trace all of the rays that reach the front of the source surfaces together
+    origins = []
+    directions = []
+    rayIndices = []
     for ptCount, testPt in enumerate(initialTestPoints):
         for vector in sunVectors:
             vector.Unitize()
-            testPt = rc.Geometry.Point3d.Add(testPt, -vector * firstBounceLen)
-            ray = rc.Geometry.Ray3d(testPt, vector)
-            
             if numOfBounce>0 and rc.Geometry.Vector3d.VectorAngle(vector, ptsNormals[ptCount]) < math.pi/2:
-                intPts = rc.Geometry.Intersect.Intersection.RayShoot(ray, [cleanBrep], numOfBounce)
-                #print intPts
-                if intPts:
-                    ptList = [testPt]
-                    ptList.extend(intPts)
-                    ray = rc.Geometry.Polyline(ptList).ToNurbsCurve()
-                    
-                    try:
-                        # create last ray
-                        # calculate plane at intersection
-                        intNormal = cleanBrep.ClosestPoint(intPts[-1], sc.doc.ModelAbsoluteTolerance)[5]
-                        
-                        lastVector = rc.Geometry.Vector3d(ptList[-2] - ptList[-1])
-                        lastVector.Unitize()
-                        
-                        crossProductNormal = rc.Geometry.Vector3d.CrossProduct(intNormal, lastVector)
-                        
-                        plane = rc.Geometry.Plane(intPts[-1], intNormal, crossProductNormal)
-                        
-                        mirrorT = rc.Geometry.Transform.Mirror(intPts[-1], plane.Normal)
-                        
-                        lastRay = rc.Geometry.Line(intPts[-1], lastBounceLen * lastVector).ToNurbsCurve()
-                        lastRay.Transform(mirrorT)
-                        
-                        ray = rc.Geometry.Curve.JoinCurves([ray, lastRay])[0]
-                    except:
-                        pass
-                        
-                    rays.append(ray)
-                else:
-                    # no bounce so let's just create a line form the point
-                    firstRay = rc.Geometry.Line(testPt, lastBounceLen * vector).ToNurbsCurve()
-                    rays.append(firstRay)
+                startPt = rc.Geometry.Point3d.Add(testPt, -vector * firstBounceLen)
+                rayIndices.append(len(origins))
+                origins.append((startPt.X, startPt.Y, startPt.Z))
+                directions.append((vector.X, vector.Y, vector.Z))
             else:
-                rays.append(None)
+                rayIndices.append(None)
+    
+    hitPoints, hitNormals, lastDirections = rayTracer.traceRays(origins, directions, numOfBounce)
+    
+    rays = []
+    for rayIndex in rayIndices:
+        if rayIndex == None:
+            rays.append(None)
+            continue
+        origin, intPts, lastVector = origins[rayIndex], hitPoints[rayIndex], lastDirections[rayIndex]
+        if intPts:
+            # add the last ray after the last bounce
+            ptList = [origin] + intPts
+            lastPt = intPts[-1]
+            ptList.append((lastPt[0] + lastBounceLen * lastVector[0], lastPt[1] + lastBounceLen * lastVector[1], lastPt[2] + lastBounceLen * lastVector[2]))
+            ray = rc.Geometry.Polyline([rc.Geometry.Point3d(*pt) for pt in ptList]).ToNurbsCurve()
+            rays.append(ray)
+        else:
+            # no bounce so let's just create a line form the point
+            firstRay = rc.Geometry.Line(rc.Geometry.Point3d(*origin), lastBounceLen * rc.Geometry.Vector3d(*lastVector)).ToNurbsCurve()
+            rays.append(firstRay)
     
     return rays, initialTestPoints
 
@@ -85,7 +85,6 @@ def main(coolingSetPoint, heatingSetPoint, hourlyDryBulbTemperature, useDailyAvr
             w = gh.GH_RuntimeMessageLevel.Warning
             ghenv.Component.AddRuntimeMessage(w, warning)
             return -1
-        lb_preparation = sc.sticky["ladybug_Preparation"]()
         
         # copy the custom code here
         # check the input data
@@ -97,14 +96,7 @@ def main(coolingSetPoint, heatingSetPoint, hourlyDryBulbTemperature, useDailyAvr
         
         if checkData:
             # separate data
-            indexList, listInfo = lb_preparation.separateList(hourlyDBTemp, lb_preparation.strToBeFound)
-            
-            #separate total, diffuse and direct radiations
-            separatedLists = []
-            for i in range(len(indexList)-1):
-                selList = []
-                [selList.append(float(x)) for x in hourlyDBTemp[indexList[i]+7:indexList[i+1]]]
-                separatedLists.append(selList)
+            dataCollections = sc.sticky["ladybug_DataCollection"].fromLegacyList(hourlyDBTemp)
             
             daily_coolingDegDays = [];
             daily_heatingDegDays = [];
@@ -113,82 +105,28 @@ def main(coolingSetPoint, heatingSetPoint, hourlyDryBulbTemperature, useDailyAvr
             annual_coolingDegDays = [];
             annual_heatingDegDays = [];
             
-            for l in range(len(separatedLists)):
-                    [daily_coolingDegDays.append(item) for item in listInfo[l][:2]]
-                    daily_coolingDegDays.append('Daily_coolingDegDays')
-                    daily_coolingDegDays.append('Degree Days')
-                    daily_coolingDegDays.append('Daily')
-                    [daily_coolingDegDays.append(item) for item in listInfo[l][5:7]]
-                
-                    [daily_heatingDegDays.append(item) for item in listInfo[l][:2]]
-                    daily_heatingDegDays.append('Daily_heatingDegDays')
-                    daily_heatingDegDays.append('Degree Days')
-                    daily_heatingDegDays.append('Daily')
-                    [daily_heatingDegDays.append(item) for item in listInfo[l][5:7]]
-
-                    [monthly_coolingDegDays.append(item) for item in listInfo[l][:2]]
-                    monthly_coolingDegDays.append('monthly_coolingDegDays')
-                    monthly_coolingDegDays.append('Degree Days')
-                    monthly_coolingDegDays.append('Monthly')
-                    [monthly_coolingDegDays.append(item) for item in listInfo[l][5:7]]
-                
-                    [monthly_heatingDegDays.append(item) for item in listInfo[l][:2]]
-                    monthly_heatingDegDays.append('monthly_heatingDegDays')
-                    monthly_heatingDegDays.append('Degree Days')
-                    monthly_heatingDegDays.append('Monthly')
-                    [monthly_heatingDegDays.append(item) for item in listInfo[l][5:7]]
-                
-                    [annual_coolingDegDays.append(item) for item in listInfo[l][:2]]
-                    annual_coolingDegDays.append('annual_coolingDegDays')
-                    annual_coolingDegDays.append('Degree Days')
-                    annual_coolingDegDays.append('Annual')
-                    [annual_coolingDegDays.append(item) for item in listInfo[l][5:7]]
-                
-                    [annual_heatingDegDays.append(item) for item in listInfo[l][:2]]
-                    annual_heatingDegDays.append('annual_heatingDegDays')
-                    annual_heatingDegDays.append('Degree Days')
-                    annual_heatingDegDays.append('Annual')
-                    [annual_heatingDegDays.append(item) for item in listInfo[l][5:7]]
-                    
-                    hourlyTemperature = separatedLists[l]
-                    
-                    for day in range (int(len(hourlyTemperature)/24)):
-                        # 7 is for thr first 7 members of the list which are information
-                        dayHourlyTemp = hourlyTemperature[(day * 24):((day+1)*24)]
-                        if useDailyAvrMethod == True:
-                            dayAvrTemp = sum(dayHourlyTemp)/len(dayHourlyTemp)
-                            if dayAvrTemp < heatingSetPoint:
-                                daily_heatingDegDays.append(heatingSetPoint - dayAvrTemp)
-                            else: daily_heatingDegDays.append(0)
-                            if coolingSetPoint < dayAvrTemp:
-                                daily_coolingDegDays.append(dayAvrTemp - coolingSetPoint)
-                            else: daily_coolingDegDays.append(0)
-                        else:
-                            minT = min(dayHourlyTemp)
-                            maxT = max(dayHourlyTemp)
-                            
-                            # heating degree days
-                            if minT > heatingSetPoint: daily_heatingDegDays.append(0)
-                            elif (maxT + minT)/2 > heatingSetPoint: daily_heatingDegDays.append((heatingSetPoint-minT)/4)
-                            elif maxT >= heatingSetPoint: daily_heatingDegDays.append((heatingSetPoint-minT)/2-(maxT-heatingSetPoint)/4)
-                            elif maxT < heatingSetPoint: daily_heatingDegDays.append(heatingSetPoint-(maxT+minT)/2)
-                            
-                            # cooling degree days
-                            if maxT < coolingSetPoint: daily_coolingDegDays.append(0)
-                            elif (maxT + minT)/2 < coolingSetPoint: daily_coolingDegDays.append((maxT-coolingSetPoint)/4)
-                            elif minT <= coolingSetPoint: daily_coolingDegDays.append((maxT-coolingSetPoint)/2 - (coolingSetPoint-minT)/4)
-                            elif minT > coolingSetPoint: daily_coolingDegDays.append((maxT + minT)/2 - coolingSetPoint)
-                    
-                    numOfDays = lb_preparation.numOfDays
+            for collection in dataCollections:
+                    listInfo = collection.header
+                    daily_coolingDegDays.extend(listInfo[:2] + ['Daily_coolingDegDays', 'Degree Days', 'Daily'] + listInfo[5:7])
+                    daily_heatingDegDays.extend(listInfo[:2] + ['Daily_heatingDegDays', 'Degree Days', 'Daily'] + listInfo[5:7])
+                    monthly_coolingDegDays.extend(listInfo[:2] + ['monthly_coolingDegDays', 'Degree Days', 'Monthly'] + listInfo[5:7])
+                    monthly_heatingDegDays.extend(listInfo[:2] + ['monthly_heatingDegDays', 'Degree Days', 'Monthly'] + listInfo[5:7])
+                    annual_coolingDegDays.extend(listInfo[:2] + ['annual_coolingDegDays', 'Degree Days', 'Annual'] + listInfo[5:7])
+                    annual_heatingDegDays.extend(listInfo[:2] + ['annual_heatingDegDays', 'Degree Days', 'Annual'] + listInfo[5:7])
                     
-                    for month in range(len(numOfDays)- 1):
-                        monthly_heatingDegDays.append(sum(daily_heatingDegDays[numOfDays[month] + 7: numOfDays[month + 1]+ 7]))
-                        monthly_coolingDegDays.append(sum(daily_coolingDegDays[numOfDays[month] + 7: numOfDays[month + 1]+ 7]))
+                    # the daily minimum, maximum and average temperatures are found once for all of the degree days
+                    degreeDays = sc.sticky["ladybug_DegreeDays"](collection)
+                    coolingDegDays, heatingDegDays = degreeDays.dailyDegreeDays(coolingSetPoint, heatingSetPoint, useDailyAvrMethod == True)
+                    daily_coolingDegDays.extend(coolingDegDays)
+                    daily_heatingDegDays.extend(heatingDegDays)
                     
-                    annual_heatingDegDays.append(sum(monthly_heatingDegDays[7:]))
-                    annual_coolingDegDays.append(sum(monthly_coolingDegDays[7:]))
-                        
+                    monthlyHeating = degreeDays.monthlySums(heatingDegDays)
+                    monthlyCooling = degreeDays.monthlySums(coolingDegDays)
+                    monthly_heatingDegDays.extend(monthlyHeating)
+                    monthly_coolingDegDays.extend(monthlyCooling)
                     
+                    annual_heatingDegDays.append(sum(monthlyHeating))
+                    annual_coolingDegDays.append(sum(monthlyCooling))
                     
             return daily_coolingDegDays, daily_heatingDegDays, monthly_coolingDegDays, monthly_heatingDegDays, annual_coolingDegDays, annual_heatingDegDays
         elif hourlyDBTemp[0] == 'Connect temperature here':
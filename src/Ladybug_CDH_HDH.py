@@ -92,7 +92,6 @@ def main(coolingSetPoint, heatingSetPoint, coolingSetBack, heatingSetBack, start
             w = gh.GH_RuntimeMessageLevel.Warning
             ghenv.Component.AddRuntimeMessage(w, warning)
             return -1
-        lb_preparation = sc.sticky["ladybug_Preparation"]()
         
         # copy the custom code here
         # check the input data
@@ -104,14 +103,7 @@ def main(coolingSetPoint, heatingSetPoint, coolingSetBack, heatingSetBack, start
         
         if checkData:
             # separate data
-            indexList, listInfo = lb_preparation.separateList(hourlyDBTemp, lb_preparation.strToBeFound)
-        
-            #separate total, diffuse and direct radiations
-            separatedLists = []
-            for i in range(len(indexList)-1):
-                selList = []
-                [selList.append(float(x)) for x in hourlyDBTemp[indexList[i]+7:indexList[i+1]]]
-                separatedLists.append(selList)
+            dataCollections = sc.sticky["ladybug_DataCollection"].fromLegacyList(hourlyDBTemp)
             
             hourly_coolingDegHours = [];
             hourly_heatingDegHours = [];
@@ -122,79 +114,39 @@ def main(coolingSetPoint, heatingSetPoint, coolingSetBack, heatingSetBack, start
             annual_coolingDegHours = [];
             annual_heatingDegHours = [];
             
-            for l in range(len(separatedLists)):
-                [hourly_coolingDegHours.append(item) for item in listInfo[l][:2]]
-                hourly_coolingDegHours.append('Cooling Degree Hours')
-                hourly_coolingDegHours.append('Degree Hours')
-                hourly_coolingDegHours.append('Hourly')
-                [hourly_coolingDegHours.append(item) for item in listInfo[l][5:7]]
-                
-                [hourly_heatingDegHours.append(item) for item in listInfo[l][:2]]
-                hourly_heatingDegHours.append('Heating Degree Hours')
-                hourly_heatingDegHours.append('Degree Hours')
-                hourly_heatingDegHours.append('Hourly')
-                [hourly_heatingDegHours.append(item) for item in listInfo[l][5:7]]
-                
-                [daily_coolingDegHours.append(item) for item in listInfo[l][:2]]
-                daily_coolingDegHours.append('Cooling Degree Hours')
-                daily_coolingDegHours.append('Degree Hours')
-                daily_coolingDegHours.append('Daily')
-                [daily_coolingDegHours.append(item) for item in listInfo[l][5:7]]
-                
-                [daily_heatingDegHours.append(item) for item in listInfo[l][:2]]
-                daily_heatingDegHours.append('Heating Degree Hours')
-                daily_heatingDegHours.append('Degree Hours')
-                daily_heatingDegHours.append('Daily')
-                [daily_heatingDegHours.append(item) for item in listInfo[l][5:7]]
-
-                [monthly_coolingDegHours.append(item) for item in listInfo[l][:2]]
-                monthly_coolingDegHours.append('Cooling Degree Hours')
-                monthly_coolingDegHours.append('Degree Hours')
-                monthly_coolingDegHours.append('Monthly')
-                [monthly_coolingDegHours.append(item) for item in listInfo[l][5:7]]
-                
-                [monthly_heatingDegHours.append(item) for item in listInfo[l][:2]]
-                monthly_heatingDegHours.append('Heating Degree Hours')
-                monthly_heatingDegHours.append('Degree Hours')
-                monthly_heatingDegHours.append('Monthly')
-                [monthly_heatingDegHours.append(item) for item in listInfo[l][5:7]]
-                
-                [annual_coolingDegHours.append(item) for item in listInfo[l][:2]]
-                annual_coolingDegHours.append('Cooling Degree Hours')
-                annual_coolingDegHours.append('Degree Hours')
-                annual_coolingDegHours.append('Annual')
-                [annual_coolingDegHours.append(item) for item in listInfo[l][5:7]]
-                
-                [annual_heatingDegHours.append(item) for item in listInfo[l][:2]]
-                annual_heatingDegHours.append('Heating Degree Hours')
-                annual_heatingDegHours.append('Degree Hours')
-                annual_heatingDegHours.append('Annual')
-                [annual_heatingDegHours.append(item) for item in listInfo[l][5:7]]
-                
-                hourlyTemperature = separatedLists[l]
+            for collection in dataCollections:
+                listInfo = collection.header
+                hourly_coolingDegHours.extend(listInfo[:2] + ['Cooling Degree Hours', 'Degree Hours', 'Hourly'] + listInfo[5:7])
+                hourly_heatingDegHours.extend(listInfo[:2] + ['Heating Degree Hours', 'Degree Hours', 'Hourly'] + listInfo[5:7])
+                daily_coolingDegHours.extend(listInfo[:2] + ['Cooling Degree Hours', 'Degree Hours', 'Daily'] + listInfo[5:7])
+                daily_heatingDegHours.extend(listInfo[:2] + ['Heating Degree Hours', 'Degree Hours', 'Daily'] + listInfo[5:7])
+                monthly_coolingDegHours.extend(listInfo[:2] + ['Cooling Degree Hours', 'Degree Hours', 'Monthly'] + listInfo[5:7])
+                monthly_heatingDegHours.extend(listInfo[:2] + ['Heating Degree Hours', 'Degree Hours', 'Monthly'] + listInfo[5:7])
+                annual_coolingDegHours.extend(listInfo[:2] + ['Cooling Degree Hours', 'Degree Hours', 'Annual'] + listInfo[5:7])
+                annual_heatingDegHours.extend(listInfo[:2] + ['Heating Degree Hours', 'Degree Hours', 'Annual'] + listInfo[5:7])
                 
                 # for each hour based on hourly temperature data
-                for hour, temp in enumerate(hourlyTemperature):
-                    if float(temp) < heatingSetPoint:
-                        hourly_heatingDegHours.append(heatingSetPoint - float(temp))
-                    else: hourly_heatingDegHours.append(0)
-                    if coolingSetPoint < float(temp):
-                        hourly_coolingDegHours.append(float(temp) - coolingSetPoint)
-                    else: hourly_coolingDegHours.append(0)
+                heatingHours, coolingHours = [], []
+                for temp in collection:
+                    temp = float(temp)
+                    heatingHours.append(heatingSetPoint - temp if temp < heatingSetPoint else 0)
+                    coolingHours.append(temp - coolingSetPoint if coolingSetPoint < temp else 0)
+                hourly_heatingDegHours.extend(heatingHours)
+                hourly_coolingDegHours.extend(coolingHours)
                 
-                # for each day based on hourly degree hours
-                for day in range (int(len(hourlyTemperature)/24)):
-                    # 7 is for thr first 7 members of the list which are information
-                    daily_heatingDegHours.append(sum(hourly_heatingDegHours[(day * 24) + 7:((day+1)*24) + 7]))
-                    daily_coolingDegHours.append(sum(hourly_coolingDegHours[(day * 24) + 7:((day+1)*24) + 7]))
+                # for each day from the sum of the hours of the day
+                heatingDegHours = [sum(heatingHours[(day * 24):((day+1)*24)]) for day in range(int(len(heatingHours)/24))]
+                coolingDegHours = [sum(coolingHours[(day * 24):((day+1)*24)]) for day in range(int(len(coolingHours)/24))]
+                daily_heatingDegHours.extend(heatingDegHours)
+                daily_coolingDegHours.extend(coolingDegHours)
                 
-                numOfDays = lb_preparation.numOfDays
-                for month in range(len(numOfDays)- 1):
-                    monthly_heatingDegHours.append(sum(daily_heatingDegHours[numOfDays[month] + 7: numOfDays[month + 1]+ 7]))
-                    monthly_coolingDegHours.append(sum(daily_coolingDegHours[numOfDays[month] + 7: numOfDays[month + 1]+ 7]))
+                monthlyHeating = sc.sticky["ladybug_DegreeDays"].monthlySums(heatingDegHours)
+                monthlyCooling = sc.sticky["ladybug_DegreeDays"].monthlySums(coolingDegHours)
+                monthly_heatingDegHours.extend(monthlyHeating)
+                monthly_coolingDegHours.extend(monthlyCooling)
                 
-                annual_heatingDegHours.append(sum(monthly_heatingDegHours[7:]))
-                annual_coolingDegHours.append(sum(monthly_coolingDegHours[7:]))
+                annual_heatingDegHours.append(sum(monthlyHeating))
+                annual_coolingDegHours.append(sum(monthlyCooling))
                 
             return hourly_coolingDegHours, hourly_heatingDegHours, daily_coolingDegHours, daily_heatingDegHours, monthly_coolingDegHours, monthly_heatingDegHours, annual_coolingDegHours, annual_heatingDegHours
         elif hourlyDBTemp[0] == 'Connect temperature here':
@@ -163,6 +163,8 @@ def getHOYs(hours, days, months, timeStep, lb_preparation, method = 0):
     if timeStep != 1: hours = rs.frange(hours[0], hours[-1] + 1 - 1/timeStep, 1/timeStep)
     
     HOYS = []
+    # a set of the HOYs to keep the list unique in linear time
+    foundHOYs = set()
     
     for monthCount, m in enumerate(months):
         # just a single day
@@ -191,7 +193,9 @@ def getHOYs(hours, days, months, timeStep, lb_preparation, method = 0):
                 m  = lb_preparation.checkMonth(int(m))
                 d = lb_preparation.checkDay(int(d), m)
                 HOY = lb_preparation.date2Hour(m, d, h)
-                if HOY not in HOYS: HOYS.append(int(HOY))
+                if HOY not in foundHOYs:
+                    HOYS.append(int(HOY))
+                    foundHOYs.add(int(HOY))
     
     return HOYS
 
@@ -48,7 +48,7 @@ Provided by Ladybug 0.0.69
     Returns:
         readMe!: ...
         contourMesh: A list of colored meshes that is organized with each contour region as its own color.
-        underlayMesh: A mesh that is colored face-by-face (like a typical Ladybug mesh), which is plaed under the contour mesh to make the visualization read when the Rhino intersection fails to produce a complete contourMesh.
+        underlayMesh: A mesh that is colored face-by-face (like a typical Ladybug mesh), which is plaed under the contour mesh.
         contourLines: Curves that show values of constant value along the results.
         contourColors: Connect these to a native Grasshopper Preview componen along with the contourLines to get a colored line visualization.
         contourLabels: A list of text meshes that show the value along each contour line.
@@ -112,7 +112,18 @@ def checkMeshPlanarity(mesh, basePlanePt):
     return meshIsPlanar, mesh, meshPlane, meshNormals
 
 
-def main(analysisResult, inputMesh, contourType, heightDomain, legendPar, analysisTitle, legendTitle, bakeIt, layerName, lb_preparation, lb_visualization):
+def contourChart(coloredChart, lb_visualization, MeshContour):
+    # contour the welded vertices of the height-mapped mesh with their heights as the values
+    chartTopology = lb_visualization.getMeshTopology(coloredChart)
+    chartPts = [(pt.X, pt.Y, pt.Z) for pt in chartTopology.vertexPoints]
+    return MeshContour(chartPts, chartTopology.faceVertices, [pt[2] for pt in chartPts])
+
+
+def polylineCurves(polylines):
+    return [rc.Geometry.PolylineCurve([rc.Geometry.Point3d(*pt) for pt in polyline]) for polyline in polylines]
+
+
+def main(analysisResult, inputMesh, contourType, heightDomain, legendPar, analysisTitle, legendTitle, bakeIt, layerName, lb_preparation, lb_visualization, MeshContour):
     # Get the Unit System.
     conversionFac = lb_preparation.checkUnits()
     
@@ -138,7 +149,7 @@ def main(analysisResult, inputMesh, contourType, heightDomain, legendPar, analys
         for count in inputMesh.Vertices:
             blankColors.append(System.Drawing.Color.Gray)
     
-    # Generate an underlay mesh to cover our ass when the intersection fails.
+    # Generate an underlay mesh that is colored face-by-face.
     underlayMesh = None
     if contourType == 0 or contourType == 1 or contourType == None:
         colors = lb_visualization.gradientColor(analysisResult, lowB, highB, customColors)
@@ -186,6 +197,7 @@ def main(analysisResult, inputMesh, contourType, heightDomain, legendPar, analys
         heightD = rc.Geometry.Interval(0,(numSeg-1)*(1/conversionFac))
         contInterval = contIncr*(1/conversionFac)
         coloredChart = lb_visualization.create3DColoredMesh(inputMesh, analysisResult, heightD, blankColors, meshStruct)
+    chartContour = contourChart(coloredChart, lb_visualization, MeshContour)
     
     # Figure out some basic things about the Legend.
     lb_visualization.calculateBB([coloredChart], True)
@@ -244,17 +256,12 @@ def main(analysisResult, inputMesh, contourType, heightDomain, legendPar, analys
             intMeshes.append(movedPlaneMesh)
     
     # Contour the mesh.
-    contourMeshArea = rc.Geometry.AreaMassProperties.Compute(inputMesh).Area
-    initMeshArea = contourMeshArea
-    failedIntersects = []
     contourMesh = []
     contourLines = []
     contourLabels = []
     contourColors = []
     labelText = []
     labelTextPts = []
-    startTrigger = False
-    failIntersecTrigger = False
     
     #Generate colored regions.
     if contourType == 0 or contourType == 1 or contourType == None:
@@ -267,52 +274,13 @@ def main(analysisResult, inputMesh, contourType, heightDomain, legendPar, analys
             coloredChart.VertexColors.CreateMonotoneMesh(legendColors[colorIndex])
             contourMesh.append(coloredChart)
         else:
-            try:
-                finalSplitMesh = rc.Geometry.Mesh.Split(coloredChart, intMeshes[0])[-1]
-                finalSplitMesh.VertexColors.CreateMonotoneMesh(legendColors[0])
-                contourArea = rc.Geometry.AreaMassProperties.Compute(finalSplitMesh).Area
-                if contourArea < contourMeshArea-sc.doc.ModelAbsoluteTolerance and finalSplitMesh.IsValid:
-                    contourMesh.append(finalSplitMesh)
-                startTrigger = True
-            except:
-                pass
-            for count in range(len(intMeshes)-1):
-                try:
-                    if startTrigger == False:
-                        finalSplitMesh = rc.Geometry.Mesh.Split(coloredChart, intMeshes[count])[-1]
-                        finalSplitMesh.VertexColors.CreateMonotoneMesh(legendColors[count])
-                        contourArea = rc.Geometry.AreaMassProperties.Compute(finalSplitMesh).Area
-                        if contourArea < contourMeshArea-sc.doc.ModelAbsoluteTolerance and finalSplitMesh.IsValid:
-                            contourMesh.append(finalSplitMesh)
-                            contourColors.append([legendColors[count]])
-                        startTrigger = True
-                        initSplitMesh = rc.Geometry.Mesh.Split(coloredChart, intMeshes[count+1])[-1]
-                        finalSplitMesh = rc.Geometry.Mesh.Split(initSplitMesh, intMeshes[count])[0]
-                    elif count == len(intMeshes)-2:
-                        finalSplitMesh = rc.Geometry.Mesh.Split(coloredChart, intMeshes[count])[0]
-                    else:
-                        initSplitMesh = rc.Geometry.Mesh.Split(coloredChart, intMeshes[count])[-1]
-                        initMeshArea = rc.Geometry.AreaMassProperties.Compute(initSplitMesh).Area
-                        finalSplitMesh = rc.Geometry.Mesh.Split(initSplitMesh, intMeshes[count+1])[0]
-                    try:
-                        lColor = legendColors[count+1]
-                        finalSplitMesh.VertexColors.CreateMonotoneMesh(lColor)
-                    except:
-                        lColor = legendColors[count+1]
-                        finalSplitMesh.VertexColors.CreateMonotoneMesh(lColor)
-                    contourArea = rc.Geometry.AreaMassProperties.Compute(finalSplitMesh).Area
-                    if contourArea < contourMeshArea-sc.doc.ModelAbsoluteTolerance and contourArea < initMeshArea-sc.doc.ModelAbsoluteTolerance and finalSplitMesh.IsValid:
-                        contourMesh.append(finalSplitMesh)
-                        contourColors.append([lColor])
-                except:
-                    try:
-                        finalSplitMesh = rc.Geometry.Mesh.Split(coloredChart, intMeshes[count])[0]
-                        finalSplitMesh.VertexColors.CreateMonotoneMesh(legendColors[count])
-                        finalSplitMesh.Transform(moveTrans)
-                        contourArea = rc.Geometry.AreaMassProperties.Compute(finalSplitMesh).Area
-                        if contourArea < contourMeshArea-sc.doc.ModelAbsoluteTolerance:
-                            failedIntersects.append(finalSplitMesh)
-                    except: pass
+            # the regions between the levels of the intersection planes in a single pass over the mesh
+            bands = chartContour.isoBands([plane.OriginZ for plane in intPlanes[:-1]])
+            for count, band in enumerate(bands):
+                if len(band.faces) == 0: continue
+                band.colors = [legendColors[count]] * len(band.vertices)
+                contourMesh.append(band.toRhinoMesh())
+                if count > 0: contourColors.append([legendColors[count]])
     
     # Generate Labeled Contours
     try:
@@ -332,10 +300,11 @@ def main(analysisResult, inputMesh, contourType, heightDomain, legendPar, analys
                 labelSize = textSize/5
             else:
                 labelSize = _labelSize_
+            chartLines = chartContour.isoLines([plane.OriginZ for plane in intPlanes])
             for count, plane in enumerate(intPlanes):
                 contourLines.append([])
                 contourLabels.append([])
-                theLines = rc.Geometry.Mesh.CreateContourCurves(coloredChart, plane)
+                theLines = polylineCurves(chartLines[count])
                 for line in theLines:
                     contourLines[count].append(line)
                     try:
@@ -352,19 +321,19 @@ def main(analysisResult, inputMesh, contourType, heightDomain, legendPar, analys
         legendSrfs = None
     
     if contourType == 3:
+        chartLines = chartContour.isoLines([plane.OriginZ for plane in intPlanes])
         for count, plane in enumerate(intPlanes):
             try:
                 contourColors.append([legendColors[count]])
             except:
                 pass
-            contourLines.append(rc.Geometry.Mesh.CreateContourCurves(coloredChart, plane))
+            contourLines.append(polylineCurves(chartLines[count]))
     
     # Project the mesh back to the XYPlane.
     if heightDomain == None:
         planeTrans = rc.Geometry.Transform.PlanarProjection(rc.Geometry.Plane.WorldXY)
         crvMove = rc.Geometry.Transform.Translation(0,0,sc.doc.ModelAbsoluteTolerance*5)
         for geo in contourMesh: geo.Transform(planeTrans)
-        for geo in failedIntersects: geo.Transform(planeTrans)
         for geo in intMeshes: geo.Transform(planeTrans)
         for crvList in contourLines:
             for geo in crvList:
@@ -390,7 +359,6 @@ def main(analysisResult, inputMesh, contourType, heightDomain, legendPar, analys
     # Change the geomtry back to its original plane.
     transfBack = rc.Geometry.Transform.ChangeBasis(meshPlane, rc.Geometry.Plane.WorldXY)
     for geo in contourMesh: geo.Transform(transfBack)
-    for geo in failedIntersects: geo.Transform(transfBack)
     for geo in intMeshes: geo.Transform(transfBack)
     for crvList in contourLines:
         for geo in crvList: geo.Transform(transfBack)
@@ -405,10 +373,6 @@ def main(analysisResult, inputMesh, contourType, heightDomain, legendPar, analys
         except:
             pass
     
-    # Move any failed intersections below the main surface.
-    moveTrans = rc.Geometry.Transform.Translation(0,0,-(1/conversionFac)*.03)
-    for geo in failedIntersects: geo.Transform(moveTrans)
-    
     # If the user has requested to bake the geomtry, then bake it.
     if bakeIt > 0:
         # Greate a joined mesh.
@@ -443,7 +407,7 @@ def main(analysisResult, inputMesh, contourType, heightDomain, legendPar, analys
         if bakeIt == 1: lb_visualization.bakeObjects(newLayerIndex, joinedContMesh, legendSrfs, legendText, textPt, textSize, legendFont, flatContourLines, decimalPlaces, True)
         else: lb_visualization.bakeObjects(newLayerIndex, joinedContMesh, legendSrfs, legendText, textPt, textSize, legendFont, flatContourLines, decimalPlaces, False)
     
-    return contourMesh, [underlayMesh]+failedIntersects, contourLines, contourColors, contourLabels, [legendSrfs, flattenedLegend], legendBasePoint, legendColors, intMeshes
+    return contourMesh, [underlayMesh], contourLines, contourColors, contourLabels, [legendSrfs, flattenedLegend], legendBasePoint, legendColors, intMeshes
 
 
 
@@ -463,6 +427,7 @@ if sc.sticky.has_key('ladybug_release'):
     
     lb_preparation = sc.sticky["ladybug_Preparation"]()
     lb_visualization = sc.sticky["ladybug_ResultVisualization"]()
+    MeshContour = sc.sticky["ladybug_MeshContour"]
 else:
     print "You should let the Ladybug fly first..."
     w = gh.GH_RuntimeMessageLevel.Warning
@@ -472,7 +437,7 @@ else:
 
 
 if initCheck == True and _inputMesh and len(_analysisResult)!=0:
-    result = main(_analysisResult, _inputMesh, _contourType_, heightDomain_, legendPar_, analysisTitle_, legendTitle_, bakeIt_, layerName_, lb_preparation, lb_visualization)
+    result = main(_analysisResult, _inputMesh, _contourType_, heightDomain_, legendPar_, analysisTitle_, legendTitle_, bakeIt_, layerName_, lb_preparation, lb_visualization, MeshContour)
     if result!= -1:
         legend= []
         [legend.append(item) for item in lb_visualization.openLegend(result[5])]
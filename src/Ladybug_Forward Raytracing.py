@@ -80,7 +80,6 @@ def main(startPts, startVectors, context, numOfBounce, lastBounceLen):
         ghenv.Component.AddRuntimeMessage(w, "You should first let the Ladybug fly...")
         return -1
     
-    # A failed attampt to use mesh instead of brep so the component could work with trimmed surfaces
     if len(context)!=0:
         ## clean the geometry and bring them to rhinoCommon separated as mesh and Brep
         contextMesh, contextBrep = lb_preparation.cleanAndCoerceList(context)
@@ -91,51 +90,34 @@ def main(startPts, startVectors, context, numOfBounce, lastBounceLen):
         contextMeshedBrep = lb_preparation.flattenList(contextMeshedBrep)
         contextSrfs = contextMesh + contextMeshedBrep
         joinedContext = lb_mesh.joinMesh(contextSrfs)
-        
-        
-    # Get rid of trimmed parts
-    cleanBrep = rc.Geometry.Brep.CreateFromMesh(joinedContext, False)
     
-    rays = []
+    # trace all of the rays together through the faces of the mesh
+    rayTracer = sc.sticky["ladybug_RayTracer"](joinedContext)
+    origins = []
+    directions = []
     for testPt in startPts:
         for vector in startVectors:
             vector.Unitize()
-            ray = rc.Geometry.Ray3d(testPt, vector)
-            if numOfBounce>0:
-                intPts = rc.Geometry.Intersect.Intersection.RayShoot(ray, [cleanBrep], numOfBounce)
-                #print intPts
-                if intPts:
-                    ptList = [testPt]
-                    ptList.extend(intPts)
-                    ray = rc.Geometry.Polyline(ptList).ToNurbsCurve()
-                    
-                    try:
-                        # create last ray
-                        # calculate plane at intersection
-                        intNormal = cleanBrep.ClosestPoint(intPts[-1], sc.doc.ModelAbsoluteTolerance)[5]
-                        
-                        lastVector = rc.Geometry.Vector3d(ptList[-2] - ptList[-1])
-                        lastVector.Unitize()
-                        
-                        crossProductNormal = rc.Geometry.Vector3d.CrossProduct(intNormal, lastVector)
-                        
-                        plane = rc.Geometry.Plane(intPts[-1], intNormal, crossProductNormal)
-                        
-                        mirrorT = rc.Geometry.Transform.Mirror(intPts[-1], plane.Normal)
-                        
-                        lastRay = rc.Geometry.Line(intPts[-1], lastBounceLen * lastVector).ToNurbsCurve()
-                        lastRay.Transform(mirrorT)
-                        
-                        ray = rc.Geometry.Curve.JoinCurves([ray, lastRay])[0]
-                    except:
-                        pass
-                        
-                    rays.append(ray)
-                else:
-                    # no bounce so let's just create a line form the point
-                    firstRay = rc.Geometry.Line(testPt, lastBounceLen * vector).ToNurbsCurve()
-                    rays.append(firstRay)
-                    
+            origins.append((testPt.X, testPt.Y, testPt.Z))
+            directions.append((vector.X, vector.Y, vector.Z))
+    
+    if numOfBounce>0: hitPoints, hitNormals, lastDirections = rayTracer.traceRays(origins, directions, numOfBounce)
+    else: hitPoints, lastDirections = [[] for origin in origins], directions
+    
+    rays = []
+    for origin, intPts, lastVector in zip(origins, hitPoints, lastDirections):
+        if intPts:
+            # add the last ray after the last bounce
+            ptList = [origin] + intPts
+            lastPt = intPts[-1]
+            ptList.append((lastPt[0] + lastBounceLen * lastVector[0], lastPt[1] + lastBounceLen * lastVector[1], lastPt[2] + lastBounceLen * lastVector[2]))
+            ray = rc.Geometry.Polyline([rc.Geometry.Point3d(*pt) for pt in ptList]).ToNurbsCurve()
+            rays.append(ray)
+        elif numOfBounce>0:
+            # no bounce so let's just create a line form the point
+            firstRay = rc.Geometry.Line(rc.Geometry.Point3d(*origin), lastBounceLen * rc.Geometry.Vector3d(*lastVector)).ToNurbsCurve()
+            rays.append(firstRay)
+    
     if len(rays) == 0:
         ghenv.Component.AddRuntimeMessage(gh.GH_RuntimeMessageLevel.Warning, "No reflection!")
     return rays
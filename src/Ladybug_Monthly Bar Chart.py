@@ -296,52 +296,35 @@ def makeChartCrvs(separatedLists, listInfo, methodsList, stackValues, plotFromZe
         if methodsList[listCount] == 0:
             startMonth = listInfo[listCount][5][0]
             for item in lst:
-                startList[startMonth-1].append(item)
+                startList[(startMonth-1) % 12].append(item)
                 startMonth +=1
             
         #Organize data for monthly per hour values.
         elif methodsList[listCount] == 1:
             startMonth = listInfo[listCount][5][0]
             hourRange = listInfo[listCount][6][2]-listInfo[listCount][5][2]+1
-            hourCumulative = 0
-            
-            for count, item in enumerate(lst):
-                if count < hourRange+hourCumulative:
-                    startList[startMonth-1].append(item)
-                else:
-                    hourCumulative +=hourRange
-                    startMonth +=1
-                    startList[startMonth-1].append(item)
+            #Periods that go past the end of the year continue from January.
+            monthIds = [(startMonth-1 + count//hourRange) % 12 for count in range(len(lst))]
+            startList = lb_preparation.groupLists(lst, monthIds, 12)
             
             #Organize data for hourly values.
         elif methodsList[listCount] == 2:
             startMonth = listInfo[listCount][5][0]
             startDay = listInfo[listCount][5][1]
             hourRange = listInfo[listCount][6][2]-listInfo[listCount][5][2]+1
-            monthCumulative = (daysPerMonth[startMonth-1] - startDay + 1)*hourRange
-            hourCumulative = monthCumulative
-            totalHr = 0
             
+            #Group the hours by the day of the year and put each day in its month.
+            dayPositions = []
             for month in range(12):
                 for day in range(daysPerMonth[month]):
                     startList[month].append([])
+                    dayPositions.append((month, day))
             
-            for count, item in enumerate(lst):
-                if count < hourCumulative:
-                    if totalHr < hourRange:
-                        startList[startMonth-1][startDay-1].append(item)
-                        totalHr += 1
-                    else:
-                        startDay +=1
-                        totalHr = 1
-                        startList[startMonth-1][startDay-1].append(item)
-                else:
-                    startMonth +=1
-                    startDay = 1
-                    totalHr = 1
-                    monthCumulative = daysPerMonth[startMonth-1]*hourRange
-                    hourCumulative = hourCumulative + monthCumulative
-                    startList[startMonth-1][startDay-1].append(item)
+            firstDay = sum(daysPerMonth[:startMonth-1]) + startDay - 1
+            dayIds = [(firstDay + count//hourRange) % 365 for count in range(len(lst))]
+            for dayId, dayValues in enumerate(lb_preparation.groupLists(lst, dayIds, 365)):
+                month, day = dayPositions[dayId]
+                startList[month][day] = dayValues
             
         #Organize data for daily values.
         elif methodsList[listCount] == 3:
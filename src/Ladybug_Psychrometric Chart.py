@@ -104,7 +104,6 @@ import math
 import scriptcontext as sc
 import Rhino as rc
 import rhinoscriptsyntax as rs
-import System
 from System import Object
 from clr import AddReference
 AddReference('Grasshopper')
@@ -914,8 +913,13 @@ def drawPsychChart(avgBarPress, lb_comfortModels, legendFont, legendFontSize, le
     return chartCrvAndText, humidCurves, chartText, chartTextPt
 
 
-def colorMesh(airTemp, relHumid, barPress, lb_preparation, lb_comfortModels, lb_visualization, scaleFactor, lowB, highB, customColors, IPTrigger, farenheitVals):
-    # Make the full chart mesh
+# chart grids are shared by all of the charts with the same pressure, units and scale
+chartGridCache = {}
+
+def chartGrid(avgBarPress, lb_comfortModels, scaleFactor, IPTrigger, MeshData):
+    gridKey = (avgBarPress, scaleFactor, IPTrigger)
+    if gridKey in chartGridCache: return chartGridCache[gridKey]
+    
     #Generate a list of temperatures that will be used to make the mesh.
     if IPTrigger:
         initVal = -5
@@ -928,41 +932,25 @@ def colorMesh(airTemp, relHumid, barPress, lb_preparation, lb_comfortModels, lb_
     else: celNumMesh = tempNumMesh = range(-20, 51, 1)
     relHumidNumMesh = range(0, 105, 5)
     
-    #Get humidity ratio values for each of the temperatures at the different relative humidity levels.
-    humidRatioMesh = []
+    #Get humidity ratio values for each of the temperatures at the different relative humidity levels and make them the vertices of the grid.
+    gridVertices = []
+    pressList = [avgBarPress] * len(tempNumMesh)
     for relHum in relHumidNumMesh:
-        relHumidListMesh = []
-        for item in tempNumMesh:
-            relHumidListMesh.append(relHum)
-        pressList = []
-        for item in tempNumMesh:
-            pressList.append(avgBarPress)
-        HR, EN, vapPress, satPress = lb_comfortModels.calcHumidRatio(celNumMesh, relHumidListMesh, pressList)
-        for count, num in enumerate(HR):
-            HR[count] = num*scaleFactor
-        humidRatioMesh.append(HR)
-    
-    #Make the mesh faces.
-    chartMesh = rc.Geometry.Mesh()
-    meshFacePts = []
-    
-    for listCount, humilist in enumerate(humidRatioMesh[:-1]):
-        for tempCount, temp in enumerate(tempNumMesh[:-1]):
-            facePt1 = rc.Geometry.Point3d(temp, humilist[tempCount], 0)
-            facePt2 = rc.Geometry.Point3d(temp, humidRatioMesh[listCount+1][tempCount], 0)
-            facePt3 = rc.Geometry.Point3d(tempNumMesh[tempCount+1], humidRatioMesh[listCount+1][tempCount+1], 0)
-            facePt4 = rc.Geometry.Point3d(tempNumMesh[tempCount+1], humilist[tempCount+1], 0)
-            
-            meshFacePts.append([facePt1, facePt2, facePt3, facePt4])
+        HR, EN, vapPress, satPress = lb_comfortModels.calcHumidRatio(celNumMesh, [relHum] * len(tempNumMesh), pressList)
+        gridVertices.extend([(temp, ratio*scaleFactor, 0) for temp, ratio in zip(tempNumMesh, HR)])
     
-    for ptlist in  meshFacePts:
-        mesh = rc.Geometry.Mesh()
-        for point in ptlist:
-            mesh.Vertices.Add(point)
-        
-        mesh.Faces.AddFace(0, 1, 2, 3)
-        chartMesh.Append(mesh)
-    uncoloredMesh = chartMesh
+    #Make the mesh faces of one indexed mesh.
+    chartMesh = MeshData(gridVertices)
+    chartMesh.addGridFaces(len(relHumidNumMesh), len(tempNumMesh))
+    
+    if len(chartGridCache) >= 16: chartGridCache.clear()
+    chartGridCache[gridKey] = chartMesh
+    return chartMesh
+
+def colorMesh(airTemp, relHumid, barPress, lb_preparation, lb_comfortModels, lb_visualization, scaleFactor, lowB, highB, customColors, IPTrigger, farenheitVals, MeshData):
+    # Make the full chart mesh
+    chartMesh = chartGrid(avgBarPress, lb_comfortModels, scaleFactor, IPTrigger, MeshData)
+    tempCount = 72 if IPTrigger else 70
     
     #Calculate the humidity ratio for each of the hours of the year and use this to make points for the chart.
     HR, EN, vapPress, satPress = lb_comfortModels.calcHumidRatio(airTemp, relHumid, barPress)
@@ -971,77 +959,26 @@ def colorMesh(airTemp, relHumid, barPress, lb_preparation, lb_comfortModels, lb_
         if IPTrigger: hourPts.append(rc.Geometry.Point3d(farenheitVals[count], ratio*scaleFactor, 0))
         else: hourPts.append(rc.Geometry.Point3d(airTemp[count], ratio*scaleFactor, 0))
     
-    #Make a list to hold values for all of the mesh faces.
-    meshFrequency = []
-    for count, value in enumerate(range(0, 100, 5)):
-        meshFrequency.append([])
+    #Bin the input humidity and temperatures into a histogram with one count for each of the mesh faces.
+    finalMeshFrequency = [0] * (20 * tempCount)
+    for hour, humid in enumerate(relHumid):
         if IPTrigger:
-            for face in range(72): meshFrequency[count].append([])
+            if not -5 < farenheitVals[hour] < 115: continue
+            tempIndex = int((farenheitVals[hour] +4.5)*(3/5))
         else:
-            for face in range(-20, 50, 1): meshFrequency[count].append([])
-    
-    #Bin the input humidity and temperatures into categories that correspond to the mesh faces.
-    def getTempIndex(hour):
-        if airTemp[hour] > -20 and airTemp[hour] < 50:
-            index  = int(round(airTemp[hour] +19.5))
-        else: index = -1
-        return index
-    
-    def getTempIndexIP(hour):
-        if farenheitVals[hour] > -5 and farenheitVals[hour] < 115:
-            index  = int((farenheitVals[hour] +4.5)*(3/5))
-        else: index = -1
-        return index
-    
-    for hour, humid in enumerate(relHumid):
-        if IPTrigger: tempIndex = getTempIndexIP(hour)
-        else: tempIndex = getTempIndex(hour)
-        if tempIndex != -1:
-            if humid < 5: meshFrequency[0][tempIndex].append(1)
-            elif humid < 10: meshFrequency[1][tempIndex].append(1)
-            elif humid < 15:meshFrequency[2][tempIndex].append(1)
-            elif humid < 20:meshFrequency[3][tempIndex].append(1)
-            elif humid < 25:meshFrequency[4][tempIndex].append(1)
-            elif humid < 30:meshFrequency[5][tempIndex].append(1)
-            elif humid < 35:meshFrequency[6][tempIndex].append(1)
-            elif humid < 40:meshFrequency[7][tempIndex].append(1)
-            elif humid < 45:meshFrequency[8][tempIndex].append(1)
-            elif humid < 50:meshFrequency[9][tempIndex].append(1)
-            elif humid < 55:meshFrequency[10][tempIndex].append(1)
-            elif humid < 60:meshFrequency[11][tempIndex].append(1)
-            elif humid < 65:meshFrequency[12][tempIndex].append(1)
-            elif humid < 70:meshFrequency[13][tempIndex].append(1)
-            elif humid < 75:meshFrequency[14][tempIndex].append(1)
-            elif humid < 80:meshFrequency[15][tempIndex].append(1)
-            elif humid < 85:meshFrequency[16][tempIndex].append(1)
-            elif humid < 90:meshFrequency[17][tempIndex].append(1)
-            elif humid < 95:meshFrequency[18][tempIndex].append(1)
-            else: meshFrequency[19][tempIndex].append(1)
-    
-    #Sum all of the lists together to get the frequency.
-    finalMeshFrequency = []
-    for humidlist in meshFrequency:
-        for templist in humidlist:
-            finalMeshFrequency.append(sum(templist))
+            if not -20 < airTemp[hour] < 50: continue
+            tempIndex = int(round(airTemp[hour] +19.5))
+        if tempIndex >= tempCount: continue
+        humidIndex = min(max(int(humid // 5), 0), 19)
+        finalMeshFrequency[humidIndex * tempCount + tempIndex] += 1
     
     #Get a list of colors
     colors = lb_visualization.gradientColor(finalMeshFrequency, lowB, highB, customColors)
     
-    # color the mesh faces.
-    uncoloredMesh.VertexColors.CreateMonotoneMesh(System.Drawing.Color.Gray)
-    
-    for srfNum in range (uncoloredMesh.Faces.Count):
-        uncoloredMesh.VertexColors[4 * srfNum + 0] = colors[srfNum]
-        uncoloredMesh.VertexColors[4 * srfNum + 1] = colors[srfNum]
-        uncoloredMesh.VertexColors[4 * srfNum + 3] = colors[srfNum]
-        uncoloredMesh.VertexColors[4 * srfNum + 2] = colors[srfNum]
-    
-    # Remove the mesh faces that do not have any hour associated with them.
-    cullFaceIndices = []
-    for count, freq in enumerate(finalMeshFrequency):
-        if freq == 0:
-            cullFaceIndices.append(count)
-    uncoloredMesh.Faces.DeleteFaces(cullFaceIndices)
+    # color the mesh faces and remove the mesh faces that do not have any hour associated with them.
+    faceIds = [count for count, freq in enumerate(finalMeshFrequency) if freq != 0]
+    coloredMesh = MeshData(chartMesh.vertices, [chartMesh.faces[i] for i in faceIds]).colorFaces([colors[i] for i in faceIds])
+    uncoloredMesh = coloredMesh.toRhinoMesh()
     
     #Flip the mesh to be sure that it always displays correctly.
     uncoloredMesh.Flip(True, True, True)
@@ -1086,7 +1023,7 @@ def unionAllCurves(Curves):
     return res
 
 
-def calcComfAndStrategyPolygons(radTemp, windSpeed, metRate, cloLevel, exWork, humidRatioUp, humidRatioLow, passiveStrategy, relHumidLines, calcLengthComf, lb_comfortModels, chartBoundary, scaleFactor, PPDComfortThresh, IPTrigger, opTemp, globHorizRad, airTemp, origAirTemp, origGlobHorizRad, origHrs):
+def calcComfAndStrategyPolygons(radTemp, windSpeed, metRate, cloLevel, exWork, humidRatioUp, humidRatioLow, passiveStrategy, relHumidLines, calcLengthComf, lb_comfortModels, chartBoundary, scaleFactor, PPDComfortThresh, IPTrigger, opTemp, globHorizRad, airTemp, origAirTemp, origGlobHorizRad, origHrs, lb_preparation):
     #Take just the top middle and bottom lines for making the comofrt range in order to speed up the calculation.
     relHumidLines = [relHumidLines[0], relHumidLines[5], relHumidLines[10]]
     
@@ -1541,15 +1478,13 @@ def calcComfAndStrategyPolygons(radTemp, windSpeed, metRate, cloLevel, exWork, h
                         polyStart = minComfortPolyTemp
                     polyStart = F2C([polyStart])[0] if IPTrigger else polyStart
                     
+                    # solar heat of the last solarTimeConst hours before every hour of the year with weights that decrease linearly
+                    if int(solarTimeConst) > 0: pastSolarHeat = lb_preparation.rollingWeightedSum(origGlobHorizRad, int(solarTimeConst))
                     for hourCt, hourPt in enumerate(globHorizRad):
                         if airTemp[hourCt] < polyStart:
                             tempDelta = polyStart - airTemp[hourCt]
-                            comfFound = 0
-                            solarHeatContribs = []
-                            for pastRad in range(int(solarTimeConst)):
-                                heatContrib = ((int(solarTimeConst)-pastRad)/solarTimeConst)*origGlobHorizRad[int(origHrs[hourCt]-1-pastRad)]
-                                solarHeatContribs.append(heatContrib)
-                            if sum(solarHeatContribs) > solarHeatCap*tempDelta:
+                            solarHeat = pastSolarHeat[int(origHrs[hourCt]-1)]/solarTimeConst if int(solarTimeConst) > 0 else 0
+                            if solarHeat > solarHeatCap*tempDelta:
                                 deltas.append(tempDelta)
                     if len(deltas) >0:
                         deltas.sort()
@@ -1718,7 +1653,72 @@ def calcComfAndStrategyPolygons(radTemp, windSpeed, metRate, cloLevel, exWork, h
     else:
         return [], [], [], [], [], [], 3, 0, 30, 8, 12.8
 
-def statisticallyAnalyzePolygons(hourPts, comfortPolyline, strategyPolylines, unionedCurves, epwData, epwStr, strategyTextNames, tempBelowComf, airTemp, maxComfortPolyTemp, globHorizRad, origAirTemp, origGlobHorizRad, origHrs, solarHeatCap, solarTimeConst, bldgBalPt, polyStart, patternList, IPTrigger):
+def polygonEdgeTable(polygon, band):
+    # the edges of the polygon sorted into horizontal slabs. every edge is in all of the slabs that are within band of it
+    success, polyline = polygon.TryGetPolyline()
+    if not success:
+        polylineCurve = polygon.ToPolyline(sc.doc.ModelAbsoluteTolerance, 0, 0, 0)
+        if polylineCurve == None: return None
+        success, polyline = polylineCurve.TryGetPolyline()
+        if not success: return None
+    pts = [(pt.X, pt.Y) for pt in polyline]
+    if pts[0] != pts[-1]: pts.append(pts[0])
+    edges = zip(pts[:-1], pts[1:])
+    
+    xMin, xMax = min(pt[0] for pt in pts) - band, max(pt[0] for pt in pts) + band
+    yMin, yMax = min(pt[1] for pt in pts) - band, max(pt[1] for pt in pts) + band
+    slabCount = len(edges)
+    slabHeight = (yMax - yMin) / slabCount
+    slabs = [[] for slab in range(slabCount)]
+    for (x1, y1), (x2, y2) in edges:
+        firstSlab = int((min(y1, y2) - band - yMin) / slabHeight)
+        lastSlab = int((max(y1, y2) + band - yMin) / slabHeight)
+        for slab in range(max(firstSlab, 0), min(lastSlab, slabCount - 1) + 1):
+            slabs[slab].append((x1, y1, x2, y2))
+    return (xMin, xMax, yMin, yMax, slabHeight), slabs
+
+def polygonContainment(hourPts, polygons, curveTolerance):
+    #Test all of the hour points against all of the polygons with a crossing number test.
+    #Only the points that are within the curve tolerance of an edge are tested again with the Rhino curve.
+    ptCoords = [(hourPt.X, hourPt.Y) for hourPt in hourPts]
+    # polylines that approximate curved polygons are at most two model tolerances away from the polygon
+    band = curveTolerance + 2 * sc.doc.ModelAbsoluteTolerance
+    
+    containment = []
+    for polygon in polygons:
+        def curveContains(hourPt):
+            if str(polygon.Contains(hourPt, rc.Geometry.Plane.WorldXY, sc.doc.ModelAbsoluteTolerance)) == "Inside" or hourPt.DistanceTo(polygon.PointAt(polygon.ClosestPoint(hourPt)[1])) < curveTolerance:
+                return 1
+            return 0
+        
+        edgeTable = polygonEdgeTable(polygon, band) if polygon.IsClosed else None
+        if edgeTable == None:
+            containment.append([curveContains(hourPt) for hourPt in hourPts])
+            continue
+        (xMin, xMax, yMin, yMax, slabHeight), slabs = edgeTable
+        
+        inside = []
+        for count, (x, y) in enumerate(ptCoords):
+            if not (xMin <= x <= xMax and yMin <= y <= yMax):
+                inside.append(0)
+                continue
+            crossings = 0
+            nearEdge = False
+            for x1, y1, x2, y2 in slabs[min(int((y - yMin) / slabHeight), len(slabs) - 1)]:
+                if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                    crossings += 1
+                if not nearEdge and min(x1, x2) - band <= x <= max(x1, x2) + band and min(y1, y2) - band <= y <= max(y1, y2) + band:
+                    dx, dy = x2 - x1, y2 - y1
+                    t = ((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy) if dx or dy else 0
+                    t = min(max(t, 0), 1)
+                    nearEdge = (x - x1 - t * dx) ** 2 + (y - y1 - t * dy) ** 2 < band * band
+            if nearEdge: inside.append(curveContains(hourPts[count]))
+            else: inside.append(crossings % 2)
+        containment.append(inside)
+    
+    return containment
+
+def statisticallyAnalyzePolygons(hourPts, comfortPolyline, strategyPolylines, unionedCurves, epwData, epwStr, strategyTextNames, tempBelowComf, airTemp, maxComfortPolyTemp, globHorizRad, origAirTemp, origGlobHorizRad, origHrs, solarHeatCap, solarTimeConst, bldgBalPt, polyStart, patternList, IPTrigger, lb_preparation):
     #Define lists to be filled up with the data.
     strategyPercent = []
     strategyOrNot = []
@@ -1728,15 +1728,9 @@ def statisticallyAnalyzePolygons(hourPts, comfortPolyline, strategyPolylines, un
         curveTolerance = 0.4
     
     #For each of the comfort polygons, determine how many of the hour points are inside of them and make a comfort or not list.
+    comfContainment = polygonContainment(hourPts, comfortPolyline, curveTolerance)
     for countComf, comfortPolygon in enumerate(comfortPolyline):
-        comfBool = []
-        for hourPt in hourPts:
-            if str(comfortPolygon.Contains(hourPt, rc.Geometry.Plane.WorldXY, sc.doc.ModelAbsoluteTolerance)) == "Inside":
-                comfBool.append(1)
-            elif hourPt.DistanceTo(comfortPolygon.PointAt(comfortPolygon.ClosestPoint(hourPt)[1])) < curveTolerance:
-                comfBool.append(1)
-            else:
-                comfBool.append(0)
+        comfBool = comfContainment[countComf]
         if len(comfBool) != 0:
             comfPercent = (sum(comfBool)/len(comfBool))*100
         else:
@@ -1760,38 +1754,33 @@ def statisticallyAnalyzePolygons(hourPts, comfortPolyline, strategyPolylines, un
     for countStrat, comfortPolygon in enumerate(strategyPolylines):
         comfBool = []
         try:
+            inPolygon = polygonContainment(hourPts, [comfortPolygon], curveTolerance)[0]
             if (strategyTextNames[countComf + countStrat + 1] != "Thermal Mass + Night Vent" and strategyTextNames[countComf + countStrat + 1] != "Passive Solar Heating") or epwData == False or patternList != []:
-                for hourPt in hourPts:
-                    if str(comfortPolygon.Contains(hourPt, rc.Geometry.Plane.WorldXY, sc.doc.ModelAbsoluteTolerance)) == "Inside":
-                        comfBool.append(1)
-                    elif hourPt.DistanceTo(comfortPolygon.PointAt(comfortPolygon.ClosestPoint(hourPt)[1])) < curveTolerance:
-                        comfBool.append(1)
-                    else:
-                        comfBool.append(0)
+                comfBool = inPolygon
             elif strategyTextNames[countComf + countStrat + 1] == "Thermal Mass + Night Vent":
-                for hourCt, hourPt in enumerate(hourPts):
-                    if str(comfortPolygon.Contains(hourPt, rc.Geometry.Plane.WorldXY, sc.doc.ModelAbsoluteTolerance)) == "Inside" or hourPt.DistanceTo(comfortPolygon.PointAt(comfortPolygon.ClosestPoint(hourPt)[1])) < curveTolerance:
+                # coldest air temperature of the last solarTimeConst hours before every hour of the year
+                if int(solarTimeConst) > 0: pastAirMin = lb_preparation.rollingMin(origAirTemp, int(solarTimeConst))
+                for hourCt, inside in enumerate(inPolygon):
+                    if inside:
                         comfFound = 0
-                        for pastAir in range(int(solarTimeConst)):
-                            if origAirTemp[int(origHrs[hourCt]-1-pastAir)] < maxComfortPolyTemp-tempBelowComf:
-                                comfFound = 1
+                        if int(solarTimeConst) > 0 and pastAirMin[int(origHrs[hourCt]-1)] < maxComfortPolyTemp-tempBelowComf:
+                            comfFound = 1
                         comfBool.append(comfFound)
                     else:
                         comfBool.append(0)
             else:
-                for hourCt, hourPt in enumerate(hourPts):
-                    if str(comfortPolygon.Contains(hourPt, rc.Geometry.Plane.WorldXY, sc.doc.ModelAbsoluteTolerance)) == "Inside" or hourPt.DistanceTo(comfortPolygon.PointAt(comfortPolygon.ClosestPoint(hourPt)[1])) < curveTolerance:
-                        if "Internal Heat Gain" in strategyTextNames:
-                            pStart = F2C([bldgBalPt])[0] if IPTrigger is True else bldgBalPt
-                        else:
-                            pStart = F2C([polyStart])[0] if IPTrigger is True else polyStart
+                if "Internal Heat Gain" in strategyTextNames:
+                    pStart = F2C([bldgBalPt])[0] if IPTrigger is True else bldgBalPt
+                else:
+                    pStart = F2C([polyStart])[0] if IPTrigger is True else polyStart
+                # solar heat of the last solarTimeConst hours before every hour of the year with weights that decrease linearly
+                if int(solarTimeConst) > 0: pastSolarHeat = lb_preparation.rollingWeightedSum(origGlobHorizRad, int(solarTimeConst))
+                for hourCt, inside in enumerate(inPolygon):
+                    if inside:
                         tempDelta = pStart - airTemp[hourCt]
                         comfFound = 0
-                        solarHeatContribs = []
-                        for pastRad in range(int(solarTimeConst)):
-                            heatContrib = ((int(solarTimeConst)-pastRad)/solarTimeConst)*origGlobHorizRad[origHrs[hourCt]-1-pastRad]
-                            solarHeatContribs.append(heatContrib)
-                        if sum(solarHeatContribs) > solarHeatCap*tempDelta:
+                        solarHeat = pastSolarHeat[int(origHrs[hourCt]-1)]/solarTimeConst if int(solarTimeConst) > 0 else 0
+                        if solarHeat > solarHeatCap*tempDelta:
                             comfFound = 1
                         comfBool.append(comfFound)
                     else:
@@ -1921,6 +1910,7 @@ def main(epwData, epwStr, calcLength, airTemp, relHumid, barPress, avgBarPress,
         lb_preparation = sc.sticky["ladybug_Preparation"]()
         lb_comfortModels = sc.sticky["ladybug_ComfortModels"]()
         lb_visualization = sc.sticky["ladybug_ResultVisualization"]()
+        MeshData = sc.sticky["ladybug_MeshData"]
         
         # Read the legend parameters.
         lowB, highB, numSeg, customColors, legendBasePoint, legendScale, legendFont, legendFontSize, legendBold, decimalPlaces, removeLessThan = lb_preparation.readLegendParameters(legendPar_, False)
@@ -2027,7 +2017,7 @@ def main(epwData, epwStr, calcLength, airTemp, relHumid, barPress, avgBarPress,
         if legendFontSize != None: textSize = legendFontSize
         else: textSize = 0.5
         if calcLength > 1:
-            hourPts, coloredMesh, meshFaceValues = colorMesh(airTemp, relHumid, barPress, lb_preparation, lb_comfortModels, lb_visualization, scaleFactor, lowB, highB, customColors, IPTrigger, farenheitVals)
+            hourPts, coloredMesh, meshFaceValues = colorMesh(airTemp, relHumid, barPress, lb_preparation, lb_comfortModels, lb_visualization, scaleFactor, lowB, highB, customColors, IPTrigger, farenheitVals, MeshData)
             legendTitle = "Hours"
             if mollierHX_ == True:
                 if IPTrigger: lb_visualization.calculateBB(chartCurves[:3], True)
@@ -2078,9 +2068,9 @@ def main(epwData, epwStr, calcLength, airTemp, relHumid, barPress, avgBarPress,
         
         # Calculate the comfort and strategy polygons.
         try:
-            comfortPolyline, comfortPolygon, strategyPolylines, strategyPolygons, strategyTextNames, unionedCurves, tempBelowComf, maxComfortPolyTemp, solarHeatCap, solarTimeConst, bldgBalPt, polyStart = calcComfAndStrategyPolygons(radTemp, windSpeed, metRate, cloLevel, exWork, humidRatioUp, humidRatioLow, passiveStrategy_, humidityLines, calcLengthComf, lb_comfortModels, chartBoundary, scaleFactor, PPDComfortThresh, IPTrigger, opTemp, globHorizRad, airTemp, origAirTemp, origGlobHorizRad, origHrs)
+            comfortPolyline, comfortPolygon, strategyPolylines, strategyPolygons, strategyTextNames, unionedCurves, tempBelowComf, maxComfortPolyTemp, solarHeatCap, solarTimeConst, bldgBalPt, polyStart = calcComfAndStrategyPolygons(radTemp, windSpeed, metRate, cloLevel, exWork, humidRatioUp, humidRatioLow, passiveStrategy_, humidityLines, calcLengthComf, lb_comfortModels, chartBoundary, scaleFactor, PPDComfortThresh, IPTrigger, opTemp, globHorizRad, airTemp, origAirTemp, origGlobHorizRad, origHrs, lb_preparation)
             #Calculate how many hours are in each comfort or strategy and comfort polygons.
-            totalComfPercent, totalComfOrNot, strategyPercent, strategyOrNot = statisticallyAnalyzePolygons(hourPts, comfortPolyline, strategyPolylines, unionedCurves, epwData, epwStr, strategyTextNames, tempBelowComf, airTemp, maxComfortPolyTemp, globHorizRad, origAirTemp, origGlobHorizRad, origHrs, solarHeatCap, solarTimeConst, bldgBalPt, polyStart, patternList, IPTrigger)
+            totalComfPercent, totalComfOrNot, strategyPercent, strategyOrNot = statisticallyAnalyzePolygons(hourPts, comfortPolyline, strategyPolylines, unionedCurves, epwData, epwStr, strategyTextNames, tempBelowComf, airTemp, maxComfortPolyTemp, globHorizRad, origAirTemp, origGlobHorizRad, origHrs, solarHeatCap, solarTimeConst, bldgBalPt, polyStart, patternList, IPTrigger, lb_preparation)
         except Exception as e:
             comfortPolyline, comfortPolygon, strategyPolylines, strategyPolygons, strategyTextNames, unionedCurves, tempBelowComf, maxComfortPolyTemp, solarHeatCap, solarTimeConst, bldgBalPt = None, None, [], [], [], [], None, None, None, None, None
             totalComfPercent, totalComfOrNot, strategyPercent, strategyOrNot = None, [], None, []
@@ -58,7 +58,7 @@ import System
 import zipfile
 import time
 import webbrowser as wb
-from itertools import izip
+import re
 
 try:
     System.Net.ServicePointManager.SecurityProtocol = System.Net.SecurityProtocolType.Tls12
@@ -118,46 +118,141 @@ def downloadSourceAndUnzip(directory, url, markdown):
     
     #unzip the file
     with zipfile.ZipFile(zipFile) as zf:
-        for f in zf.namelist():
+        for info in zf.infolist():
+            f = info.filename
             if f.endswith('/'):
                 try: os.makedirs(f)
                 except: pass
             else:
-                zf.extract(f, targetDirectory)
+                extracted = zf.extract(f, targetDirectory)
+                # keep the time of the file in the zip so the search index only updates the files that changed
+                try:
+                    modified = time.mktime(info.date_time + (0, 0, -1))
+                    os.utime(extracted, (modified, modified))
+                except Exception:
+                    pass
     
     userObjectsFolder = os.path.join(targetDirectory)
     return userObjectsFolder
     
     
-def getFolderSize(path):
-    """This function calculates the size of a folder.
-    Args:
-        path: A valid path of the folder for which size is to be calculated
-    Returns:
-        totalSize: The size of the folder in mb.
-    """
-    totalSize = 0
+def isFolderEmpty(path):
+    """This function checks if a folder has no files with any content. It stops at the first file that is not empty."""
     for item in os.walk(path):
         for file in item[2]:
             try:
-                totalSize = totalSize + os.path.getsize(os.path.join(item[0], file))
+                if os.path.getsize(os.path.join(item[0], file)) > 0: return False
             except Exception:
                 print("error with file:  " + os.path.join(item[0], file))
-    return totalSize
+    return True
+
+
+# The search index is kept for the whole session and saved in the ladybug folder.
+# filePath : (modified time, size, lower case lines of the name, description and docstrings of the component)
+searchIndex = {}
+# word : set of the files in which the word is found
+wordIndex = {}
+
+def indexWords(filePath, lines, add = True):
+    for word in set(re.findall(r"\w+", " ".join(lines))):
+        if add: wordIndex.setdefault(word, set()).add(filePath)
+        elif word in wordIndex: wordIndex[word].discard(filePath)
+
+
+def loadSearchIndex(indexPath):
+    """This function reads the saved search index if it is not loaded yet."""
+    if searchIndex or not os.path.isfile(indexPath): return
+    try:
+        with open(indexPath) as f:
+            line = f.readline()
+            while line:
+                filePath, modified, size, lineCount = line.rstrip("\n").split("\t")
+                lines = [f.readline().rstrip("\n") for count in range(int(lineCount))]
+                searchIndex[filePath] = (float(modified), int(size), lines)
+                indexWords(filePath, lines)
+                line = f.readline()
+    except Exception as e:
+        print "The search index could not be read and will be made again. {}".format(e)
+        searchIndex.clear()
+        wordIndex.clear()
+
+
+def componentText(lines):
+    """This function keeps the name, the description and the docstrings of the inputs and outputs
+    from the lines of the markdown file of a component. Images, the urls of the links, the headings
+    of the inputs and outputs and the link to the example files are not searched.
+    Returns:
+        text: A list of lower case lines.
+    """
+    text = []
+    for line in lines:
+        line = re.sub(r"!\[[^\]]*\]\([^)]*\)", "", line)
+        line = re.sub(r"\[([^\]]*)\]\([^)]*\)", r"\1", line)
+        line = line.strip(" \t\r\n#*-").lower()
+        if line and line not in ("inputs", "outputs") and not line.startswith("check hydra example files"):
+            text.append(line)
+    return text
+
+
+def updateSearchIndex(filePaths, indexPath):
+    """This function indexes the files that are new or whose modified time or size changed.
+    Args:
+        filePaths: A list of paths to all the markdown files.
+        indexPath: The path of the file where the index is saved.
+    Returns:
+        updatedCount: The number of files that were read again.
+    """
+    loadSearchIndex(indexPath)
+    updatedCount = 0
+    for filePath in filePaths:
+        stat = os.stat(filePath)
+        if filePath in searchIndex and searchIndex[filePath][:2] == (stat.st_mtime, stat.st_size):
+            continue
+        if filePath in searchIndex: indexWords(filePath, searchIndex[filePath][2], False)
+        with open(filePath) as f:
+            lines = componentText(f.readlines())
+        searchIndex[filePath] = (stat.st_mtime, stat.st_size, lines)
+        indexWords(filePath, lines)
+        updatedCount += 1
     
+    # remove the files that are not there anymore
+    for filePath in set(searchIndex.keys()) - set(filePaths):
+        indexWords(filePath, searchIndex.pop(filePath)[2], False)
+        updatedCount += 1
     
-def countOccurrences(filePath, keyword):
-    """This function returns the number of times the keyWord
-    appears in the file."""
-    count = 0
-    with open(filePath) as f:
-        lines = f.readlines()
-        for line in lines:
-            if keyword.lower() in line.lower():
-                count += 1
-            else:
-                pass
-    return count
+    if updatedCount > 0:
+        try:
+            with open(indexPath, "w") as f:
+                for filePath, (modified, size, lines) in searchIndex.items():
+                    f.write("\t".join([filePath, repr(modified), str(size), str(len(lines))]) + "\n")
+                    for line in lines: f.write(line + "\n")
+        except Exception as e:
+            print "The search index could not be saved. {}".format(e)
+    return updatedCount
+
+
+def countOccurrences(keyword):
+    """This function returns the number of lines in which the keyWord appears for all
+    the indexed files in which it appears at least once. Only the files that have
+    all the words of the keyword are searched.
+    Returns:
+        counts: A dictionary of filePath : count
+    """
+    keyword = keyword.lower()
+    candidates = None
+    for queryWord in set(re.findall(r"\w+", keyword)):
+        # the keyword can be a part of a word (e.g. drybulb in drybulbtemperature)
+        files = set()
+        for word, wordFiles in wordIndex.iteritems():
+            if queryWord in word: files.update(wordFiles)
+        candidates = files if candidates is None else candidates & files
+    if candidates is None: candidates = searchIndex.keys()
+    
+    counts = {}
+    for filePath in candidates:
+        count = sum(1 for line in searchIndex[filePath][2] if keyword in line)
+        if count > 0: counts[filePath] = count
+    return counts
 
 
 def main():
@@ -221,33 +316,30 @@ def main():
             subFolders = os.listdir(path)
             for folderName in subFolders:
                 tempPath = os.path.join(path, folderName)
-                if folderName == "master.zip" or getFolderSize(tempPath) == 0:
+                if folderName == "master.zip" or isFolderEmpty(tempPath):
                     pass
                 else:
                     foldersToSearchIn.append(tempPath)
         
-        # List of paths to all the markdown files in which the keyword is found more than once
-        mdPath = []
-        # The number of times the keyword appears
-        hitCount = []
-        
         # Getting the last folders in which markdown files live
+        markDownPaths = []
         for searchPath in foldersToSearchIn:
             extension = "text\components"
             searchFolderPath = os.path.join(searchPath, extension)
             markDownList = os.listdir(searchFolderPath)
             for item in markDownList:
-                filePath = os.path.join(searchFolderPath, item)
-                if countOccurrences(filePath, keyword) >= level:
-                    mdPath.append(filePath)
-                    hitCount.append(countOccurrences(filePath, keyword))
-                else:
-                    pass
-                    
+                markDownPaths.append(os.path.join(searchFolderPath, item))
+        
+        # Only the markdown files that changed since the last search are read
+        indexPath = os.path.join(sc.sticky["Ladybug_DefaultFolder"], "primerComponentIndex.txt")
+        updatedCount = updateSearchIndex(markDownPaths, indexPath)
+        if updatedCount > 0:
+            print("The search index is updated for {} of {} markdown files.".format(updatedCount, len(searchIndex)))
+        
         # This dictionary has all absolute paths to all the files in which
-        # the keyword appears at least once
+        # the keyword appears at least level times
         # the structure of the dictoonary is path : count
-        matchDict = dict(izip(mdPath, hitCount))
+        matchDict = dict((filePath, count) for filePath, count in countOccurrences(keyword).iteritems() if count >= level)
         
         # Sorting the results for plugins
         Ladybug, Honeybee, Butterfly, LadybugPlus, HoneybeePlus = ({}, {}, {}, {}, {})
@@ -269,7 +361,8 @@ def main():
         listOfSortedDicts = []
         for item in listOfDicts:
             if len(item.keys()) > 0:
-                item = sorted(item.items(), key=lambda x: x[1], reverse = True)
+                # rank by the count and then the components that have the keyword in their name
+                item = sorted(item.items(), key=lambda x: (-x[1], keyword.lower() not in x[0].lower(), x[0]))
                 listOfSortedDicts.append(item)
             else:
                 listOfSortedDicts.append([])
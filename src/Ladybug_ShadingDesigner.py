@@ -210,20 +210,15 @@ def isShadingPossible(shadingBorder, baseSurfacePlane, sunVector, lb_preparation
     
     shadingPts = []
     nonShadingPts = []
-    thereIsMorePoint = True
-    while len(shadingPts) * len(nonShadingPts) == 0 and thereIsMorePoint:
-        # project to point
-        for pt in crvPoints:
-            projectedPt = projectToPlane(rc.Geometry.Point3d(pt), baseSurfacePlane, sunVector)
-            pVector = rc.Geometry.Vector3d(projectedPt - pt)
-            if pVector != rc.Geometry.Vector3d(0, 0, 0):
-                #print int(math.degrees(rc.Geometry.Vector3d.VectorAngle(sunVector, pVector)))
-                if int(round(math.degrees(rc.Geometry.Vector3d.VectorAngle(sunVector, pVector)))) == 0 or pVector.Length < sc.doc.ModelAbsoluteTolerance:
-                    shadingPts.append(pt)
-                else:
-                    nonShadingPts.append(pt)
-        
-        thereIsMorePoint = False
+    # project the points to the plane along the sun vector
+    # the points in front of the plane move in the direction of the sun vector (t > 0)
+    parameters = lb_preparation.rayPlaneParameters(crvPoints, [sunVector], baseSurfacePlane)
+    for pt, (t,) in zip(crvPoints, parameters):
+        if t is not None and t != 0:
+            if t > 0 or abs(t) * sunVector.Length < sc.doc.ModelAbsoluteTolerance:
+                shadingPts.append(pt)
+            else:
+                nonShadingPts.append(pt)
     
     if len(shadingPts) * len(nonShadingPts) != 0:
         # this is a mixed situation, I need to subdivide toBeShadedFace
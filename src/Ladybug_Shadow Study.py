@@ -24,7 +24,7 @@
 Use this component to generate outline curves representing shadows cast by input _geometry for a given _sunVector.
 Note that, to see shadows cast onto a ground, a surface representing the ground plane must be included in the input _geometry.
 Connect output of Ladybug_Analysis period component to analysisPeriod_ on Ladybug_SunPath component. This will let you use a range of sunvectors. Using these range of sunvectors, you can turn this shadow study into a shadow range study.
-Also, please note that, for a list of input _geometry that is larger than 4 or 5 breps, the calculation time of this component can be very long.  Please keep the input geometry to small lists or be prepared to wait a long time.
+Only the faces that can overlap when they are seen from the sun are tested against each other so this component can be used with large lists of input _geometry.
 WARNING: This component is a proof of concept that will not work in every situation.  It is not ideal for analyzing curved surfaces and it is not able to calculate shadows for geometries that are intersecting each other.
 -
 Provided by Ladybug 0.0.69
@@ -53,399 +53,235 @@ except: pass
 
 import Rhino as rc
 import scriptcontext as sc
-import System
-import System.Threading.Tasks as tasks
 import math
 
 
 tol = sc.doc.ModelAbsoluteTolerance
 
-def joinMesh(meshList):
-    joinedMesh = rc.Geometry.Mesh()
-    for m in meshList: joinedMesh.Append(m)
-    return joinedMesh
+def dot(a, b): return a[0]*b[0] + a[1]*b[1] + a[2]*b[2]
 
-def parallel_testPointCalculator(analysisSrfs, disFromBase, parallel = True):
-        # Mesh functions should be modified and be written interrelated as a class
-        movingDis = disFromBase
-        # preparing bulk lists
-        testPoint = [[]] * len(analysisSrfs)
-        srfNormals = [[]] * len(analysisSrfs)
-        meshSrfCen = [[]] * len(analysisSrfs)
-        meshSrfEdges = [[]] * len(analysisSrfs)
-        meshes = [[]] * len(analysisSrfs)        
-        
-        srfCount = 0
-        for srf in analysisSrfs:
-            testPoint[srfCount] = range(srf.Faces.Count)
-            srfNormals[srfCount] = range(srf.Faces.Count)
-            meshSrfCen[srfCount] = range(srf.Faces.Count)
-            meshSrfEdges[srfCount] = range(srf.Faces.Count)
-            meshes[srfCount] = range(srf.Faces.Count)
-            srfCount += 1
+def subtract(a, b): return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
 
-        try:
-            def srfPtCalculator(i):
-                # calculate face normals
-                analysisSrfs[i].FaceNormals.ComputeFaceNormals()
-                analysisSrfs[i].FaceNormals.UnitizeFaceNormals()
-                
-                for face in range(analysisSrfs[i].Faces.Count):
-                    srfNormals[i][face] = (analysisSrfs[i].FaceNormals)[face] # store face normals
-                    meshSrfCen[i][face] = analysisSrfs[i].Faces.GetFaceCenter(face) # store face centers
-                    # calculate test points
-                    if srfNormals[i][face]:
-                        movingVec = rc.Geometry.Vector3f.Multiply(movingDis,srfNormals[i][face])
-                        testPoint[i][face] = rc.Geometry.Point3d.Add(rc.Geometry.Point3d(meshSrfCen[i][face]), movingVec)
-                        
-                    # make mesh surface, calculate the area, dispose the mesh and mass area calculation
-                    tempMesh = rc.Geometry.Mesh()
-                    tempMesh.Vertices.Add(analysisSrfs[i].Vertices[analysisSrfs[i].Faces[face].A]) #0
-                    tempMesh.Vertices.Add(analysisSrfs[i].Vertices[analysisSrfs[i].Faces[face].B]) #1
-                    tempMesh.Vertices.Add(analysisSrfs[i].Vertices[analysisSrfs[i].Faces[face].C]) #2
-                    tempMesh.Vertices.Add(analysisSrfs[i].Vertices[analysisSrfs[i].Faces[face].D]) #3
-                    tempMesh.Faces.AddFace(0, 1, 2, 3)
-                    edgesPL = tempMesh.GetNakedEdges()
-                    edgesCrv = []
-                    for e in edgesPL: edgesCrv.append(e.ToNurbsCurve())
-                    meshSrfEdges[i][face] = rc.Geometry.Curve.JoinCurves(edgesCrv)[0]
-                    meshes[i][face] = tempMesh
-                    
-        except:
-            print 'Error in Extracting Test Points'
-            pass
-        
-        # calling the function
-        if parallel:
-            tasks.Parallel.ForEach(range(len(analysisSrfs)),srfPtCalculator)
-        else:
-            for i in range(len(analysisSrfs)):
-                srfPtCalculator(i)
+def cross(a, b): return (a[1]*b[2] - a[2]*b[1], a[2]*b[0] - a[0]*b[2], a[0]*b[1] - a[1]*b[0])
 
-        return testPoint, srfNormals, meshSrfEdges, meshes
-        
-        
-def projectToPlane(geometry, plane, vector):
-    
-    def getTransform():
-        if plane.ZAxis.IsParallelTo(vector)**2 == 1:
-            x = rc.Geometry.Transform.PlanarProjection(plane)
-            return x
-        elif math.sin(rc.Geometry.Vector3d.VectorAngle(plane.ZAxis,vector)) == 1:
-            x = rc.Geometry.Transform.Unset
-            return x
-        
-        originalPlane = plane
-        newPlane = rc.Geometry.Plane(originalPlane.Origin, -vector)
-        
-        z0 = originalPlane.ZAxis
-        z1 = newPlane.ZAxis
-        angle = rc.Geometry.Vector3d.VectorAngle(z0, z1)
-        intersect, axis = rc.Geometry.Intersect.Intersection.PlanePlane(originalPlane, newPlane)
-        
-        if intersect:
-            P2 = rc.Geometry.Plane(originalPlane)
-            P2.XAxis = axis.UnitTangent
-            P2.YAxis = rc.Geometry.Vector3d.CrossProduct(P2.XAxis, P2.ZAxis)
-            beta = 0.5 * math.pi - angle
-            factor = 1.0 / math.sin(beta)
-            project = rc.Geometry.Transform.PlanarProjection(newPlane)
-            rotate = rc.Geometry.Transform.Rotation(z1, z0, originalPlane.Origin)
-            scale = rc.Geometry.Transform.Scale(P2, 1.0, factor, 1.0)
-            x = scale * rotate * project
-            return x
-    
-    geometry.Transform(getTransform())
-    return geometry
+def unitize(a):
+    length = math.sqrt(dot(a, a))
+    return (a[0]/length, a[1]/length, a[2]/length)
 
-def getMeshCenter(mesh):
-    mp = rc.Geometry.AreaMassProperties.Compute(mesh)
-    return mp.Centroid
+def polygonArea(polygon):
+    # signed area of a 2D polygon (positive for counter-clockwise)
+    area = 0
+    for i in range(len(polygon)):
+        x1, y1 = polygon[i - 1]
+        x2, y2 = polygon[i]
+        area += x1 * y2 - x2 * y1
+    return area / 2
 
-def findDiscontinuity(curve, style, includeEndPts = True):
-    # copied and modified from rhinoScript (@Steve Baer @GitHub)
-    """Search for a derivatitive, tangent, or curvature discontinuity in
-    a curve object.
-    Parameters:
-      curve_id = identifier of curve object
-      style = The type of continuity to test for. The types of
-          continuity are as follows:
-          Value    Description
-          1        C0 - Continuous function
-          2        C1 - Continuous first derivative
-          3        C2 - Continuous first and second derivative
-          4        G1 - Continuous unit tangent
-          5        G2 - Continuous unit tangent and curvature
-    Returns:
-      List 3D points where the curve is discontinuous
+class shadowFace(object):
+    """A planar and convex face of one of the input geometries.
+    
+    Args:
+        parentID: The index of the geometry that the face belongs to.
+        vertices: A list of (x, y, z) vertices.
+        normal: The (x, y, z) unit normal of the face.
     """
-    dom = curve.Domain
-    t0 = dom.Min
-    t1 = dom.Max
-    points = []
-    #if includeEndPts: points.append(curve.PointAtStart)
-    get_next = True
-    while get_next:
-        get_next, t = curve.GetNextDiscontinuity(System.Enum.ToObject(rc.Geometry.Continuity, style), t0, t1)
-        if get_next:
-            points.append(curve.PointAt(t))
-            t0 = t # Advance to the next parameter
-    if includeEndPts: points.append(curve.PointAtEnd)
-    return points
-
-class pseudoFace(object):
-    def __init__(self, mesh):
-        self.geometry = mesh
-        self.boundary = []
-        polylines = self.geometry.GetNakedEdges()
-        [self.boundary.append(pl.ToNurbsCurve()) for pl in polylines]
-        self.boundary = self.boundary[0]
+    def __init__(self, parentID, vertices, normal):
+        self.parentID = parentID
+        self.vertices = vertices
+        self.normal = normal
+        self.planeDist = dot(normal, vertices[0])
 
-def checkReverse(shadingFace, toBeShadedFace, vector):
-    res = isShadingPossible(shadingFace, toBeShadedFace, vector, count = 1)
-    if res == True: return False
-    elif res == False: return True
-    else: return "Complicated"
-    
-def isShadingPossible(shadingFace, toBeShadedFace, vector, count = 0):
-    
-    
-    # find the points of shadingFace
-    crvPoints = findDiscontinuity(shadingFace.boundary, style = 4)
+def getFaces(geometries):
+    """Make the faces of the input meshes.
     
-    shadingPts = []
-    nonShadingPts = []
-    thereIsMorePoint = True
-    while len(shadingPts) * len(nonShadingPts) == 0 and thereIsMorePoint:
-        # project to point
-        for pt in crvPoints:
-            projectedPt = projectToPlane(rc.Geometry.Point3d(pt), toBeShadedFace.plane, vector)
-            pVector = rc.Geometry.Vector3d(projectedPt - pt)
+    The faces are made once for all of the sun vectors. Quads that are not
+    planar or not convex are split into two triangles so every face can be
+    used as a convex clipping polygon.
+    """
+    faces = []
+    for geoCount, mesh in enumerate(geometries):
+        mesh.FaceNormals.ComputeFaceNormals()
+        mesh.FaceNormals.UnitizeFaceNormals()
+        vertices = [(v.X, v.Y, v.Z) for v in mesh.Vertices]
+        for faceCount in range(mesh.Faces.Count):
+            face = mesh.Faces[faceCount]
+            normal = mesh.FaceNormals[faceCount]
+            normal = (normal.X, normal.Y, normal.Z)
+            if dot(normal, normal) == 0: continue
             
-            #print int(math.degrees(rc.Geometry.Vector3d.VectorAngle(vector, pVector)))
-            if int(math.degrees(rc.Geometry.Vector3d.VectorAngle(vector, pVector))) == 0 or pVector.Length < tol:
-                #print 'yup!'
-                shadingPts.append(pt)
+            if face.IsQuad:
+                quad = [vertices[face.A], vertices[face.B], vertices[face.C], vertices[face.D]]
+                # the quad is good if it is planar and all of its corners turn the same way
+                turns = [dot(cross(subtract(quad[i], quad[i - 1]), subtract(quad[(i + 1) % 4], quad[i])), normal) for i in range(4)]
+                if all(turn > 0 for turn in turns) and abs(dot(normal, quad[3]) - dot(normal, quad[0])) < tol and abs(dot(normal, quad[2]) - dot(normal, quad[0])) < tol:
+                    faces.append(shadowFace(geoCount, quad, normal))
+                else:
+                    for triangle in ([quad[0], quad[1], quad[2]], [quad[0], quad[2], quad[3]]):
+                        triNormal = cross(subtract(triangle[1], triangle[0]), subtract(triangle[2], triangle[0]))
+                        if dot(triNormal, triNormal) > 0: faces.append(shadowFace(geoCount, triangle, unitize(triNormal)))
             else:
-                #print 'noch!'
-                nonShadingPts.append(pt)
-        
-        thereIsMorePoint = False
-    
-    if len(shadingPts) * len(nonShadingPts) != 0:
-        # this is a mixed situation, I need to subdivide toBeShadedFace
-        # and run the study for each part of the surface
-        # the function ideally can be written as a recursive function
-        # but I need to fix the rest of the code and the way I wrote the class
-        # for faces which I'll do later
-        count += 1
-        
-        # Rhino kept crashing when I wrote this function as recursive function
-        # now I'm trying it in a stupid way
-        res = isShadingPossible2(toBeShadedFace, shadingFace, vector)
-        if res == True or res == False: return not res
-        else: return 'Complicated'
-        #try:
-        #meshList = rc.Geometry.Mesh.Split(shadingFace.geometry, toBeShadedFace.plane)
-        #if len(meshList) == 2:
-        #    for m in meshList:
-        #        mesh = pseudoFace(m)
-        #        if isShadingPossible(mesh, toBeShadedFace, count): return True
-        #        elif count > 3: return 'Complicated'
-        #        else:
-        #            print count
-        #            count += 1
-        #else:
-        #return 'Complicated'
-        #except Exception, e:
-            
-        #    print `e`
-        
-    
-    elif len(shadingPts)!= 0: return True
-    
-    elif len(nonShadingPts)!=0: return False
+                faces.append(shadowFace(geoCount, [vertices[face.A], vertices[face.B], vertices[face.C]], normal))
+    return faces
 
+def sunFrame(sunVector):
+    # the direction of the sun rays and two axes that are perpendicular to it
+    w = unitize((sunVector.X, sunVector.Y, sunVector.Z))
+    if abs(w[2]) < 0.9: u = unitize(cross((0, 0, 1), w))
+    else: u = unitize(cross((1, 0, 0), w))
+    v = cross(w, u)
+    return u, v, w
 
-def isShadingPossible2(shadingFace, toBeShadedFace, vector, count = 0):
-    
-    # the same function! just copied twice as it was making the component to crash on recursive runs
-    # find the points of shadingFace
-    crvPoints = findDiscontinuity(shadingFace.boundary, style = 4)
-    
-    shadingPts = []
-    nonShadingPts = []
-    thereIsMorePoint = True
-    while len(shadingPts) * len(nonShadingPts) == 0 and thereIsMorePoint:
-        # project to point
-        for pt in crvPoints:
-            projectedPt = projectToPlane(rc.Geometry.Point3d(pt), toBeShadedFace.plane, vector)
-            pVector = rc.Geometry.Vector3d(projectedPt - pt)
-            
-            #print int(math.degrees(rc.Geometry.Vector3d.VectorAngle(vector, pVector)))
-            if int(math.degrees(rc.Geometry.Vector3d.VectorAngle(vector, pVector))) == 0 or pVector.Length < tol:
-                #print 'yup!'
-                shadingPts.append(pt)
-            else:
-                #print 'noch!'
-                nonShadingPts.append(pt)
-        
-        thereIsMorePoint = False
-    
-    if len(shadingPts) * len(nonShadingPts) != 0:
-        # this is a mixed situation, I need to subdivide toBeShadedFace
-        # and run the study for each part of the surface
-        # the function ideally can be written as a recursive function
-        # but I need to fix the rest of the code and the way I wrote the class
-        # for faces which I'll do later
-        count += 1
-        #return checkReverse(shadingFace, toBeShadedFace)
-        #return 'Complicated'
-        #try:
-        #meshList = rc.Geometry.Mesh.Split(shadingFace.geometry, toBeShadedFace.plane)
-        #if len(meshList) == 2:
-        #    for m in meshList:
-        #        mesh = pseudoFace(m)
-        #        if isShadingPossible(mesh, toBeShadedFace, count): return True
-        #        elif count > 3: return 'Complicated'
-        #        else:
-        #            print count
-        #            count += 1
-        #else:
-        return 'Complicated'
-        #except Exception, e:
-            
-        #    print `e`
-        
-    
-    elif len(shadingPts)!= 0: return True
-    
-    elif len(nonShadingPts)!=0: return False
-
-class createFace(object):
-    
-    def __init__(self, numOfGeometry, numOfFace, mesh, boundary, centerPt, normal):
-        
-        self.parentID = numOfGeometry
-        self.ID = numOfFace
-        self.fullID = `self.parentID` + '_' + `self.ID`
-        self.geometry = mesh
-        self.centerPt = centerPt
-        self.normal = normal
-        self.boundary = boundary
-        self.plane = rc.Geometry.Plane(self.centerPt, self.normal)
-        self.shadedBySrfsList = []
-        self.ShadingSrfsList = []
-    
-    def getOutlineCrvFromSun (self, sunVector):
-        self.planeFromSun = rc.Geometry.Plane(self.centerPt, sunVector)
-        self.outlineCrvFromSun = []
-        polylines = self.geometry.GetOutlines(self.planeFromSun)
-        [self.outlineCrvFromSun.append(pl.ToNurbsCurve()) for pl in polylines]
-        
-    def isShadingFaces(self, surface):
-        self.shadingSrfsList.append(surface.fullID)
-    
-    def isShadedByFaces(self, surface):
-        self.shadedSrfsList.append(surface.fullID)
-
+def clipPolygon(subject, clip):
+    """Clip a 2D polygon with a convex counter-clockwise polygon (Sutherland-Hodgman)."""
+    output = subject
+    for i in range(len(clip)):
+        if len(output) == 0: break
+        ax, ay = clip[i - 1]
+        bx, by = clip[i]
+        ex, ey = bx - ax, by - ay
+        polygon = output
+        output = []
+        sides = [ex * (y - ay) - ey * (x - ax) for x, y in polygon]
+        for j in range(len(polygon)):
+            prevSide, side = sides[j - 1], sides[j]
+            if side >= 0:
+                if prevSide < 0: output.append(crossingPoint(polygon[j - 1], polygon[j], prevSide, side))
+                output.append(polygon[j])
+            elif prevSide >= 0:
+                output.append(crossingPoint(polygon[j - 1], polygon[j], prevSide, side))
+    return output
 
-# for now I copy pasted this code but it should be re-written later
-# class for each surface can be made inside this function
-centerPts, srfNormals, listOfBoundaryLists, meshes = parallel_testPointCalculator(_geometry, 0)
+def crossingPoint(p1, p2, side1, side2):
+    t = side1 / (side1 - side2)
+    return tuple(a + t * (b - a) for a, b in zip(p1, p2))
 
+def clipByPlane(vertices, normal, planeDist):
+    # the part of a 3D polygon that is on the sun side of a plane
+    sides = [dot(normal, vertex) - planeDist for vertex in vertices]
+    output = []
+    for j in range(len(vertices)):
+        prevSide, side = sides[j - 1], sides[j]
+        if side >= 0:
+            if prevSide < 0: output.append(crossingPoint(vertices[j - 1], vertices[j], prevSide, side))
+            output.append(vertices[j])
+        elif prevSide >= 0:
+            output.append(crossingPoint(vertices[j - 1], vertices[j], prevSide, side))
+    return output
 
-
-### generate faces
-facesList = {}
-if _sunVector!=None:
-    # each geometry (closed mesh)
-    for geoCount, boundaries in enumerate(listOfBoundaryLists):
-        # each face curve
-        for faceCount, boundary in enumerate(boundaries):
-            id = `geoCount` + '_' + `faceCount`
-            mesh = meshes[geoCount][faceCount]
-            boundary = listOfBoundaryLists[geoCount][faceCount]
-            centerPt = centerPts[geoCount][faceCount]
-            normal = srfNormals[geoCount][faceCount]
-            
-            facesList[id] = createFace(geoCount, faceCount, mesh, boundary, centerPt, normal)
-            
-            # prepare data for shadow calculation
-            facesList[id].getOutlineCrvFromSun(_sunVector)
+def castShadows(faces, sunVector):
+    """Find the shadows of the faces on each other for one sun vector.
     
+    All of the faces are projected into the frame of the sun and the bounding
+    boxes of the projected faces are put in a 2D grid. Each face that is facing
+    the sun is only tested against the faces that share a grid cell with it.
+    The shadows are found by clipping the projected polygons and are lifted back
+    to the plane of the face that receives them.
     
-    shadowCrvsCollection = []
-    shaded = []
+    Returns:
+        shadowPolygons: A list of the faces that receive shadows with a list of
+            3D shadow polygons for each of them.
+        shadeFaces: A list of the faces that are not facing the sun.
+    """
+    u, v, w = sunFrame(sunVector)
+    projected = [[(dot(vertex, u), dot(vertex, v)) for vertex in face.vertices] for face in faces]
+    boxes = []
+    for polygon in projected:
+        xs = [x for x, y in polygon]; ys = [y for x, y in polygon]
+        boxes.append((min(xs), min(ys), max(xs), max(ys)))
     
+    # faces that are edge-on to the sun do not cast or receive any shadow
+    facing = [dot(face.normal, w) for face in faces]
+    casters = [i for i in range(len(faces)) if abs(facing[i]) > 1e-9]
+    if len(casters) == 0: return [], [face for face, f in zip(faces, facing) if f >= 0]
     
-    for toBeShadedFaceID in facesList.keys():
-        
-        toBeShadedFace = facesList[toBeShadedFaceID]
+    minX = min(boxes[i][0] for i in casters); minY = min(boxes[i][1] for i in casters)
+    # the cells have the median size of the faces so a few large faces (e.g. the ground) don't make
+    # the cells large, and the grid has at most about 4 cells for each face so they don't fill too many cells
+    sizes = sorted(max(boxes[i][2] - boxes[i][0], boxes[i][3] - boxes[i][1]) for i in casters)
+    extent = max(max(boxes[i][2] for i in casters) - minX, max(boxes[i][3] for i in casters) - minY)
+    cellSize = max(sizes[len(sizes) // 2], extent / math.sqrt(4 * len(casters)), tol)
+    grid = {}
+    for i in casters:
+        box = boxes[i]
+        for cx in range(int((box[0] - minX) / cellSize), int((box[2] - minX) / cellSize) + 1):
+            for cy in range(int((box[1] - minY) / cellSize), int((box[3] - minY) / cellSize) + 1):
+                grid.setdefault((cx, cy), []).append(i)
+    
+    shadowPolygons = []
+    shadeFaces = []
+    for i, face in enumerate(faces):
+        if facing[i] >= 0:
+            # is not facing the sun
+            shadeFaces.append(face)
+            continue
+        if facing[i] > -1e-9: continue
         
-        shadowCrvs = []
+        receiver = projected[i]
+        if polygonArea(receiver) < 0: receiver = receiver[::-1]
+        box = boxes[i]
+        candidates = set()
+        for cx in range(int((box[0] - minX) / cellSize), int((box[2] - minX) / cellSize) + 1):
+            for cy in range(int((box[1] - minY) / cellSize), int((box[3] - minY) / cellSize) + 1):
+                candidates.update(grid.get((cx, cy), ()))
         
-        # check if the face is facing the sun
-        if rc.Geometry.Vector3d.VectorAngle(toBeShadedFace.normal, _sunVector) > math.pi/2:
+        shadows = []
+        for j in candidates:
+            # self shading of the same geometry is not calculated
+            if faces[j].parentID == face.parentID: continue
+            other = boxes[j]
+            if other[0] > box[2] or other[2] < box[0] or other[1] > box[3] or other[3] < box[1]: continue
             
-            for shadingFaceID in facesList.keys():
-                
-                shadingFace = facesList[shadingFaceID]
-                
-                # self shading will be added later
-                if shadingFace.parentID != toBeShadedFace.parentID and (toBeShadedFace.fullID not in shadingFace.shadedBySrfsList):
-                    
-                    shadingRelationShip = isShadingPossible(shadingFace, toBeShadedFace,  _sunVector)
-                    
-                    if  shadingRelationShip == 'Complicated':
-                        # toBeShadedFace needs to be splitted I write this later
-                        # let's just get it to work for now
-                        print 'one complicated case!'
-                        pass
-                    
-                    elif shadingRelationShip:
-                        # project curve to plane
-                        projectedCurve = projectToPlane(shadingFace.boundary.Duplicate(), toBeShadedFace.plane, _sunVector)
-                        
-                        try:
-                            # find the intersection between the curve and the outline
-                            shadowCrv = rc.Geometry.Curve.CreateBooleanIntersection(toBeShadedFace.boundary, projectedCurve)[0]
-                            # add to shadowCrvList if any
-                            shadowCrvs.append(shadowCrv)
-                            toBeShadedFace.isShadedByFaces(shadingFace)
-                            shadingFace.isShadingByFaces(toBeShadedFace)
-                        
-                        except:
-                             pass
-                
-            # boolean union all the shadows on the same surface
-            uShadowCrv = rc.Geometry.Curve.CreateBooleanUnion(shadowCrvs)
-            if len(uShadowCrv)!=0:
-                for c in uShadowCrv: shadowCrvsCollection.append(c)
-            elif len(shadowCrvs)!=0:
-                for c in shadowCrvs: shadowCrvsCollection.append(c)
-                        
-        else:
-            # is not facing the sun
-            shaded.append(toBeShadedFace.boundary)
+            # only the part of the other face that is between the sun and this face casts a shadow
+            if max(dot(face.normal, vertex) for vertex in faces[j].vertices) - face.planeDist < tol: continue
+            caster = clipByPlane(faces[j].vertices, face.normal, face.planeDist)
+            if len(caster) < 3: continue
+            caster = [(dot(vertex, u), dot(vertex, v)) for vertex in caster]
+            if polygonArea(caster) < 0: caster = caster[::-1]
+            
+            shadow = clipPolygon(caster, receiver)
+            if len(shadow) > 2 and polygonArea(shadow) > tol * tol: shadows.append(shadow)
+        
+        if shadows:
+            # lift the shadows from the frame of the sun to the plane of the face
+            nu, nv, nw = dot(face.normal, u), dot(face.normal, v), facing[i]
+            lifted = []
+            for shadow in shadows:
+                polygon = []
+                for a, b in shadow:
+                    t = (face.planeDist - a * nu - b * nv) / nw
+                    polygon.append(rc.Geometry.Point3d(a*u[0] + b*v[0] + t*w[0], a*u[1] + b*v[1] + t*w[1], a*u[2] + b*v[2] + t*w[2]))
+                lifted.append(polygon)
+            shadowPolygons.append((face, lifted))
+    
+    return shadowPolygons, shadeFaces
 
+def faceMesh(face):
+    mesh = rc.Geometry.Mesh()
+    for vertex in face.vertices: mesh.Vertices.Add(rc.Geometry.Point3d(*vertex))
+    if len(face.vertices) == 4: mesh.Faces.AddFace(0, 1, 2, 3)
+    else: mesh.Faces.AddFace(0, 1, 2)
+    mesh.Normals.ComputeNormals()
+    return mesh
 
-        shadowCurves = shadowCrvsCollection
-        shadeCurves = shaded
-        
-        shadow = []
-        shade = []
-        
-        meshingPar = rc.Geometry.MeshingParameters.Coarse
-        
-        for item in shadowCurves:
-            mesh = rc.Geometry.Mesh.CreateFromPlanarBoundary(item, meshingPar)
-            shadow.append(mesh)
-            
-        for item in shadeCurves:
+def shadowMeshes(shadowPolygons):
+    # boolean union all the shadows on the same face
+    meshingPar = rc.Geometry.MeshingParameters.Coarse
+    shadow = []
+    for face, polygons in shadowPolygons:
+        shadowCrvs = [rc.Geometry.PolylineCurve(polygon + [polygon[0]]) for polygon in polygons]
+        if len(shadowCrvs) > 1:
+            uShadowCrv = rc.Geometry.Curve.CreateBooleanUnion(shadowCrvs)
+            if uShadowCrv and len(uShadowCrv)!=0: shadowCrvs = uShadowCrv
+        for item in shadowCrvs:
             mesh = rc.Geometry.Mesh.CreateFromPlanarBoundary(item, meshingPar)
-            shade.append(mesh)
-          
+            if mesh: shadow.append(mesh)
+    return shadow
+
+
+if _sunVector!=None and len(_geometry)!=0:
+    faces = getFaces(_geometry)
+    shadowPolygons, shadeFaces = castShadows(faces, _sunVector)
+    shadow = shadowMeshes(shadowPolygons)
+    shade = [faceMesh(face) for face in shadeFaces]
+
 print "If you want to see shadows in grey color, write [0,0,0(69)] without those brackets, in a panel and connect that to native grasshopper Custom Preview component."
-      
-      
\ No newline at end of file
@@ -47,7 +47,7 @@ try: ghenv.Component.AdditionalHelpFromDocStrings = "3"
 except: pass
 
 
-import time, math, Rhino, copy
+import time, math, Rhino
 import System.Threading.Tasks as tasks
 import Grasshopper.Kernel as gh
 import scriptcontext as scriptc
@@ -65,7 +65,7 @@ inputsDictEnvelope = {
 3: ["_sunVectors", "Sun vectors representing hours of the year when sun should be accessible to the properties surrounding the baseSrf.  sunVectors can be generated using the Ladybug sunPath component."],
 4: ["gridSize_", "A numeric value inidcating the gird size of the analysis in Rhino model units. The smaller the grid size - the more test points( more accurate but slower). Default value is automatically set based on the size of the input _baseSrf."],
 5: ["maxHeight_", "If there are no obstrucsions, this would be the heighest value for the solar envelope points. The default value set to 100 meters above the average baseSrf height."],
-6: ["increment_", "A number for the height at which the vector will be incremented duing context intersection calculations. The default value is 1 meter. Note that this value is only used when context is input."],
+6: ["increment_", "A number for the height tolerance of the search for the height that clears the context geometry. The default value is 1 meter. Note that this value is only used when context is input."],
 7: ["envelopeToRun_", "Set to 'True' if you would like the component to calculate a solar rights boundary and 'False' if you would like a solar collection boundary.  The default is set to solar envelope."],
 8: ["_numOfCPUs_", "Number of CPUs to be used for the simulation. Default value would be " + str(defaultNumOfCPUs)],
 9: ["_runIt", "Set to 'True' to run the component and generate solar envelope points."]
@@ -79,7 +79,7 @@ inputsDictCollection = {
 3: ["_sunVectors", "Sun vectors representing hours of the year when sun should be accessible to the properties surrounding the baseSrf.  sunVectors can be generated using the Ladybug sunPath component."],
 4: ["gridSize_", "A numeric value inidcating the gird size of the analysis in Rhino model units. The smaller the grid size - the more test points( more accurate but slower). Default value is automatically set based on the size of the input _baseSrf."],
 5: ["maxHeight_", "If there are no obstrucsions this would be the lowest value for the solar collection points. Default value set to 20 meters below the average baseSrf height."],
-6: ["increment_", "A number for the height at which the vector will be incremented duing context intersection calculations. The default value is 1 meter. Note that this value is only used when context is input."],
+6: ["increment_", "A number for the height tolerance of the search for the height that clears the context geometry. The default value is 1 meter. Note that this value is only used when context is input."],
 7: ["envelopeToRun_", "Set to 'True' if you would like the component to calculate a solar rights boundary and 'False' if you would like a solar collection boundary.  The default is set to solar envelope."],
 8: ["_numOfCPUs_", "Number of CPUs to be used for the simulation. Default value would be " + str(defaultNumOfCPUs)],
 9: ["_runIt", "Set to 'True' to run the component and generate solar collection points."]
@@ -163,6 +163,87 @@ def computeGridSize(baseSrf):
     return gridsize
 
 
+def obstacleSegments(curve):
+    """Convert an obstacle curve into the plain 2D data used by findEnvelopeHeights.
+    
+    Returns:
+        A tuple of (z, segments) where z is the height of the end of the curve
+        and segments is a list of (x1, y1, x2, y2) tuples along the curve.
+    """
+    isPolyline, polyline = curve.TryGetPolyline()
+    if not isPolyline:
+        polyline = curve.ToPolyline(scriptc.doc.ModelAbsoluteTolerance,
+            scriptc.doc.ModelAngleToleranceRadians, 0, 0).ToPolyline()
+    pts = [(pt.X, pt.Y) for pt in polyline]
+    segments = [(pts[i][0], pts[i][1], pts[i + 1][0], pts[i + 1][1])
+                for i in range(len(pts) - 1)]
+    return curve.PointAtEnd.Z, segments
+
+
+def findEnvelopeHeights(gridXY, obstacles, sunAngles, defaultHeight, lineExtention,
+                        solarEnvelope=True):
+    """Calculate the envelope heights of grid points for a set of obstacle polylines.
+    
+    This is the same calculation as GridPt.getPointHeight but it works on plain
+    numbers instead of Rhino geometry so it can also be used outside of Rhino.
+    Everything that does not depend on the grid point is computed once for
+    every sun and segment so each point only needs a few multiplications per
+    segment.
+    
+    Args:
+        gridXY: A list of (x, y) tuples for the grid points.
+        obstacles: A list of (z, segments) tuples as returned by obstacleSegments.
+        sunAngles: A list of (azimuth, altitude) tuples in radians.
+        defaultHeight: The height of the points when no obstacle is relevant.
+        lineExtention: The length of the sun line from every point. Negative
+            values look back to the sun (solar collection).
+        solarEnvelope: True to return the minimum heights (solar rights) and
+            False to return the maximum heights (solar collection).
+    
+    Returns:
+        A list of heights for the grid points.
+    """
+    # precompute the coefficients of the sun line / segment intersection.
+    # for a point (px, py) the parameter along the sun line is t = t0 - px * tx + py * ty
+    # and the parameter along the segment is u = u0 - px * ux + py * uy.
+    sunSets = []
+    for z, segments in obstacles:
+        for azimuth, altitude in sunAngles:
+            dx = - lineExtention * math.sin(azimuth)
+            dy = - lineExtention * math.cos(azimuth)
+            coeffs = []
+            for x1, y1, x2, y2 in segments:
+                ex, ey = x2 - x1, y2 - y1
+                denom = dx * ey - dy * ex
+                if abs(denom) < 1e-12:
+                    continue  # the sun line is parallel to the segment
+                coeffs.append(((x1 * ey - y1 * ex) / denom, ey / denom, ex / denom,
+                               (x1 * dy - y1 * dx) / denom, dy / denom, dx / denom))
+            if coeffs:
+                sunSets.append((z, abs(lineExtention) * math.tan(altitude), coeffs))
+    
+    heights = []
+    for px, py in gridXY:
+        height = defaultHeight
+        for z, slope, coeffs in sunSets:
+            tMin = None
+            for t0, tx, ty, u0, ux, uy in coeffs:
+                t = t0 - px * tx + py * ty
+                if t < 0 or t > 1 or (tMin is not None and t >= tMin):
+                    continue
+                u = u0 - px * ux + py * uy
+                if 0 <= u <= 1:
+                    tMin = t
+            if tMin is None:
+                continue  # sun not relevant so no obstacles to look out for
+            if solarEnvelope:
+                height = min(height, z + tMin * slope)
+            else:
+                height = max(height, z - tMin * slope)
+        heights.append(height)
+    return heights
+
+
 class SolarEnvelope:
     """Class for Solar Envelopes.
     
@@ -245,15 +326,19 @@ class SolarEnvelope:
         
         def _findPointsHeight(i):
             chunk = self.chunks[i]
+            if self.context is None:
+                gridXY = [(g.point.X, g.point.Y) for g in chunk.points]
+                heights = findEnvelopeHeights(gridXY, self.obstacles, self.sunAngles,
+                    self.defaultHeight, self.lineExtention, self._solarEnvelope)
+                for g, height in zip(chunk.points, heights):
+                    g.point.Z = height
+                return
             for x in range(len(chunk.points)):
                 g = chunk.points[x]
                 for y in range(len(chunk.obstacleCurves)):
                     obCurve = chunk.obstacleCurves[y]
                     for j in range(len(chunk.suns)):
-                        if self.context is None:
-                            tempHeight = g.getPointHeight(obCurve, chunk.suns[j])
-                        else:
-                            tempHeight = g.getPointHeightContext(obCurve, chunk.suns[j])
+                        tempHeight = g.getPointHeightContext(obCurve, chunk.suns[j])
                         if self._solarEnvelope : 
                             if  tempHeight < g.point.Z : 
                                 g.point.Z = tempHeight
@@ -261,17 +346,23 @@ class SolarEnvelope:
                             if  tempHeight > g.point.Z : 
                                 g.point.Z = tempHeight
         
+        # without context the heights only depend on plain 2D geometry
+        if self.context is None:
+            self.obstacles = [obstacleSegments(crv) for crv in self.obstacleCurves]
+            self.sunAngles = [(sun.azimuth, sun.alltitude) for sun in self.suns]
+        
         # split the array of points into equeal size chunks, the last item will contain the remaining elements
-        itemsInEveryChunk = int(math.ceil(len(self.gridPoints) / self.NumOfThreads))
+        itemsInEveryChunk = max(1, int(math.ceil(len(self.gridPoints) / float(self.NumOfThreads))))
         splittedPoints = [self.gridPoints[i:i+itemsInEveryChunk]
                           for i in range(0, len(self.gridPoints), itemsInEveryChunk)]
+        # every grid point belongs to exactly one chunk and the suns and curves
+        # are only read during the calculation so they are shared between chunks
         self.chunks = []
-        for i in range(self.NumOfThreads):
-            self.chunks.append(ParallelChunkObject(copy.deepcopy(splittedPoints[i]),
-                copy.deepcopy(self.suns), copy.deepcopy(self.obstacleCurves)))
+        for points in splittedPoints:
+            self.chunks.append(ParallelChunkObject(points, self.suns, self.obstacleCurves))
         
         # Run every chunk on its own thread
-        tasks.Parallel.ForEach(xrange(self.NumOfThreads), _findPointsHeight)
+        tasks.Parallel.ForEach(xrange(len(self.chunks)), _findPointsHeight)
         self.gridPoints = []
         for pointChunk in self.chunks:
             self.gridPoints.extend(pointChunk.points)
@@ -289,8 +380,9 @@ class SolarEnvelope:
 
 class ParallelChunkObject:
     """The point array of input meshes to test is divided into spearate ParallelChunkObjects
-    such that each object can be run independently on its own thread. Otherwise,
-    a race condition can occour even from just reading the same data from each thread.
+    such that each object can be run independently on its own thread. Each chunk
+    owns its own grid points while the suns and obstacle curves are shared
+    read-only between all of the chunks.
     """
     
     def __init__(self,points,_suns, _obstacleCurves):
@@ -348,24 +440,34 @@ class GridPt:
         if initial_height == self.defaultHeight:  # sun not relevant
             return initial_height
         
-        ray = Rhino.Geometry.Ray3d(
-            Rhino.Geometry.Point3d(self.point.X, self.point.Y, initial_height),
-            singleSun.sun_vector)
-        _intersections = Rhino.Geometry.Intersect.Intersection.MeshRay(self.mainRef.context, ray)
-        if _intersections == -1:
+        if self.isRayClear(initial_height, singleSun):
             # No intersection with context. The original height is correct.
             return initial_height
         
-        # incrementally move the point until it clears the context.
-        num_moves = int((self.defaultHeight - initial_height) / self.mainRef.increment)
-        for i in range(num_moves):
-            initial_height += self.mainRef.increment
-            new_pt = Rhino.Geometry.Point3d(self.point.X, self.point.Y, initial_height)
-            new_ray = Rhino.Geometry.Ray3d(new_pt, singleSun.sun_vector)
-            _inters = Rhino.Geometry.Intersect.Intersection.MeshRay(self.mainRef.context, new_ray)
-            if _inters == -1:
-                return initial_height
-        return initial_height
+        # the context can only permit a higher envelope so search the heights
+        # between the obstacle height and the default height.
+        if self.defaultHeight - initial_height < self.mainRef.increment:
+            return initial_height
+        if not self.isRayClear(self.defaultHeight, singleSun):
+            return self.defaultHeight
+        
+        # bisect the interval until it is smaller than the increment.
+        # blockedHeight is always blocked by the context and clearHeight is always clear.
+        blockedHeight, clearHeight = initial_height, self.defaultHeight
+        while clearHeight - blockedHeight > self.mainRef.increment:
+            midHeight = (blockedHeight + clearHeight) / 2
+            if self.isRayClear(midHeight, singleSun):
+                clearHeight = midHeight
+            else:
+                blockedHeight = midHeight
+        return clearHeight
+    
+    def isRayClear(self, height, singleSun):
+        """Check whether a ray from the point at a given height to the sun misses the context."""
+        ray = Rhino.Geometry.Ray3d(
+            Rhino.Geometry.Point3d(self.point.X, self.point.Y, height),
+            singleSun.sun_vector)
+        return Rhino.Geometry.Intersect.Intersection.MeshRay(self.mainRef.context, ray) == -1
 
 
 class SingleSun:
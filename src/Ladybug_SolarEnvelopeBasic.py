@@ -62,7 +62,7 @@ Provided by Ladybug 0.0.69
                 Dec 21 = Winter/Summer Solstice
  
     Returns:
-        solarEnvelope: A Brep representing a solar envelope.  This volume should be built within in order to ensure that the surrounding property is not shaded for the given number of hours.
+        solarEnvelope: A list of Breps representing a solar envelope.  This volume should be built within in order to ensure that the surrounding property is not shaded for the given number of hours.  The list usually has one Brep but it can have several if the envelopes of the months only overlap in separate pieces, and it is empty if they do not overlap at all.
 """
 
 ghenv.Component.Name = "Ladybug_SolarEnvelopeBasic"
@@ -343,19 +343,16 @@ def main(north,boundary,timeperiod,monthRange,location):
             brep = rs.coercebrep(make_zone(sun_pts,boundary))
             brep_lst.append(brep)
         
-        SE = None
         TOL = sc.doc.ModelAbsoluteTolerance
-        for i in range(len(brep_lst)-1):
-            brep = brep_lst[i]
-            brep_ = brep_lst[i+1]
-            if not SE and rs.IsBrep(brep):
-                SE_ = brep
-            else:
-                SE_ = SE
-            if rs.IsBrep(brep_):
-                SE = rc.Brep.CreateBooleanIntersection(SE_,brep_,TOL)[0]
-            else:
-                SE = SE_
+        brep_lst = [brep for brep in brep_lst if brep is not None]
+        if len(brep_lst) == 0:
+            print "Failed to make the solar envelopes of the months from the boundary curve."
+            return []
+        SE = lb_prep.booleanIntersectBreps(brep_lst, TOL, True)
+        if SE is None:
+            print "Failed to intersect the solar envelopes of all of the months into one envelope."
+        elif len(SE) == 0:
+            print "The solar envelopes of the months do not have a common volume."
         return SE
         
     else:
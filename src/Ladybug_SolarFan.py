@@ -57,6 +57,7 @@ from clr import AddReference
 AddReference('Grasshopper')
 import Grasshopper.Kernel as gh
 import math
+import time
 
 
 
@@ -132,20 +133,15 @@ def isShadingPossible(shadingBorder, baseSurfacePlane, sunVector, lb_preparation
     
     shadingPts = []
     nonShadingPts = []
-    thereIsMorePoint = True
-    while len(shadingPts) * len(nonShadingPts) == 0 and thereIsMorePoint:
-        # project to point
-        for pt in crvPoints:
-            projectedPt = projectToPlane(rc.Geometry.Point3d(pt), baseSurfacePlane, sunVector)
-            pVector = rc.Geometry.Vector3d(projectedPt - pt)
-            if pVector != rc.Geometry.Vector3d(0, 0, 0):
-                #print int(math.degrees(rc.Geometry.Vector3d.VectorAngle(sunVector, pVector)))
-                if int(round(math.degrees(rc.Geometry.Vector3d.VectorAngle(sunVector, pVector)))) == 0 or pVector.Length < sc.doc.ModelAbsoluteTolerance:
-                    shadingPts.append(pt)
-                else:
-                    nonShadingPts.append(pt)
-        
-        thereIsMorePoint = False
+    # project the points to the plane along the sun vector
+    # the points in front of the plane move in the direction of the sun vector (t > 0)
+    parameters = lb_preparation.rayPlaneParameters(crvPoints, [sunVector], baseSurfacePlane)
+    for pt, (t,) in zip(crvPoints, parameters):
+        if t is not None and t != 0:
+            if t > 0 or abs(t) * sunVector.Length < sc.doc.ModelAbsoluteTolerance:
+                shadingPts.append(pt)
+            else:
+                nonShadingPts.append(pt)
     
     if len(shadingPts) * len(nonShadingPts) != 0:
         # this is a mixed situation, I need to subdivide toBeShadedFace
@@ -261,24 +257,6 @@ def createShadings(baseSrfs, planes, sunVectors, mergeCrvs, lb_preparation):
         
     return unionedProjectedCrvsCollection
 
-def unionAllFans(solarFans):
-    res = []
-    for fanCount in range(0, len(solarFans), 2):
-        try:
-            x = solarFans[fanCount]
-            y = solarFans[fanCount + 1]
-            x.Faces.SplitKinkyFaces(rc.RhinoMath.DefaultAngleTolerance, False)
-            y.Faces.SplitKinkyFaces(rc.RhinoMath.DefaultAngleTolerance, False)
-            a = rc.Geometry.Brep.CreateBooleanUnion([x, y], sc.doc.ModelAbsoluteTolerance)
-            if a == None:
-                a = [solarFans[fanCount], solarFans[fanCount + 1]]
-        except:
-            a = [solarFans[fanCount]]
-        
-        if a:
-            res.extend(a)
-    return res
-
 def main(sunVectors):
     
     # import the classes
@@ -408,14 +386,9 @@ def main(sunVectors):
             
             # if more than one solar fan solids have been produced, resulting from multiple shading curves being produced, try to boolean union them together into one solar fan.
             if len(solarFanInit) > 1:
-                listLength = len(solarFanInit)
-                solarFanFinal = solarFanInit
-                count  = 0
-                while len(solarFanFinal) > 1 and count < int(listLength/2) + 10:
-                    solarFanFinal = unionAllFans(solarFanFinal)
-                    count += 1
+                solarFanFinal = lb_preparation.booleanUnionBreps(solarFanInit, parallel = True)
                 
-                if solarFanFinal == None or len(solarFanFinal) > 1:
+                if len(solarFanFinal) > 1:
                     solarFanFinal = solarFanInit
                     print "Attempt to Boolean Union multiple solar fans into one failed.  Component will return multiple solar fans.  Try decreasing the '_adjustScale' parameter or using a greater timestep of solar vectors if a single solar fan is desired." 
             else:
@@ -442,6 +415,7 @@ else:
 
 if checkList:
 
+    startTime = time.time()
     solarFan = main(sunVectors)
     if solarFan!=-1:
-        print "Solar fan calculation is done!"
+        print "Solar fan calculation is done in " + "%.3f" % (time.time() - startTime) + " seconds!"
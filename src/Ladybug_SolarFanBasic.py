@@ -81,516 +81,181 @@ import rhinoscriptsyntax as rs
 import Rhino
 import scriptcontext as sc
 import datetime
-import random
-from decimal import Decimal as D
+from fractions import Fraction as F
 import Grasshopper.Kernel as gh
 
 """ --------------------------3D CONVEX HULL CLASSES------------------------------"""
 
-""" The following code class for 3D convex hull is from 
-    http://michelanders.blogspot.ca/2012/02/3d-convex-hull-in-python.html
-"""
-debug = False
-class Vector:
-	def __init__(self,x,y,z):
-		self.x=x
-		self.y=y
-		self.z=z
-	
-	def __str__(self):
-		return str(self.x)+" "+str(self.y)+" "+str(self.z)
-
-	def __sub__(self,other):
-		return Vector(other.x-self.x,other.y-self.y,other.z-self.z)
-	
-	def __add__(self,other):
-		return Vector(other.x+self.x,other.y+self.y,other.z+self.z)
-
-
-class Vertex:
-	def __init__(self,v,vnum=None,duplicate=None,onhull=False,mark=False):
-		self.v = v
-		self.vnum = vnum
-		self.duplicate = duplicate # ref to incident cone edge (or None)
-		self.onhull = onhull # T iff point on hull.
-		self.mark = mark # T iff point already processed.
-	
-	def __str__(self):
-		return str(self.v.x)+" "+str(self.v.y)+" "+str(self.v.z)
-	
-	def debug(self):
-		return "Vertex: %d %s dup:%s onhull:%s mark:%s\n"%(self.vnum,self.v,self.duplicate,self.onhull,self.mark)
-		
-	@staticmethod
-	def Collinear(a,b,c):
-		"""
-		Collinear checks to see if the three vertices given are collinear,
-		by checking to see if each element of the cross product is zero.
-		"""
-		return ( abs(( c.v.z - a.v.z ) * ( b.v.y - a.v.y ) -
-		( b.v.z - a.v.z ) * ( c.v.y - a.v.y )) <1e-4
-	and abs(( b.v.z - a.v.z ) * ( c.v.x - a.v.x ) -
-		( b.v.x - a.v.x ) * ( c.v.z - a.v.z )) <1e-4
-	and abs(( b.v.x - a.v.x ) * ( c.v.y - a.v.y ) -
-		( b.v.y - a.v.y ) * ( c.v.x - a.v.x )) <1e-4 )
-
-class Edge:
-	enum = 0
-	
-	def __init__(self,adjface=[None,None],endpts=[None,None],newface=None,delete=False):
-		self.adjface = []
-		self.adjface.extend(adjface)
-		self.endpts = []
-		self.endpts.extend(endpts)
-		self.newface = newface # ref to incident cone face
-		self.delete = delete # T iff edge should be deleted
-		self.enum = Edge.enum
-		Edge.enum+=1
-		
-	def __str__(self):
-		af=[str(f.fnum) if not (f is None) else '.' for f in self.adjface]
-		return "edge(%d): %s %s del: %s newf: %d adjf:%s"%(self.enum,self.endpts[0],self.endpts[1],self.delete,self.newface.fnum if not (self.newface is None) else -1," ".join(af))
-		
-class Face:
-	fnum=0
-	def __init__(self,edge=[None,None,None],vertex=[None,None,None],visible=False):
-		self.edge = []
-		self.edge.extend(edge)
-		self.vertex = []
-		self.vertex.extend(vertex)
-		self.visible = visible # T iff face visible from new point
-		self.fnum = Face.fnum
-		Face.fnum+=1
-		
-	def __str__(self):
-		return """facet normal 0 0 0
-outer loop
-vertex %s
-vertex %s
-vertex %s
-endloop
-endfacet"""%(self.vertex[0],self.vertex[1],self.vertex[2])
-
-	def debug(self):
-		return "Face(%d) visble: %s\n\t%s\t%s\t%s"%(self.fnum,self.visible,self.vertex[0].debug(),self.vertex[1].debug(),self.vertex[2].debug())
-		
-	def InitEdges(self, fold=None):
-		v0=self.vertex[0]
-		v1=self.vertex[1]
-		v2=self.vertex[2]
-		newedges=[]
-		# Create edges of the initial triangle
-		if fold is None:
-			e0 = Edge()
-			e1 = Edge()
-			e2 = Edge()
-			newedges=[e0,e1,e2]
-		else: # Copy from fold, in reverse order
-			e0 = fold.edge[2]
-			e1 = fold.edge[1]
-			e2 = fold.edge[0]
-		e0.endpts[0] = v0
-		e0.endpts[1] = v1
-		e1.endpts[0] = v1
-		e1.endpts[1] = v2
-		e2.endpts[0] = v2
-		e2.endpts[1] = v0
-	
-		self.edge[0] = e0
-		self.edge[1] = e1
-		self.edge[2] = e2
-	
-		# Link edges to face
-		e0.adjface[0] = self
-		e1.adjface[0] = self
-		e2.adjface[0] = self
-
-			
-		return newedges
-		
-	def MakeCcw(f,e,p): # the customary self is called f here instead of self
-		"""
-		MakeCcw puts the vertices in the face structure in counterclock wise 
-		order.  We want to store the vertices in the same 
-		order as in the visible face.  The third vertex is always p.
-
-		Although no specific ordering of the edges of a face are used
-		by the code, the following condition is maintained for each face f:
-		one of the two endpoints of f.edge[i] matches f.vertex[i]. 
-		But note that this does not imply that f.edge[i] is between
-		f.vertex[i] and f.vertex[(i+1)%3].  (Thanks to Bob Williamson.)
-		"""
-		
-		# fv	The visible face adjacent to e
-		# i     Index of e.endpoint[0] in fv
-	
-		if e.adjface[0].visible:      
-			fv = e.adjface[0]
-		else:
-			fv = e.adjface[1]
-	
-		# Set vertex[0] & [1] of f to have the same orientation
-		# as do the corresponding vertices of fv
-		i=0
-		while(fv.vertex[i] != e.endpts[0]):
-			i+=1
-		# Orient f the same as fv
-		swap=False
-		if fv.vertex[ (i+1) % 3 ] != e.endpts[1] :
-			f.vertex[0] = e.endpts[1]  
-			f.vertex[1] = e.endpts[0]    
-		else:
-			f.vertex[0] = e.endpts[0]   
-			f.vertex[1] = e.endpts[1]   
-			(f.edge[1], f.edge[2] ) = (f.edge[2], f.edge[1] )
-			#print('swapped') 
-			# This swap is tricky. e is edge[0]. edge[1] is based on endpt[0],
-			# edge[2] on endpt[1].  So if e is oriented "forwards," we
-			# need to move edge[1] to follow [0], because it precedes. */
-
-		f.vertex[2] = p
-		
-# Define flags
-ONHULL = True
-REMOVED = True
-VISIBLE  = True
-PROCESSED = True
-
-class Hull:
-	def __init__(self,v):
-		self.vertices = []
-		self.edges = []
-		self.faces = []
-		self.ReadVertices(v)
-		v=self.DoubleTriangle()
-		self.ConstructHull(v)
-		self.EdgeOrderOnFaces()
-
-	def ReadVertices(self,v):
-		self.vertices = [ Vertex(vc,i) for i,vc in enumerate(v) ]
-		
-	def EdgeOrderOnFaces(self):
-		"""
-		EdgeOrderOnFaces: puts e0 between v0 and v1, e1 between v1 and v2,
-		e2 between v2 and v0 on each face.  This should be unnecessary, alas.
-		"""
-		for f in self.faces:
-			for i in (0,1,2):
-				if ( not (((f.edge[i].endpts[0] == f.vertex[i]) and
-					(f.edge[i].endpts[1] == f.vertex[(i+1)%3])) or
-					((f.edge[i].endpts[1] == f.vertex[i]) and
-					(f.edge[i].endpts[0] == f.vertex[(i+1)%3])))):
-					# Change the order of the edges on the face
-					for j in (0,1,2):
-						# find the edge that should be there
-						if (((f.edge[j].endpts[0] == f.vertex[i]) and
-							(f.edge[j].endpts[1] == f.vertex[(i+1)%3])) or
-							((f.edge[j].endpts[1] == f.vertex[i]) and
-							(f.edge[j].endpts[0] == f.vertex[(i+1)%3]))) :
-							# Swap it with the one erroneously put into its place
-							(f.edge[i],f.edge[j]) = (f.edge[j],f.edge[i])
-	def __str__(self):
-		s=["solid points"]
-		for f in self.faces:
-			s.append(str(f))
-		s.append("endsolid points")
-		return "\n".join(s)
-		
-	def debug(self,msg=''):
-		s=[msg+'\n']
-		for f in self.faces:
-			s.append(f.debug())
-		s.append('-'*40)
-		return "".join(s)
-		
-	@staticmethod
-	def VolumeSign(f,p):
-		"""
-		VolumeSign returns the sign of the volume of the tetrahedron determined by f
-		and p.  VolumeSign is +1 iff p is on the negative side of f,
-		where the positive side is determined by the rh-rule.  So the volume 
-		is positive if the ccw normal to f points outside the tetrahedron.
-		The final fewer-multiplications form is due to Bob Williamson.
-		
-		This implementation differs from the one in the book in that it does not assume that
-		coordinates are integers.
-		"""
-		a=f.vertex[0].v - p.v
-		b=f.vertex[1].v - p.v
-		c=f.vertex[2].v - p.v
-		
-		vol = ( a.x * (b.y*c.z - b.z*c.y)
-		+ a.y * (b.z*c.x - b.x*c.z)
-		+ a.z * (b.x*c.y - b.y*c.x) )
-		epsilon = 1e-7
-		if abs(vol) >  epsilon:
-			if vol>0 : return 1
-			else : return -1
-		else:
-			ax=D(a.x)
-			ay=D(a.y)
-			az=D(a.z)
-			bx=D(b.x)
-			by=D(b.y)
-			bz=D(b.z)
-			cx=D(c.x)
-			cy=D(c.y)
-			cz=D(c.z)
-			vol = ( ax * (by*cz - bz*cy)
-			+ ay * (bz*cx - bx*cz)
-			+ az * (bx*cy - by*cx) )
-			if vol<D(0.0):
-				return -1
-			elif vol>D(0.0):
-				return 1
-		return 0
-
-	def ShowEdges(self,msg=""):
-		print(msg)
-		for e in self.edges:
-			if e.adjface[0] is None or e.adjface[1] is None :
-				print(str(e))
-				
-	def ShowNewEdges(self,msg=""):
-		print(msg,len(self.newedges))
-		for e in self.newedges:
-			print(str(e))
-				
-	def DoubleTriangle(self):
-		"""
-		DoubleTriangle builds the initial double triangle.  It first finds 3 
-		noncollinear points and makes two faces out of them, in opposite order.
-		It then finds a fourth point that is not coplanar with that face.  The  
-		vertices are stored in the face structure in counterclockwise order so 
-		that the volume between the face and the point is negative. Lastly, the
-		3 newfaces to the fourth point are constructed and the data structures
-		are cleaned up. 
-		"""
-
-		# Find 3 noncollinear points
-		v0 = 0
-		nv = len(self.vertices)
-		while(Vertex.Collinear(self.vertices[v0%nv],self.vertices[(v0+1)%nv],self.vertices[(v0+2)%nv])):
-			v0 = (v0+1)%nv
-			if v0 == 0:
-				raise Exception("DoubleTriangle:  All points are Collinear!")
-				
-		v1 = (v0+1)%nv
-		v2 = (v1+1)%nv
-	
-		# Mark the vertices as processed
-		self.vertices[v0].mark = PROCESSED
-		self.vertices[v1].mark = PROCESSED
-		self.vertices[v2].mark = PROCESSED
-
-		# Create the two "twin" faces
-		self.faces.append(Face(vertex=[self.vertices[v0],self.vertices[v1],self.vertices[v2]]))
-		f0=self.faces[-1]
-		self.edges.extend(f0.InitEdges())
-		self.faces.append(Face(vertex=[self.vertices[v2],self.vertices[v1],self.vertices[v0]]))
-		f1=self.faces[-1]
-		self.edges.extend(f1.InitEdges(f0))
-
-		# Link adjacent face fields.
-
-		f0.edge[0].adjface[1] = f1
-		f0.edge[1].adjface[1] = f1
-		f0.edge[2].adjface[1] = f1
-		f1.edge[0].adjface[1] = f0
-		f1.edge[1].adjface[1] = f0
-		f1.edge[2].adjface[1] = f0
-	
-		#Find a fourth, noncoplanar point to form tetrahedron
-		v3 = (v2+1)%nv
-		vol = self.VolumeSign( f0, self.vertices[v3] )
-		while vol == 0:
-			v3 = (v3+1)%nv
-			if v3==0:
-				raise Exception("DoubleTriangle:  All points are coplanar!")
-			vol = self.VolumeSign( f0, self.vertices[v3] )
-	
-		if debug: print(self.debug('initial'))
-			
-		return v3
-		
-	def ConstructHull(self,v):
-		"""
-		ConstructHull adds the vertices to the hull one at a time.  The hull
-		vertices are those in the list marked as onhull.
-		"""
-
-		# vertices is supposed to be a circular list that we traverse once, starting at v
-		# however, the call to CleanUp may delete vertices from this list
-		ev = v
-		while(True):
-			if not self.vertices[v].mark:
-				self.vertices[v].mark = PROCESSED;
-			self.AddOne(self.vertices[v]);
-			ev,v=self.CleanUp(ev,v) # cleanup may delete vertices!
-			if v == ev : break
-			
-	def AddOne(self,p):
-		"""
-		AddOne is passed a vertex.  It first determines all faces visible from 
-		that point.  If none are visible then the point is marked as not 
-		onhull.  Next is a loop over edges.  If both faces adjacent to an edge
-		are visible, then the edge is marked for deletion.  If just one of the
-		adjacent faces is visible then a new face is constructed.
-		"""
-		
-		vis = False
-
-		# Mark faces visible from p.
-		for f in self.faces:
-			vol = self.VolumeSign( f, p )
-			if vol < 0 : 
-				f.visible = VISIBLE
-				vis = True;                      
-
-		# If no faces are visible from p, then p is inside the hull
-		if not vis:
-			p.onhull = not ONHULL  
-			return False 
-
-		# Mark edges in interior of visible region for deletion.
-		# Erect a newface based on each border edge
-		self.newedges=[]
-		count=0
-		for e in self.edges:
-			if e.adjface[0].visible and	e.adjface[1].visible:
-				# e interior: mark for deletion
-				e.delete = REMOVED
-			elif e.adjface[0].visible or e.adjface[1].visible: 
-				# e border: make a new face
-				e.newface = self.MakeConeFace( e, p )
-				count+=1
-		self.edges.extend(self.newedges)
-		if debug : print(self.debug('addone'))
-		
-		return True
-
-	def MakeConeFace(self,e,p):
-		"""
-		MakeConeFace makes a new face and two new edges between the 
-		edge and the point that are passed to it. It returns a pointer to
-		the new face.
-		"""
-		
-		new_edge=[None,None]
-		dupc=0
-		# Make two new edges (if it doesn't already exist)
-		for i in (0,1):
-			# If the edge exists, copy it into new_edge
-			# Otherwise (duplicate is NULL), MakeNullEdge
-			d = e.endpts[i].duplicate
-			if d is None:
-				new_edge[i] = Edge(endpts=[e.endpts[i],p])
-				e.endpts[i].duplicate = new_edge[i]
-				self.newedges.append(new_edge[i])
-			else:
-				new_edge[i] = d
-				dupc += 1
-
-		# Make the new face
-		new_face = Face(edge=[e,new_edge[0],new_edge[1]])
-		self.faces.append(new_face)
-		new_face.MakeCcw( e, p )
-		
-		# Set the adjacent face pointers
-		count=0
-		for i in (0,1):
-			for j in (0,1):
-				# Only one None link should be set to new_face
-				if new_edge[i].adjface[j] is None:
-					new_edge[i].adjface[j] = new_face
-					count+=1
-					break
-		#print(new_face.fnum,count,dupc)
-		return new_face
-
-	def CleanUp(self,ev,v):
-		"""
-		CleanUp goes through each data structure list and clears all
-		flags and NULLs out some pointers.  The order of processing
-		(edges, faces, vertices) is important.
-		"""
-		de=self.CleanEdges()
-		if debug: print(self.debug('cleanedges '+" ".join(de)))
-		self.CleanFaces()
-		if debug: print(self.debug('cleanfaces'))
-		ev,v=self.CleanVertices(ev,v)
-		if debug: print(self.debug('cleanvertices'))
-		return ev,v
-		
-	def CleanEdges(self):
-		"""
-		CleanEdges runs through the edge list and cleans up the structure.
-		If there is a newface then it will put that face in place of the 
-		visible face and NULL out newface. It also deletes so marked edges.
-		"""
-		# Integrate the newface's into the data structure
-		for e in self.edges:
-			if e.newface:
-				if e.adjface[0].visible:
-					e.adjface[0] = e.newface
-					if e.newface is None: print("0 XXXXXXXXXXXXXXXXXXXX")
-				else:
-					e.adjface[1] = e.newface
-					if e.newface is None: print("1 XXXXXXXXXXXXXXXXXXXX")
-			e.newface = None
+def orientation3d(a, b, c, p):
+    """Return 1, 0, -1 if p is above, on, or below the plane of the triangle a, b, c.
+    
+    Above is the side that the normal of the counterclockwise triangle points to.
+    The sign is computed with floating point numbers when the result is clearly
+    larger than the rounding error and with exact fractions otherwise.
+    """
+    ux, uy, uz = b[0] - a[0], b[1] - a[1], b[2] - a[2]
+    vx, vy, vz = c[0] - a[0], c[1] - a[1], c[2] - a[2]
+    wx, wy, wz = p[0] - a[0], p[1] - a[1], p[2] - a[2]
+    det = wx * (uy * vz - uz * vy) + wy * (uz * vx - ux * vz) + wz * (ux * vy - uy * vx)
+    permanent = abs(wx) * (abs(uy * vz) + abs(uz * vy)) + \
+        abs(wy) * (abs(uz * vx) + abs(ux * vz)) + \
+        abs(wz) * (abs(ux * vy) + abs(uy * vx))
+    if abs(det) > 1e-15 * permanent:
+        return 1 if det > 0 else -1
+    
+    a, b, c, p = [[F(x) for x in pt] for pt in (a, b, c, p)]
+    ux, uy, uz = b[0] - a[0], b[1] - a[1], b[2] - a[2]
+    vx, vy, vz = c[0] - a[0], c[1] - a[1], c[2] - a[2]
+    wx, wy, wz = p[0] - a[0], p[1] - a[1], p[2] - a[2]
+    det = wx * (uy * vz - uz * vy) + wy * (uz * vx - ux * vz) + wz * (ux * vy - uy * vx)
+    return cmp(det, 0)
 
-		# Delete any edges marked for deletion. */
-		deleted_edges = [str(e.enum) for e in self.edges if e.delete ]
-		self.edges = [e for e in self.edges if not e.delete ]
-		return deleted_edges
-				
-	def CleanFaces(self):
-		"""
-		CleanFaces runs through the face list and deletes any face marked visible.
-		"""
 
-		self.faces = [f for f in self.faces if not f.visible ]
-		
-	def CleanVertices(self,evi,vi):
-		"""
-		CleanVertices runs through the vertex list and deletes the 
-		vertices that are marked as processed but are not incident to any 
-		undeleted edges. 
-		"""
-		#self.ShowNewEdges("cv in evi:"+str(evi)+" vi:"+str(vi))
+class HullFace:
+    """A counterclockwise triangle of the hull with the points that are outside of it."""
+    
+    def __init__(self, a, b, c, pts):
+        self.vertices = (a, b, c)
+        self.outside = []
+        self.alive = True
+        pa, pb, pc = pts[a], pts[b], pts[c]
+        ux, uy, uz = pb[0] - pa[0], pb[1] - pa[1], pb[2] - pa[2]
+        vx, vy, vz = pc[0] - pa[0], pc[1] - pa[1], pc[2] - pa[2]
+        self.normal = (uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx)
+    
+    def edges(self):
+        a, b, c = self.vertices
+        return ((a, b), (b, c), (c, a))
+    
+    def isVisible(self, p, pts, includeCoplanar = False):
+        a, b, c = self.vertices
+        orient = orientation3d(pts[a], pts[b], pts[c], pts[p])
+        return orient >= 0 if includeCoplanar else orient > 0
+    
+    def distance(self, p, pts):
+        """Unnormalized distance of the point to the plane of the face."""
+        pa, pt, n = pts[self.vertices[0]], pts[p], self.normal
+        return (pt[0] - pa[0]) * n[0] + (pt[1] - pa[1]) * n[1] + (pt[2] - pa[2]) * n[2]
 
-		# Mark all vertices incident to some undeleted edge as on the hull
-		for e in self.edges:
-			e.endpts[0].onhull = ONHULL
-			e.endpts[1].onhull = ONHULL
-		
-		# Delete all vertices that have been processed but are not on the hull
-		for i,v in enumerate(self.vertices):
-			if v.mark and not v.onhull:
-				del self.vertices[i]
-				if i<evi : evi -= 1
-				if i<vi : vi -= 1
-		vi = (vi+1)%len(self.vertices)
 
-		# Reset flags
-		for v in self.vertices:
-			v.duplicate = None
-			v.onhull = not ONHULL
-		
-		#self.ShowNewEdges("cv out evi:"+str(evi)+" vi:"+str(vi))
-		return evi,vi
+class QuickHull3d:
+    """Quickhull 3D convex hull with exact orientation tests.
+    
+    Args:
+        points: A list of (x, y, z) tuples.
+    
+    Properties:
+        points: The unique input points.
+        faces: A list of counterclockwise (i, j, k) index tuples into points
+            with the normals pointing outside of the hull.
+    """
+    
+    def __init__(self, points):
+        self.points = []
+        seen = set()
+        for pt in points:
+            pt = (float(pt[0]), float(pt[1]), float(pt[2]))
+            if pt not in seen:
+                seen.add(pt)
+                self.points.append(pt)
+        if len(self.points) < 4:
+            raise ValueError("At least 4 unique points are needed for a 3D convex hull.")
+        self.faces = []
+        self.edgeFace = {}  # directed edge -> the face that has the edge
+        self.constructHull()
+    
+    def initialSimplex(self):
+        """Find four points that are not coplanar."""
+        pts = self.points
+        count = range(len(pts))
+        i0 = min(count, key=lambda i: pts[i])
+        p0 = pts[i0]
+        i1 = max(count, key=lambda i: sum((pts[i][k] - p0[k]) ** 2 for k in range(3)))
+        p1 = pts[i1]
+        
+        def _crossLength(i):
+            u = [p1[k] - p0[k] for k in range(3)]
+            v = [pts[i][k] - p0[k] for k in range(3)]
+            return (u[1] * v[2] - u[2] * v[1]) ** 2 + (u[2] * v[0] - u[0] * v[2]) ** 2 + \
+                (u[0] * v[1] - u[1] * v[0]) ** 2
+        i2 = max(count, key=_crossLength)
+        if _crossLength(i2) == 0:
+            raise ValueError("All points are collinear!")
+        p2 = pts[i2]
+        
+        # the fourth point is the one farthest from the plane that is not exactly on it
+        face = HullFace(i0, i1, i2, pts)
+        candidates = sorted(count, key=lambda i: -abs(face.distance(i, pts)))
+        for i3 in candidates:
+            orient = orientation3d(p0, p1, p2, pts[i3])
+            if orient != 0:
+                break
+        else:
+            raise ValueError("All points are coplanar!")
+        if orient > 0:
+            i1, i2 = i2, i1
+        return i0, i1, i2, i3
+    
+    def addFace(self, a, b, c):
+        face = HullFace(a, b, c, self.points)
+        self.faces.append(face)
+        for edge in face.edges():
+            self.edgeFace[edge] = face
+        return face
+    
+    def assignPoints(self, candidates, faces):
+        """Put every point in the outside set of the first face that can see it."""
+        for p in candidates:
+            for face in faces:
+                if face.isVisible(p, self.points):
+                    face.outside.append(p)
+                    break
+    
+    def constructHull(self):
+        pts = self.points
+        a, b, c, d = self.initialSimplex()
+        # the fourth point is below the base triangle so every face points outwards
+        newFaces = [self.addFace(a, b, c), self.addFace(a, d, b),
+                    self.addFace(b, d, c), self.addFace(c, d, a)]
+        simplex = set((a, b, c, d))
+        self.assignPoints([i for i in range(len(pts)) if i not in simplex], newFaces)
+        
+        stack = [f for f in newFaces if f.outside]
+        while stack:
+            face = stack.pop()
+            if not face.alive or not face.outside:
+                continue
+            eye = max(face.outside, key=lambda p: face.distance(p, pts))
+            
+            # find the visible faces and the horizon around them
+            visible = [face]
+            face.alive = False
+            horizon = []
+            i = 0
+            while i < len(visible):
+                for edge in visible[i].edges():
+                    neighbor = self.edgeFace[(edge[1], edge[0])]
+                    if not neighbor.alive:
+                        continue
+                    if neighbor.isVisible(eye, pts, True):
+                        neighbor.alive = False
+                        visible.append(neighbor)
+                    else:
+                        horizon.append(edge)
+                i += 1
+            
+            orphans = []
+            for f in visible:
+                for edge in f.edges():
+                    if self.edgeFace.get(edge) is f:
+                        del self.edgeFace[edge]
+                orphans.extend(p for p in f.outside if p != eye)
+            newFaces = [self.addFace(e[0], e[1], eye) for e in horizon]
+            self.assignPoints(orphans, newFaces)
+            stack.extend(f for f in newFaces if f.outside)
+        
+        self.faces = [f.vertices for f in self.faces if f.alive]
 
-	def add_object(self):
-		verts = [v.v for v in self.vertices]
-		vertmap =  {v.vnum:i for i,v in enumerate(self.vertices)}
-		edges = []
-		faces = [ [vertmap[v.vnum] for v in f.vertex] for f in self.faces]
-		mesh = bpy.data.meshes.new(name='Convex Hull')
-		mesh.from_pydata(verts, edges, faces)
-		add_object_data(bpy.context, mesh, operator=None)
-		#f=open("file.stl","w")
-		#f.write(str(self))
-		#f.close()
 
 """ --------------------------3D CONVEX HULL CLASSES------------------------------"""
 
@@ -698,7 +363,7 @@ class SunCalculation:
         #self.sunset_t   =self.solarnoon_t+hourangle*4/1440
 
 class ConvexHull2d:
-    """Modifed from: http://tomswitzer.net/2009/12/jarvis-march/"""
+    """Andrew's monotone chain algorithm for 2D convex hulls."""
     def __init__(self):
         self.TURN_LEFT, self.TURN_RIGHT, self.TURN_NONE = (1, -1, 0)
  
@@ -706,80 +371,56 @@ class ConvexHull2d:
         """Returns -1, 0, 1 if p,q,r forms a right, straight, or left turn."""
         return cmp((q[0] - p[0])*(r[1] - p[1]) - (r[0] - p[0])*(q[1] - p[1]), 0)
  
-    def _dist(self,p,q):
-        """Returns the squared Euclidean distance between p and q."""
-        dx, dy = q[0] - p[0], q[1] - p[1]
-        return dx * dx + dy * dy
- 
-    def _next_hull_pt(self,points, p):
-        """Returns the next point on the convex hull in CCW from p."""
-        q = p
-        for r in points:
-            t = self.turn(p, q, r)
-            if t == self.TURN_RIGHT or \
-            t == self.TURN_NONE and \
-            self._dist(p, r) > self._dist(p, q):
-                q = r
-        return q
+    def _half_hull(self,points):
+        """Returns the points of the lower hull of points sorted along the x axis."""
+        hull = []
+        for p in points:
+            while len(hull) > 1 and self.turn(hull[-2], hull[-1], p) != self.TURN_LEFT:
+                hull.pop()
+            hull.append(p)
+        return hull
  
     def convex_hull(self,points):
         """Returns the points on the convex hull of points in CCW order."""
-        hull = [min(points)]
-        for p in hull:
-            q = self._next_hull_pt(points, p)
-            if q != hull[0]:
-                hull.append(q)
-        return hull
+        points = sorted(points, key=lambda p: (p[0], p[1]))
+        if len(points) < 3:
+            return points
+        lower = self._half_hull(points)
+        upper = self._half_hull(reversed(points))
+        return lower[:-1] + upper[:-1]
 
 class Curve2ConvexHull3d:
     def __init__(self):
         pass
         
     def convert_pts(self,pt):
-        rc_pt = map(lambda p: rs.coerce3dpoint(p),pt)
-        return map(lambda y: Vector(y[0],y[1],y[2]),rc_pt)
+        return map(lambda p: (p.X, p.Y, p.Z), pt)
 
     def get_brep(self,pts):
-        h = Hull(pts)
-        #print i,h
-        F = []
+        h = QuickHull3d(pts)
+        mesh = Rhino.Geometry.Mesh()
+        for p in h.points:
+            mesh.Vertices.Add(p[0], p[1], p[2])
         for f in h.faces:
-            ptlst = map(lambda i:rs.AddPoint(i.v.x,i.v.y,i.v.z), f.vertex)
-            F.append(rs.AddPlanarSrf(rs.AddCurve(ptlst+[ptlst[0]],1)))
-        brepfacelst = map(lambda c: rs.coercebrep(c),F)
-        brep = rs.JoinSurfaces(brepfacelst)
-        return brep
-
-    def call_convexhull(self,p,count):
-        ##print 'count:', count ##for testing
-        if count > 20:
-            return None
-        else:
-            #randomize pts
-            random.shuffle(p)
-            brep = self.get_brep(p)
-            if brep != None:
-                return brep
-            else:
-                # dare, dare again, always dare, 
-                # and France is saved!  G.Danton
-                return self.call_convexhull(p,count+1)
+            mesh.Faces.AddFace(f[0], f[1], f[2])
+        mesh.Compact() # remove the points that are inside of the hull
+        mesh.Normals.ComputeNormals()
+        return Rhino.Geometry.Brep.CreateFromMesh(mesh, True)
 
     def get_convexhull(self,lot):
         brep_lst = []
         pt_lst = []
-        rs.EnableRedraw(False)
         for T in lot:
             bound = rs.CurvePoints(T[0])[:-1]
             chull = rs.CurvePoints(T[1])[:-1]
-            Rhino.Geometry.Point3d.CullDuplicates(bound,TOL)
-            Rhino.Geometry.Point3d.CullDuplicates(chull,TOL)
-            pts = self.convert_pts(chull + bound)
-            brep = self.call_convexhull(pts,0)
-            if brep == None: 'brep=none -sv'
+            pts = Rhino.Geometry.Point3d.CullDuplicates(chull + bound, TOL)
+            try:
+                brep = self.get_brep(self.convert_pts(pts))
+            except ValueError as e:
+                print e
+                brep = None
             brep_lst.append(brep)
             pt_lst.append(bound+chull)
-        rs.EnableRedraw()
         return brep_lst,pt_lst
 
 class CleanBrep:
@@ -787,62 +428,14 @@ class CleanBrep:
         self.tol = tol
         self.L = L
     
-    def safeUnionMethod(self,solarFans):
-        """From Ladybug"""
-        res = []
-        x = solarFans[0]
-        for fanCount in range(len(solarFans[1:])):
-            if gh.GH_Document.IsEscapeKeyDown():
-                    print "terminated!"
-                    break
-            try:
-                rs.EnableRedraw(False)
-                #x = solarFans[fanCount]
-                y = solarFans[fanCount]
-                x.Faces.SplitKinkyFaces(rc.RhinoMath.DefaultAngleTolerance, False)
-                y.Faces.SplitKinkyFaces(rc.RhinoMath.DefaultAngleTolerance, False)
-                a = rc.Geometry.Brep.CreateBooleanUnion([x, y], sc.doc.ModelAbsoluteTolerance)
-                if a == None:
-                    a = [x,solarFans[fanCount]]
-                rs.EnableRedraw()
-            except:
-                a = [x,solarFans[fanCount]]
-        
-            if a:
-                res.extend(a)
-                x = y
-        return res
-    
-    def slowUnionMethod(self,solarFans):
-        fanlst = [solarFans.pop(0)]
-        rs.EnableRedraw(False)
-        for next_fan in solarFans:
-            if gh.GH_Document.IsEscapeKeyDown():
-                print "terminated!"
-                break
-            breplst = [fanlst[0],next_fan]
-            boolean_result = Rhino.Geometry.Brep.CreateBooleanUnion(breplst,TOL)
-            if boolean_result:
-                fanlst = boolean_result
-            else:
-                return -1
-            Rhino.RhinoApp.Wait()
-        rs.EnableRedraw()
-        return fanlst
-
     def unionFans(self): 
         if len(self.L) == 1: # convex
             #print 'no union' ## for testing
             return self.L
         else:
-            #print 'safeiunionmethod' ## for testing
-            fanlst = self.safeUnionMethod(self.L)
+            lb_preparation = sc.sticky["ladybug_Preparation"]()
+            fanlst = lb_preparation.booleanUnionBreps(self.L, self.tol, True)
         
-        if len(fanlst) > 1 and len(fanlst) < 10: # safeUnionMethod has failed
-            #print 'slowunionmethod' ## for testing
-            slowfanlst = self.slowUnionMethod(self.L)
-            if slowfanlst != -1:
-                fanlst = slowfanlst
         if len(fanlst) > 1: #final check
             error_union = \
             "Sorry your boundary geometry is too complicated for\n"\
@@ -1055,9 +648,11 @@ def main(north,_boundary,timeperiod,monthRange,location,height):
         b2ch = Curve2ConvexHull3d()
         breplst,ptlst = b2ch.get_convexhull(chull_lst)
     
-        L = map(lambda m: rs.coercebrep(m),breplst)
+        L = [brep for brep in breplst if brep is not None]
+        if len(L) == 0:
+            ghenv.Component.AddRuntimeMessage(ERROR_W, "Failed to create the convex hull of the solar fan.")
+            return -1
         CB = CleanBrep(TOL,L)
-        map(lambda id: sc.doc.Objects.Delete(id,True), breplst) #delete breplst
         return CB.cleanBrep()
         ##bcurve = boundary_lst ## for testing purposes
         ##top_curves = top_lst ## for testing purposes
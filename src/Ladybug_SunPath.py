@@ -222,6 +222,8 @@ def getHOYs(hours, days, months, timeStep, lb_preparation, method = 0):
             newHour = hours[-1] + step
     
     HOYS = []
+    # a set of the HOYs to keep the list unique in linear time
+    foundHOYs = set()
     
     for monthCount, m in enumerate(months):
         # just a single day
@@ -250,7 +252,9 @@ def getHOYs(hours, days, months, timeStep, lb_preparation, method = 0):
                 m  = lb_preparation.checkMonth(int(m))
                 d = lb_preparation.checkDay(int(d), m)
                 HOY = lb_preparation.date2Hour(m, d, h)
-                if HOY not in HOYS: HOYS.append(HOY)
+                if HOY not in foundHOYs:
+                    HOYS.append(HOY)
+                    foundHOYs.add(HOY)
     
     return HOYS
 
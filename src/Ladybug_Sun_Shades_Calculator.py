@@ -347,7 +347,7 @@ def getSrfPlane(brep):
     normalVector = brep.Faces[0].NormalAt(centerPtU, centerPtV)
     return rc.Geometry.Plane(cenPt, normalVector), cenPt
 
-def raysIntersection(rays, shade, cullRes):
+def cullTolerance(cullRes):
     if cullRes == 0:
         culFactor = 1 #0.1
         pass
@@ -368,34 +368,36 @@ def raysIntersection(rays, shade, cullRes):
     elif sc.doc.ModelAbsoluteTolerance * 1000 <=  50: tolFactor =  15   * culFactor   #0.01
     elif sc.doc.ModelAbsoluteTolerance * 1000 <= 500: tolFactor =   1.5 * culFactor   #0.1
     #print sc.doc.ModelAbsoluteTolerance * 1000, tolFactor
-    
+    return sc.doc.ModelAbsoluteTolerance * tolFactor # Rhino Tolerance is too low that no point are culled
+
+def raysIntersection(rays, shade, cullRes):
     points_on_ShdSrf = []
     for i, ray in enumerate(rays):
         # ShdSrf intersection
         int = rc.Geometry.Intersect.Intersection.RayShoot(ray, shade, 1)
         if int != None:
             points_on_ShdSrf.extend(int)
-    points = rc.Geometry.Point3d.CullDuplicates(points_on_ShdSrf, sc.doc.ModelAbsoluteTolerance * tolFactor) # Rhino Tolerance is too low that no point are culled
+    points = rc.Geometry.Point3d.CullDuplicates(points_on_ShdSrf, cullTolerance(cullRes))
 
     return points
 
-def fromPlaneToSrf(plane):
-    # This because rays method doesn't work with plane
-    rectangle = rc.Geometry.Rectangle3d(plane, 100, 100)
-    segments = rectangle.ToNurbsCurve().DuplicateSegments()
-    shadeSurface = rc.Geometry.Brep.CreateEdgeSurface(segments)
-    
-    # generate vector
-    cenPt = rc.Geometry.AreaMassProperties.Compute(shadeSurface).Centroid
-    linea_plane = rc.Geometry.Line(cenPt, plane.Origin)
-    vector_plane_scale = linea_plane.Direction
-    
-    # move it in the right place
-    shadeSurface.Translate(vector_plane_scale)
-    
-    return shadeSurface
-
-def calcIntersections(shadeSurface, pointsOnWindow, grPt, sunVectors, shdSrfShift, shdSrfAngle, window, context, uPoints, cullRes):
+def raysPlaneIntersection(pointsOnWindow, vectors, blocked, plane, cullRes, lb_preparation):
+    # the same as shooting the rays at a 100 x 100 surface centered on the plane but in closed form
+    halfSize = 50
+    parameters = lb_preparation.rayPlaneParameters(pointsOnWindow, vectors, plane)
+    points_on_ShdSrf = []
+    for i, point in enumerate(pointsOnWindow):
+        for j, vector in enumerate(vectors):
+            t = parameters[i][j]
+            if blocked[i][j] or t is None or t <= 0: continue
+            pt = point + vector * t
+            localVec = pt - plane.Origin
+            if abs(localVec * plane.XAxis) <= halfSize and abs(localVec * plane.YAxis) <= halfSize:
+                points_on_ShdSrf.append(pt)
+    if len(points_on_ShdSrf) == 0: return None
+    return rc.Geometry.Point3d.CullDuplicates(points_on_ShdSrf, cullTolerance(cullRes))
+
+def calcIntersections(shadeSurface, pointsOnWindow, grPt, sunVectors, shdSrfShift, shdSrfAngle, window, contextMesh, uPoints, cullRes, lb_preparation):
     ##################################################################### WINDOW
     # from Brep to surface
     surface_window = window.Surfaces[0]
@@ -451,42 +453,27 @@ def calcIntersections(shadeSurface, pointsOnWindow, grPt, sunVectors, shdSrfShif
         #    print 'here'
             
     ############################################################## INTERSECTIONS
-    # generate rays
-    sun_lines = []
-    sun_rays = []
-    length_vector = 50   ### Check for a better definition!!!
-    for point in pointsOnWindow:
-        for sunV in sunVectors:
-            if isSrfFacingTheVector(sunV, normalVector):
-                sun_lines.append(rc.Geometry.Line(point, -sunV * length_vector))
-                sun_rays.append(rc.Geometry.Ray3d(point, -sunV))
-    lines = sun_lines
+    # the rays go from the window back to the sun for the vectors in front of the window
+    vectors = [-sunV for sunV in sunVectors if isSrfFacingTheVector(sunV, normalVector)]
     
     # effect of the context
     ptsContext = []
-    contextVectors  = []
-    noContextVectors = []
-    if context:
-        rays = []
-        # intersection
-        for i, ray in enumerate(sun_rays):
-            intersection = rc.Geometry.Intersect.Intersection.RayShoot(ray, context, 1)
-            if intersection == None or len(intersection) == 0:
-                noContextVectors.append(sun_lines[i])
-                rays.append(sun_rays[i])
-            else:
-                contextVectors.append(sun_lines[i])
-                for p in intersection:
-                    ptsContext.append( p )
-        sun_rays = rays
+    blocked = [[False] * len(vectors) for point in pointsOnWindow]
+    if contextMesh:
+        contextHits = lb_preparation.raysMeshIntersection(pointsOnWindow, vectors, contextMesh, True)
+        for i, ptHits in enumerate(contextHits):
+            for j, hit in enumerate(ptHits):
+                if hit is not None:
+                    blocked[i][j] = True
+                    ptsContext.append(hit)
     
     # intersections
     if shadeSurface:
+        sun_rays = [rc.Geometry.Ray3d(point, vector) for i, point in enumerate(pointsOnWindow)
+                    for j, vector in enumerate(vectors) if not blocked[i][j]]
         tmp_cullPts = raysIntersection(sun_rays, [shadeSurface], cullRes)
     else:
-        shadeSurface = fromPlaneToSrf(plane)
-        ##@@cullPts = raysIntersection(sun_rays, [shadeSurface], cullRes)
-        tmp_cullPts = raysIntersection(sun_rays, [shadeSurface], cullRes)
+        tmp_cullPts = raysPlaneIntersection(pointsOnWindow, vectors, blocked, plane, cullRes, lb_preparation)
         
     ### Forcing the Upper left point on window to be part of the cullPoints
     cullPts = []
@@ -837,6 +824,24 @@ def calculatePergola(finalSrf, vectorP, normalVector, cenPt, numPergolaFins, fin
 
 ##def main():
 def main(_numPergolaFins_, _shdSrfShift_):
+    # import the classes
+    if sc.sticky.has_key('ladybug_release'):
+        try:
+            if not sc.sticky['ladybug_release'].isCompatible(ghenv.Component): return -1
+        except:
+            warning = "You need a newer version of Ladybug to use this compoent." + \
+            "Use updateLadybug component to update userObjects.\n" + \
+            "If you have already updated userObjects drag Ladybug_Ladybug component " + \
+            "into canvas and try again."
+            giveWarning(warning)
+            return -1
+        lb_preparation = sc.sticky["ladybug_Preparation"]()
+        lb_mesh = sc.sticky["ladybug_Mesh"]()
+    else:
+        print "You should first let Ladybug fly..."
+        giveWarning("You should first let Ladybug fly...")
+        return -1
+    
     # inputs
     window     = _window
     sunVectors = _sunVectors
@@ -861,6 +866,13 @@ def main(_numPergolaFins_, _shdSrfShift_):
     else:                                                 cullRes           = _cullRes_
     if cullRes < 0 or cullRes> 3: cullRes = 1
     
+    # join the context into one mesh so all of the rays use the same face tree
+    contextMesh = None
+    if context_:
+        contextMeshes, contextBreps = lb_preparation.cleanAndCoerceList(context_)
+        contextMeshedBreps = lb_preparation.flattenList(lb_mesh.parallel_makeContextMesh(contextBreps))
+        contextMesh = lb_mesh.joinMesh(contextMeshes + contextMeshedBreps)
+    
     # points
     pointsOnWindow, uPoints = pointsOfWindow(window, udiv, numOfShds)
 
@@ -871,7 +883,7 @@ def main(_numPergolaFins_, _shdSrfShift_):
     allptsContext = []
     for i in range(len(rowPoints)):    # List or pair of rows index points (Upoints) to be analysed later on
         # intersections
-        cullPts, ptsContext, normalVector, cenPt, vector_p = calcIntersections(shadeSurface_, rowPoints[i], groupPoints[i], sunVectors, shdSrfShift, shdSrfAngle, window, context_, uPoints, cullRes)
+        cullPts, ptsContext, normalVector, cenPt, vector_p = calcIntersections(shadeSurface_, rowPoints[i], groupPoints[i], sunVectors, shdSrfShift, shdSrfAngle, window, contextMesh, uPoints, cullRes, lb_preparation)
         
         allptsContext.extend(ptsContext)
         
@@ -26,6 +26,7 @@ This component uses Google Maps API to achieve elevation data and satellite imag
 -
 This component requires an internet connection and it runs for free up to 2,500 requests per day. Once you go over this limit the component doesn't work.
 Note that each surface is a request, for example if you use a surface made by sub-surfaces 6x6, this will be 36 requests.
+The elevations, the terrain grids and the images are cached in C:/USERNAME/AppData/Roaming/Ladybug/terrainCache so running the same terrain again does not make any request.
 For informations about the rules of use of Google Maps API, take a look at this link:
 https://developers.google.com/maps/pricing-and-plans/#details
 -
@@ -50,6 +51,8 @@ Provided by Ladybug 0.0.69
         The default value is 0.
         _numOfTiles_: Set the number of tiles (e.g. 4, that means 4x4). If no input is connected this will be 3 (tiles: 3x3).
         _numDivision_: Set the number of points for each tile. If no input is connected this will be 12 (grid: 13x13).
+        -
+        Large grids (e.g. 5 km at 10 m) are not requested point by point. At most 256 x 256 elevations are requested for the whole terrain and the terrain is resampled to the size of the grid with bilinear interpolation. The pointsGeo, pointsXY and pointsZ outputs are the requested points.
         _imgResolution_: Connect an integer number which manage the quality of single satellite image.
         -
         The following list shows the approximate level of detail you can expect to see at each _imgResolution_ level:
@@ -97,6 +100,7 @@ import scriptcontext as sc
 import socket
 import System
 import os
+import shutil
 import clr
 from math import pi, log, tan, atan, exp, sqrt
 
@@ -157,50 +161,43 @@ def divideSrf(srf, numDivision):
     return pts
 
 
-def terrainGen(pts, xf, run, name):
-    if len(pts) > 257:
-        warning = 'Your request is too big. The upper limit of _numDivision_ is 15.'
-        ghenv.Component.AddRuntimeMessage(gh.GH_RuntimeMessageLevel.Warning, warning)
-        return -1
-    
-    points = [xf * point for point in pts]
+def terrainGen(tilePts, xf, tileService, cellSize, rasterFile):
+    tilePoints = [[xf * point for point in pts] for pts in tilePts]
     
-    list_coordinate = [str(pt.Y) + ',' + str(pt.X) + "|" for pt in points]
-    flat_list_coordinate = ''.join(list_coordinate)
-    flat_list_coordinate = flat_list_coordinate[:len(flat_list_coordinate)-1]
-    url_part2 = flat_list_coordinate
-    
-    url_part1 = 'http://maps.googleapis.com/maps/api/elevation/json?locations='
-    goog_url = url_part1 + url_part2 + '&sensor=false'
-    
-    # Temporary file
-    # I should change this part here, the alternative way is to use urllib.request,
-    # but it doesn't exist in GH. However this method works and it is fast enough.
-    if len(pts) <= 257:
-        if run:
-            try:
-                client = System.Net.WebClient()
-                written_file = client.DownloadFile(goog_url, name)
-            except:
-                pass
+    # a terrain that has been made before is read from its raster and the elevations are not requested again
+    if os.path.isfile(rasterFile):
+        try:
+            raster = sc.sticky["ladybug_ElevationRaster"].load(rasterFile)
+            tileElevations = [[raster.elevationAt(pt.X, pt.Y) for pt in pts] for pts in tilePts]
+            return tilePoints, tileElevations, raster
+        except: pass
     
-    open_file = open(name, 'r')
-    txt = open_file.read()
-    lines = txt.split('\n')
+    # the elevations of all of the tiles are requested together and each point is only asked once
+    elevations = tileService.elevations([(pt.Y, pt.X) for points in tilePoints for pt in points])
+    if elevations == None: return -1
     
-    indices = [i for i, elem in enumerate(lines) if 'elevation' in elem]
-    open_file.close()
+    # the tiles share their edges so they make one grid
+    raster = sc.sticky["ladybug_ElevationRaster"].fromGridPoints([pt for pts in tilePts for pt in pts], elevations, cellSize)
+    try: raster.save(rasterFile)
+    except: pass
     
-    elevations = []
-    for index in indices:
-        basic_line = lines[index]
-        removed = basic_line.replace(",", "")
-        split_elevation = removed.split(' ')
-        num = split_elevation[-1]
-        num = float(num)
-        elevations.append(num)
+    tileElevations = []
+    for points in tilePoints:
+        tileElevations.append(elevations[:len(points)])
+        elevations = elevations[len(points):]
     
-    return points, elevations
+    return tilePoints, tileElevations, raster
+
+
+def fetchDivision(numOfTiles, numDivision, maxPoints = 256):
+    # the divisions of each tile that are requested so the whole grid has at most maxPoints x maxPoints elevations
+    return max(1, min(numDivision, (maxPoints - 1) // numOfTiles))
+
+
+def rasterPath(tileService, location, basePoint, radius, numOfTiles, numDivision):
+    # the raster of a terrain job is cached with the elevations
+    key = ','.join([tileService.elevationUrl] + [tileService.quantize(value) for value in (location.X, location.Y, basePoint.X, basePoint.Y, radius)] + [str(numOfTiles), str(numDivision)])
+    return tileService.cachePath('raster:' + key, '.raster')
 
 
 def centerPtsGeo(srf):
@@ -231,7 +228,7 @@ def latlontopixels(lat, lon, zoom, origin_shift, initial_resolution):
     return px, py
 
 
-def textureGen(run, center, points, origin_shift, initial_resolution, imgResolution, mapType):
+def textureGen(center, points, origin_shift, initial_resolution, imgResolution, mapType):
     list_latitude = [pt.Y for pt in points]
     list_longitude = [pt.X for pt in points]
     
@@ -253,12 +250,7 @@ def textureGen(run, center, points, origin_shift, initial_resolution, imgResolut
         ghenv.Component.AddRuntimeMessage(gh.GH_RuntimeMessageLevel.Warning, warning)
         return -1
     
-    urlPart1 = 'http://maps.googleapis.com/maps/api/staticmap?'
-    urlPart2 = "center={0},%20{1}&zoom={2}&size={3}x{4}&maptype={5}&sensor=false".format(str(center.Y), str(center.X), str(zoom), str(int(dx)), str(int(dy)), str(mapType))
-    
-    goog_url = urlPart1 + urlPart2
-    
-    return goog_url
+    return center.Y, center.X, zoom, int(dx), int(dy), mapType
 
 
 def createTiles(base_point, radius, numOfTiles):
@@ -285,16 +277,6 @@ def createTiles(base_point, radius, numOfTiles):
     return tiles
 
 
-def cullAndSortPoints(pts, elevations):
-    terrain_pts = [Rhino.Geometry.Point3d(pt.X/unitConversionFactor, pt.Y/unitConversionFactor, elevations[i]/unitConversionFactor) for i, pt in enumerate(pts)]
-    cull_pts = list(set(terrain_pts))
-    
-    cull_pts.sort(key = lambda pt: pt.X)
-    cull_pts.sort(key = lambda pt: pt.Y, reverse=True)
-    
-    return cull_pts
-
-
 def mdPath(folder):
     # make a folder for the images
     if folder != None:
@@ -324,29 +306,23 @@ def mdPath(folder):
     return directory
 
 
-def writeFile():
-    # Make sure that the file exists
+def cacheFolder():
+    # the elevations and the images of all of the terrain jobs are cached here
     appdata = os.getenv("APPDATA")
     try:
-        folder = os.path.join(appdata, "Ladybug")
-        name = os.path.join(folder, "elevation.txt")
-        
-        with open(name, "w") as f:
-            pass
+        folder = os.path.join(appdata, "Ladybug", "terrainCache")
+    except:
+        folder = os.path.join(appdata[:3], "Ladybug", "terrainCache")
+    
+    try:
+        if not os.path.isdir(folder): os.makedirs(folder)
     except:
-        folder = os.path.join(appdata[:3], "Ladybug")
-        name = os.path.join(folder, "elevation.txt")
-        
-        with open(name, "w") as f:
-            pass
-        
-    if not "elevation.txt" in os.listdir(folder):
         return -1
     
-    return name
+    return folder
 
 
-def main(name):
+def main(tileService):
     
     earth_radius = 6378137
     equator_circumference = 2 * pi * earth_radius
@@ -398,9 +374,7 @@ def main(name):
         path = GH_Path(0, i)
         tilesTree.Add(tile, path)
     
-    points_for_srf = []
-    elevations_for_srf = []
-    URLs = []
+    mapRequests = []
     imagePath = DataTree[System.Object]()
     
     # make a folder for the images
@@ -408,17 +382,30 @@ def main(name):
     
     if _runIt:
         pointsGeo, pointsZ, pointsXY, imagePath  = DataTree[System.Object](), DataTree[System.Object](), DataTree[System.Object](), DataTree[System.Object]()
+        # a large grid is requested at a lower resolution and resampled
+        requestDivision = fetchDivision(numOfTiles, numDivision)
+        tilePts = [divideSrf(tile, requestDivision) for tile in tilesCalculation]
+        cellSize = ((radius * 2) / numOfTiles) / requestDivision
+        rasterFile = rasterPath(tileService, location, basePoint, radius, numOfTiles, requestDivision)
+        result = terrainGen(tilePts, xf, tileService, cellSize, rasterFile)
+        if result == -1:
+            if checkInternetConnection(): warning = "Something went wrong during the request of elevations. Please, try again."
+            else: warning = "Please enable your internet connection."
+            ghenv.Component.AddRuntimeMessage(gh.GH_RuntimeMessageLevel.Warning, warning)
+            return -1
+        tilePoints, tileElevations, raster = result
+        if requestDivision < numDivision:
+            raster = raster.resample(((radius * 2) / numOfTiles) / numDivision)
+            print("The elevations are requested for {0} x {0} points and resampled to a grid of {1} x {1}.".format(numOfTiles * requestDivision + 1, raster.cols))
+        
         for i in range(len(tilesCalculation)):
-            points_srf = divideSrf(tilesCalculation[i], numDivision)
+            points_srf, points, elevations = tilePts[i], tilePoints[i], tileElevations[i]
             try:
-                points, elevations = terrainGen(points_srf, xf, _runIt, name)
                 ptCenter = centerPtsGeo(tilesCalculation[i])
                 pointGeo = xf * ptCenter
-                points_for_srf.extend(points_srf)
-                elevations_for_srf.extend(elevations)
                 
-                URL = textureGen(_runIt, pointGeo, points, origin_shift, initial_resolution, imgResolution, mapType)
-                URLs.append(URL)
+                mapRequest = textureGen(pointGeo, points, origin_shift, initial_resolution, imgResolution, mapType)
+                mapRequests.append(mapRequest)
                 
                 path = GH_Path(0, i)
                 pointsGeo.AddRange(points, path)
@@ -428,26 +415,27 @@ def main(name):
             except TypeError: return -1
             except: return -1
         
-        # make 3D points
-        cull_pts = cullAndSortPoints(points_for_srf, elevations_for_srf)
-        
-        num = (numDivision + 1) * numOfTiles - (numOfTiles - 1)
+        # one mesh or surface of the whole grid
+        scale = 1 / unitConversionFactor
         if type == 0:
-            lb_meshpreparation = sc.sticky["ladybug_Mesh"]()
-            terrain = lb_meshpreparation.meshFromPoints(num, num, cull_pts)
+            terrain = raster.toMeshData(scale).toRhinoMesh()
             origin = Rhino.Geometry.Intersect.Intersection.ProjectPointsToMeshes([terrain], [basePoint], Rhino.Geometry.Vector3d.ZAxis * factor, sc.doc.ModelAbsoluteTolerance)
         elif type == 1:
-            uDegree = min(3, num - 1)
-            vDegree = min(3, num - 1)
-            terrain = Rhino.Geometry.NurbsSurface.CreateThroughPoints(cull_pts, num, num, uDegree, vDegree, False, False)
+            terrainPts = [Rhino.Geometry.Point3d(*pt) for pt in raster.points(scale)]
+            uDegree = min(3, raster.rows - 1)
+            vDegree = min(3, raster.cols - 1)
+            terrain = Rhino.Geometry.NurbsSurface.CreateThroughPoints(terrainPts, raster.rows, raster.cols, uDegree, vDegree, False, False)
             origin = Rhino.Geometry.Intersect.Intersection.ProjectPointsToBreps([terrain.ToBrep()], [basePoint], Rhino.Geometry.Vector3d.ZAxis * factor, sc.doc.ModelAbsoluteTolerance)
         
         try:
-            for i, u in enumerate(URLs):
+            # all of the images are fetched together and copied from the cache
+            if -1 in mapRequests: raise ValueError
+            cachedImages = tileService.mapImages(mapRequests)
+            if None in cachedImages: raise IOError
+            for i, cachedImage in enumerate(cachedImages):
                 path = GH_Path(0, i)
                 name = directory + str(i) + "elevation.png"
-                client = System.Net.WebClient()
-                written_file = client.DownloadFile(u, name)
+                shutil.copyfile(cachedImage, name)
                 imagePath.Add(name, path)
         except:
             pass
@@ -494,21 +482,17 @@ else:
 
 check = checkInputs(_location)
 
-# write elevation.txt
-name = writeFile()
+# the cache of elevations and images
+folder = cacheFolder()
 
 if check and initCheck:
-    if checkInternetConnection():
-        unitConversionFactor = lb_preparation.checkUnits()
-        if name != -1:
-            result = main(name)
-            if result != -1:
-                pointsGeo, pointsZ, pointsXY, imagePath, terrain, tiles, origin, elevation = result
-        else:
-            warning = "Something went wrong with IO permission."
-            ghenv.Component.AddRuntimeMessage(gh.GH_RuntimeMessageLevel.Warning, warning)
+    unitConversionFactor = lb_preparation.checkUnits()
+    if folder != -1:
+        result = main(sc.sticky["ladybug_TileService"](folder))
+        if result != -1:
+            pointsGeo, pointsZ, pointsXY, imagePath, terrain, tiles, origin, elevation = result
     else:
-        warning = "Please enable your internet connection."
+        warning = "Something went wrong with IO permission."
         ghenv.Component.AddRuntimeMessage(gh.GH_RuntimeMessageLevel.Warning, warning)
 else:
     pass
@@ -0,0 +1,146 @@
+# Microbenchmark of Ladybug's DataCollection against the legacy data lists
+#
+# Ladybug: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Ladybug.
+#
+# Copyright (c) 2013-2020, Mostapha Sadeghipour Roudsari <mostapha@ladybug.tools>
+# Ladybug is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Ladybug is distributed in the hope that it will be useful,
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ladybug; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Time the hourly data lists that go between the components against DataCollection.
+This is not a component. Run it with Python 2.7 (or IronPython) from this folder:
+    python benchmark_dataCollection.py
+The Preparation and DataCollection classes are read from ladybug_ladybug.py next to
+this file so Rhino is not needed. The lists have 20 variables of 8760 hours.
+-
+Two cases are timed:
+    split: Splitting and float-parsing the legacy list the way every component does,
+        versus taking views of the collections that are read once.
+    select: Selecting a Mar-Jul period with the selectHourlyData of Ladybug 0.0.69
+        (the version before DataCollection), with Preparation.selectHourlyData and
+        with DataCollection.selectPeriod.
+"""
+
+from __future__ import division
+import __future__
+import ast
+import os
+import random
+import timeit
+
+
+# the parts of Preparation that work with the data lists
+preparationMembers = ('__init__', 'strToBeFound', 'separateList', 'readRunPeriod', 'date2Hour', 'selectHourlyData')
+
+def loadClasses():
+    """Read Preparation and DataCollection from ladybug_ladybug.py without its Rhino imports."""
+    corePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ladybug_ladybug.py')
+    with open(corePath, 'r') as coreFile: source = coreFile.read()
+
+    module = ast.parse(source)
+    module.body = [node for node in module.body if isinstance(node, ast.ClassDef) and node.name in ('Preparation', 'DataCollection')]
+    for node in module.body:
+        if node.name != 'Preparation': continue
+        # the other members use Rhino (some of them in their default arguments)
+        node.body = [member for member in node.body if \
+            (isinstance(member, ast.FunctionDef) and member.name in preparationMembers) or \
+            (isinstance(member, ast.Assign) and getattr(member.targets[0], 'id', None) in preparationMembers)]
+
+    namespace = {}
+    exec 'import array, bisect, math\nfrom itertools import chain, islice, izip' in namespace
+    exec compile(module, corePath, 'exec', __future__.division.compiler_flag) in namespace
+    return namespace['Preparation'], namespace['DataCollection']
+
+Preparation, DataCollection = loadClasses()
+
+
+def legacySelectHourlyData(lb_preparation, hourlyData, analysisPeriod):
+    """Preparation.selectHourlyData of Ladybug 0.0.69."""
+    indexList, listInfo = lb_preparation.separateList(hourlyData, lb_preparation.strToBeFound)
+    separatedLists = []
+    for i in range(len(indexList)-1):
+        selList = []
+        [selList.append(float(x)) for x in hourlyData[indexList[i]+7:indexList[i+1]]]
+        separatedLists.append(selList)
+
+    stMonth, stDay, stHour, endMonth, endDay, endHour = lb_preparation.readRunPeriod(analysisPeriod, False)
+    selHourlyData =[];
+    for l in range(len(separatedLists)):
+        [selHourlyData.append(item) for item in listInfo[l][:4]]
+        selHourlyData.append('Hourly')
+        selHourlyData.append((stMonth, stDay, stHour))
+        selHourlyData.append((endMonth, endDay, endHour))
+        stAnnualHour = lb_preparation.date2Hour(stMonth, stDay, stHour)
+        endAnnualHour = lb_preparation.date2Hour(endMonth, endDay, endHour)
+        if stAnnualHour < endAnnualHour:
+            for i, item in enumerate(separatedLists[l][stAnnualHour-1:endAnnualHour]):
+                if stHour-1 <= (i + stHour - 1)%24 <= endHour-1: selHourlyData.append(item)
+        else:
+            for i, item in enumerate(separatedLists[l][stAnnualHour-1:]):
+                if stHour-1 <= (i + stHour - 1)%24 <= endHour-1: selHourlyData.append(item)
+            for i, item in enumerate(separatedLists[l][:endAnnualHour]):
+                if stHour-1 <= i %24 <= endHour-1: selHourlyData.append(item)
+    return selHourlyData
+
+
+def legacySplit(lb_preparation, hourlyData):
+    """Split a legacy list and parse its values the way the components do."""
+    indexList, listInfo = lb_preparation.separateList(hourlyData, lb_preparation.strToBeFound)
+    return [[float(x) for x in hourlyData[indexList[i]+7:indexList[i+1]]] for i in range(len(indexList)-1)]
+
+
+def makeData(numOfVariables = 20, numOfHours = 8760):
+    random.seed(0)
+    hourlyData = []
+    for count in range(numOfVariables):
+        hourlyData.extend([DataCollection.strToBeFound, 'somewhere', 'variable ' + str(count), 'C', 'Hourly', (1, 1, 1), (12, 31, 24)])
+        hourlyData.extend([random.uniform(-10, 40) for hour in range(numOfHours)])
+    return hourlyData
+
+
+def bestTime(statement, repeat = 5, number = 3):
+    """The best time of one run of statement in milliseconds."""
+    return min(timeit.repeat(statement, repeat = repeat, number = number)) / number * 1000
+
+
+def main():
+    lb_preparation = Preparation()
+    # readRunPeriod uses the .NET string Replace to make its printout so it is kept off outside of IronPython
+    lb_preparation.readRunPeriod = lambda runningPeriod, p = True, full = True: Preparation.readRunPeriod(lb_preparation, runningPeriod, False, full)
+
+    hourlyData = makeData()
+    collections = DataCollection.fromLegacyList(hourlyData)
+    analysisPeriod = ((3, 1, 1), (7, 31, 24))
+
+    # the three ways of selecting the period should give the same list
+    legacySelection = legacySelectHourlyData(lb_preparation, hourlyData, analysisPeriod)
+    assert lb_preparation.selectHourlyData(hourlyData, analysisPeriod) == legacySelection
+    assert sum([c.selectPeriod(analysisPeriod).toLegacyList() for c in collections], []) == legacySelection
+
+    results = [
+        ('split: legacy list', bestTime(lambda: legacySplit(lb_preparation, hourlyData))),
+        ('split: DataCollection views', bestTime(lambda: [collection[:] for collection in collections])),
+        ('select: 0.0.69 selectHourlyData', bestTime(lambda: legacySelectHourlyData(lb_preparation, hourlyData, analysisPeriod))),
+        ('select: Preparation.selectHourlyData', bestTime(lambda: lb_preparation.selectHourlyData(hourlyData, analysisPeriod))),
+        ('select: DataCollection.selectPeriod', bestTime(lambda: [collection.selectPeriod(analysisPeriod) for collection in collections]))
+        ]
+
+    for name, ms in results: print '%-40s %10.3f ms' % (name, ms)
+
+
+if __name__ == '__main__':
+    main()
@@ -55,14 +55,20 @@ import scriptcontext as sc
 import Grasshopper
 import Grasshopper.Kernel as gh
 import math
+import bisect
+import array
 import shutil
 import sys
 import os
 import System.Threading.Tasks as tasks
 import System
 import time
-from itertools import chain
+from itertools import chain, islice, izip
+from collections import deque
+from System.Collections.Generic import List
 import datetime
+import hashlib
+import json
 
 try:
     System.Net.ServicePointManager.SecurityProtocol = System.Net.SecurityProtocolType.Tls12
@@ -327,6 +333,9 @@ class versionCheck(object):
 
 class Preparation(object):
     """ Set of functions to prepare the environment for running the studies"""
+    # HOYs of the periods that are already asked for
+    hoysCache = {}
+    
     def __init__(self):
         self.monthList = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
         self.numOfDays = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334, 365]
@@ -546,42 +555,14 @@ class Preparation(object):
                 except: return rc.Geometry.Point3d.Origin
     
     def selectHourlyData(self, hourlyData, analysisPeriod):
-        # separate data
-        indexList, listInfo = self.separateList(hourlyData, self.strToBeFound)
-    
-        #separate lists of lists
-        separatedLists = []
-        for i in range(len(indexList)-1):
-            selList = []
-            [selList.append(float(x)) for x in hourlyData[indexList[i]+7:indexList[i+1]]]
-            separatedLists.append(selList)
-    
         # read analysis period
         stMonth, stDay, stHour, endMonth, endDay, endHour = self.readRunPeriod(analysisPeriod)
         
+        # separate data and select the hours of each of the lists
         selHourlyData =[];
-        
-        for l in range(len(separatedLists)):
-            [selHourlyData.append(item) for item in listInfo[l][:4]]
-            selHourlyData.append('Hourly')
-            selHourlyData.append((stMonth, stDay, stHour))
-            selHourlyData.append((endMonth, endDay, endHour))
-            # select data
-            stAnnualHour = self.date2Hour(stMonth, stDay, stHour)
-            endAnnualHour = self.date2Hour(endMonth, endDay, endHour)
-            
-            # check it goes from the end of the year to the start of the year
-            if stAnnualHour < endAnnualHour:
-                for i, item in enumerate(separatedLists[l][stAnnualHour-1:endAnnualHour]):
-                    if stHour-1 <= (i + stHour - 1)%24 <= endHour-1: selHourlyData.append(item)
-                type = True
-            else:
-                for i, item in enumerate(separatedLists[l][stAnnualHour-1:]):
-                    if stHour-1 <= (i + stHour - 1)%24 <= endHour-1: selHourlyData.append(item)
-                
-                for i, item in enumerate(separatedLists[l][:endAnnualHour]):
-                    if stHour-1 <= i %24 <= endHour-1: selHourlyData.append(item)
-                type = False
+        for collection in DataCollection.fromLegacyList(hourlyData):
+            collection = DataCollection(collection.header, [float(x) for x in collection])
+            selHourlyData.extend(collection.selectPeriod(analysisPeriod).toLegacyList())
         
         return selHourlyData
     
@@ -594,7 +575,14 @@ class Preparation(object):
         
         if timeStep != 1: hours = rs.frange(hours[0], hours[-1] + 1 - 1/timeStep, 1/timeStep)
         
+        # the same periods are asked for again and again by the components
+        hoysKey = (tuple(hours), tuple(days), tuple(months), timeStep, method)
+        if hoysKey in self.hoysCache: return list(self.hoysCache[hoysKey])
+        
+        checkedHours = [self.checkHour(float(h)) for h in hours]
         HOYS = []
+        # a set of the HOYs to keep the list unique in linear time
+        foundHOYs = set()
         
         for monthCount, m in enumerate(months):
             # just a single day
@@ -617,15 +605,18 @@ class Preparation(object):
                     #rest of the months
                     days = range(1, numberOfDaysEachMonth[m-1] + 1)
             
+            checkedMonth  = self.checkMonth(int(m))
             for d in days:
-                for h in hours:
-                    h = self.checkHour(float(h))
-                    m  = self.checkMonth(int(m))
-                    d = self.checkDay(int(d), m)
-                    HOY = self.date2Hour(m, d, h)
-                    if HOY not in HOYS: HOYS.append(int(HOY))
+                startOfDay = self.date2Hour(checkedMonth, self.checkDay(int(d), checkedMonth), 0)
+                for h in checkedHours:
+                    HOY = startOfDay + h
+                    if HOY not in foundHOYs:
+                        HOYS.append(int(HOY))
+                        foundHOYs.add(int(HOY))
         
-        return HOYS
+        if len(self.hoysCache) >= 64: self.hoysCache.clear()
+        self.hoysCache[hoysKey] = HOYS
+        return list(HOYS)
     
     
     def getHOYsBasedOnPeriod(self, analysisPeriod, timeStep):
@@ -648,6 +639,242 @@ class Preparation(object):
     
     
     
+    def rollingWindow(self, values, window, wrap = True):
+        # values in front of the series that make the first windows complete
+        if wrap: return [values[(i - window + 1) % len(values)] for i in range(window - 1)] + list(values)
+        else: return list(values)
+    
+    def rollingSum(self, values, window, wrap = True):
+        """Sum of every hour and the window - 1 hours before it.
+        
+        The sums are differences of one cumulative sum so the cost does not
+        depend on the window size. The cumulative sum is taken of the deviations
+        from the first value to keep the round-off small.
+        
+        Args:
+            values: A list of numbers (e.g. 8760 hourly values).
+            window: Number of values in each sum.
+            wrap: Set to True to take the missing values of the first windows
+                from the end of the list (like an annual series that repeats).
+                Set to False to sum fewer values at the start of the list.
+        
+        Returns:
+            sums: A list of sums with the same length as values.
+        """
+        ref, deviationSums = self.rollingDeviationSums(values, window, wrap)
+        return [n * ref + deviationSum for deviationSum, n in deviationSums]
+    
+    def rollingMean(self, values, window, wrap = True):
+        """Mean of every hour and the window - 1 hours before it.
+        
+        Args:
+            values: A list of numbers (e.g. 8760 hourly values).
+            window: Number of values in each mean.
+            wrap: Set to True to take the missing values of the first windows
+                from the end of the list. Set to False to average fewer values
+                at the start of the list.
+        
+        Returns:
+            means: A list of means with the same length as values.
+        """
+        ref, deviationSums = self.rollingDeviationSums(values, window, wrap)
+        return [ref + deviationSum / n for deviationSum, n in deviationSums]
+    
+    def rollingDeviationSums(self, values, window, wrap = True):
+        # sums of the deviations from the first value and the number of values of every window
+        if len(values) == 0: return None, []
+        if window < 1: raise ValueError("window must be at least 1")
+        series = self.rollingWindow(values, window, wrap)
+        ref = series[0]
+        cumSum = [0]
+        for value in series: cumSum.append(cumSum[-1] + (value - ref))
+        
+        pad = len(series) - len(values)
+        deviationSums = []
+        for i in range(len(values)):
+            end = i + pad + 1
+            start = max(0, end - window)
+            deviationSums.append((cumSum[end] - cumSum[start], float(end - start)))
+        return ref, deviationSums
+    
+    def rollingMin(self, values, window, wrap = True):
+        """Minimum of every hour and the window - 1 hours before it.
+        
+        A queue of the candidate minimums is kept while the window moves so
+        every value is added and removed once.
+        
+        Args:
+            values: A list of numbers (e.g. 8760 hourly values).
+            window: Number of values in each window.
+            wrap: Set to True to take the missing values of the first windows
+                from the end of the list.
+        
+        Returns:
+            minimums: A list of minimums with the same length as values.
+        """
+        return self.rollingExtreme(values, window, wrap, lambda a, b: a <= b)
+    
+    def rollingMax(self, values, window, wrap = True):
+        """Maximum of every hour and the window - 1 hours before it.
+        
+        Args:
+            values: A list of numbers (e.g. 8760 hourly values).
+            window: Number of values in each window.
+            wrap: Set to True to take the missing values of the first windows
+                from the end of the list.
+        
+        Returns:
+            maximums: A list of maximums with the same length as values.
+        """
+        return self.rollingExtreme(values, window, wrap, lambda a, b: a >= b)
+    
+    def rollingWeightedSum(self, values, window, wrap = True):
+        """Sum of every hour and the window - 1 hours before it with weights that decrease linearly.
+        
+        The weight of the hour itself is window and the weight of the oldest
+        hour is 1. When the window moves one hour the weight of every hour in it
+        goes down by 1, so every sum is the previous sum minus the plain sum of
+        the previous window plus window times the new hour. The sums are taken
+        of the deviations from the first value and are summed again from the
+        values once every window hours so the round-off does not add up.
+        
+        Args:
+            values: A list of numbers (e.g. 8760 hourly values).
+            window: Number of values in each sum.
+            wrap: Set to True to take the missing values of the first windows
+                from the end of the list.
+        
+        Returns:
+            sums: A list of weighted sums with the same length as values.
+        """
+        if len(values) == 0: return []
+        if window < 1: raise ValueError("window must be at least 1")
+        series = self.rollingWindow(values, window, wrap)
+        ref = series[0]
+        deviations = [value - ref for value in series]
+        
+        pad = len(series) - len(values)
+        sums = []
+        windowSum = weightedSum = 0
+        for end in range(1, len(series) + 1):
+            start = max(0, end - window)
+            if end % window == 0:
+                windowSum = sum(deviations[start:end])
+                weightedSum = sum((k - end + 1 + window) * deviations[k] for k in range(start, end))
+            else:
+                # the deviations of the previous window lose one weight and the new one gets the weight of window
+                weightedSum += window * deviations[end - 1] - windowSum
+                windowSum += deviations[end - 1] - (deviations[end - 1 - window] if end > window else 0)
+            if end > pad:
+                n = end - start
+                sums.append((2 * window + 1 - n) * n / 2 * ref + weightedSum)
+        return sums
+    
+    def rollingExtreme(self, values, window, wrap, beats):
+        if len(values) == 0: return []
+        if window < 1: raise ValueError("window must be at least 1")
+        series = self.rollingWindow(values, window, wrap)
+        pad = len(series) - len(values)
+        # indices of the values that can still be the extreme of a window
+        candidates = deque()
+        extremes = []
+        for i, value in enumerate(series):
+            while candidates and beats(value, series[candidates[-1]]): candidates.pop()
+            candidates.append(i)
+            if candidates[0] <= i - window: candidates.popleft()
+            if i >= pad: extremes.append(series[candidates[0]])
+        return extremes
+    
+    def exponentialRunningMean(self, values, alpha, seedLength = 7):
+        """Exponentially weighted running mean of a series (e.g. of daily mean temperatures).
+        
+        The running mean of each value is (1 - alpha) * previous value + alpha *
+        previous running mean. The first running mean is the weighted mean of
+        the last seedLength values of the list (with weights 1, alpha, alpha^2...)
+        as if the series repeats.
+        
+        Args:
+            values: A list of numbers.
+            alpha: Weight of the previous running mean (between 0 and 1).
+            seedLength: Number of values at the end of the list that are used
+                for the first running mean.
+        
+        Returns:
+            runningMeans: A list of running means with the same length as values.
+        """
+        if len(values) == 0: return []
+        dividend = divisor = 0
+        for k in range(min(seedLength, len(values))):
+            dividend += math.pow(alpha, k) * values[-1 - k]
+            divisor += math.pow(alpha, k)
+        runningMeans = [dividend / divisor]
+        for value in values[:-1]:
+            runningMeans.append(((1 - alpha) * value) + alpha * runningMeans[-1])
+        return runningMeans
+    
+    
+    def groupReduce(self, streams, groupIds, groupCount, methods = ('mean',)):
+        """Reduce values over groups for any number of value streams.
+        
+        Every stream is walked once and all of the methods are found in the same
+        pass. Streams are lists of values with the same length as groupIds.
+        
+        Args:
+            streams: A list of lists of values.
+            groupIds: A list of the group id (0 to groupCount - 1) of each value.
+            groupCount: The number of groups.
+            methods: A list of 'sum', 'mean', 'min', 'max', 'count' or numbers
+                between 0 and 100 for percentiles.
+        
+        Returns:
+            reducedStreams: A list with a dictionary for each stream that has a
+                list of groupCount values for each method. Groups without values
+                are None (and 0 for 'count').
+        """
+        counts = [0] * groupCount
+        for groupId in groupIds: counts[groupId] += 1
+        percentiles = [method for method in methods if not isinstance(method, basestring)]
+        
+        reducedStreams = []
+        for values in streams:
+            sums = [0] * groupCount
+            mins = [None] * groupCount
+            maxs = [None] * groupCount
+            for groupId, value in izip(groupIds, values):
+                sums[groupId] += value
+                if mins[groupId] is None or value < mins[groupId]: mins[groupId] = value
+                if maxs[groupId] is None or value > maxs[groupId]: maxs[groupId] = value
+            
+            reduced = {}
+            for method in methods:
+                if method == 'sum': reduced[method] = [total if count else None for total, count in zip(sums, counts)]
+                elif method == 'mean': reduced[method] = [total / count if count else None for total, count in zip(sums, counts)]
+                elif method == 'min': reduced[method] = mins
+                elif method == 'max': reduced[method] = maxs
+                elif method == 'count': reduced[method] = list(counts)
+            
+            if percentiles:
+                groupValues = self.groupLists(values, groupIds, groupCount)
+                for groupList in groupValues: groupList.sort()
+                for percentile in percentiles:
+                    reduced[percentile] = [self.percentile(groupList, percentile) for groupList in groupValues]
+            reducedStreams.append(reduced)
+        return reducedStreams
+    
+    def groupLists(self, values, groupIds, groupCount):
+        # the values of each group in their original order
+        groupValues = [[] for group in range(groupCount)]
+        for groupId, value in izip(groupIds, values): groupValues[groupId].append(value)
+        return groupValues
+    
+    def percentile(self, sortedValues, percentile):
+        # linear interpolation between the closest ranks
+        if not sortedValues: return None
+        rank = (len(sortedValues) - 1) * percentile / 100.0
+        lower = int(math.floor(rank))
+        upper = min(lower + 1, len(sortedValues) - 1)
+        return sortedValues[lower] + (sortedValues[upper] - sortedValues[lower]) * (rank - lower)
+    
     def readLegendParameters(self, legendPar, getCenter = True):
         if legendPar == []: legendPar = [None] * 11
         if legendPar[0] == None: lowB = 'min'
@@ -749,6 +976,205 @@ class Preparation(object):
                     outputBrep.append(geo)
         return outputMesh, outputBrep
     
+    def booleanUnionBreps(self, breps, tolerance = None, parallel = False):
+        """Boolean union a list of breps in a balanced tree.
+        
+        The breps are united in pairs, then the results are united in pairs
+        and so on. This needs log2(n) rounds of operations on breps of similar
+        size instead of n - 1 operations on one growing brep and the pairs of
+        every round can be united in parallel. A pair that cannot be united
+        (e.g. two breps that do not touch) is not tried again and each of
+        them is paired with another brep in the next rounds, until no pair
+        of the breps that are left can be united.
+        
+        Args:
+            breps: A list of closed breps.
+            tolerance: Tolerance of the boolean operations. Default is the
+                document absolute tolerance.
+            parallel: Set to True to unite the pairs of each round in parallel.
+        
+        Returns:
+            unitedBreps: A list of breps. It has a single brep if all of the
+                breps could be united.
+        """
+        if tolerance is None: tolerance = sc.doc.ModelAbsoluteTolerance
+        
+        def unitePair(i):
+            x, y = unitedBreps[pairs[i][0]], unitedBreps[pairs[i][1]]
+            try:
+                x.Faces.SplitKinkyFaces(rc.RhinoMath.DefaultAngleTolerance, False)
+                y.Faces.SplitKinkyFaces(rc.RhinoMath.DefaultAngleTolerance, False)
+                result = rc.Geometry.Brep.CreateBooleanUnion([x, y], tolerance)
+            except:
+                result = None
+            if result and len(result) == 1: united[i] = result[0]
+        
+        # the pairs that could not be united. the breps are kept in the values so their ids are not reused
+        failedPairs = {}
+        unitedBreps = list(breps)
+        while len(unitedBreps) > 1:
+            # pair every brep with the next brep that it has not been tried with
+            pairs, paired = [], set()
+            for i in range(len(unitedBreps)):
+                if i in paired: continue
+                for j in range(i + 1, len(unitedBreps)):
+                    if j not in paired and (id(unitedBreps[i]), id(unitedBreps[j])) not in failedPairs:
+                        pairs.append((i, j))
+                        paired.update((i, j))
+                        break
+            if len(pairs) == 0: break
+            
+            united = [None] * len(pairs)
+            if parallel:
+                tasks.Parallel.ForEach(xrange(len(pairs)), unitePair)
+            else:
+                for i in range(len(pairs)):
+                    unitePair(i)
+            
+            nextRound = [brep for i, brep in enumerate(unitedBreps) if i not in paired]
+            for (i, j), result in izip(pairs, united):
+                x, y = unitedBreps[i], unitedBreps[j]
+                if result is None:
+                    failedPairs[(id(x), id(y))] = failedPairs[(id(y), id(x))] = (x, y)
+                    nextRound.extend((x, y))
+                else:
+                    nextRound.append(result)
+            unitedBreps = nextRound
+        
+        return unitedBreps
+    
+    def booleanIntersectBreps(self, breps, tolerance = None, parallel = False):
+        """Boolean intersect a list of breps in a balanced tree.
+        
+        The breps are intersected in pairs, then the results are intersected
+        in pairs and so on. The intersection of two breps can have several
+        pieces so each result is kept as a list of pieces and two results are
+        intersected piece by piece.
+        
+        Args:
+            breps: A list of closed breps.
+            tolerance: Tolerance of the boolean operations. Default is the
+                document absolute tolerance.
+            parallel: Set to True to intersect the pairs of each round in parallel.
+        
+        Returns:
+            pieces: A list of the breps of the intersection of all of the breps.
+                It is empty if the breps do not have a common volume and it
+                is None if a boolean intersection failed.
+        """
+        if tolerance is None: tolerance = sc.doc.ModelAbsoluteTolerance
+        
+        def intersectPair(i):
+            pieces = []
+            try:
+                for x in results[2 * i]:
+                    for y in results[2 * i + 1]:
+                        result = rc.Geometry.Brep.CreateBooleanIntersection(x, y, tolerance)
+                        if result is None: return
+                        pieces.extend(result)
+            except:
+                return
+            intersected[i] = pieces
+        
+        results = [[brep] for brep in breps]
+        while len(results) > 1:
+            intersected = [None] * (len(results) // 2)
+            if parallel:
+                tasks.Parallel.ForEach(xrange(len(intersected)), intersectPair)
+            else:
+                for i in range(len(intersected)):
+                    intersectPair(i)
+            
+            if None in intersected: return None
+            if [] in intersected: return []
+            if len(results) % 2 == 1: intersected.append(results[-1])
+            results = intersected
+        
+        return results[0] if results else []
+    
+    def rayPlaneParameters(self, points, vectors, plane):
+        """Find where the rays from every point along every vector hit a plane.
+        
+        The hit point of a point p and a vector v is p + t * v. All of the dot
+        products that only depend on the plane and the vectors are calculated
+        once so each ray only costs one dot product and a division.
+        
+        Args:
+            points: A list of Point3d.
+            vectors: A list of Vector3d.
+            plane: The plane that the rays are projected to.
+        
+        Returns:
+            parameters: A list with a list of t values for each point. t is None
+                if the vector is parallel to the plane.
+        """
+        n = plane.Normal
+        planeDist = n.X * plane.OriginX + n.Y * plane.OriginY + n.Z * plane.OriginZ
+        vecDots = []
+        for v in vectors:
+            vecDot = n.X * v.X + n.Y * v.Y + n.Z * v.Z
+            if abs(vecDot) < 1e-12: vecDots.append(None)
+            else: vecDots.append(vecDot)
+        
+        parameters = []
+        for pt in points:
+            ptDist = planeDist - (n.X * pt.X + n.Y * pt.Y + n.Z * pt.Z)
+            parameters.append([ptDist / vecDot if vecDot is not None else None for vecDot in vecDots])
+        return parameters
+    
+    def raysMeshIntersection(self, points, vectors, mesh, parallel = False):
+        """Shoot rays from every point along every vector and find the first hit with a mesh.
+        
+        Rays that cannot reach the bounding box of the mesh are culled before
+        calling Rhino's ray intersection which uses the face tree of the mesh.
+        Join all of the geometry into a single mesh to use one tree for all
+        of the rays.
+        
+        Args:
+            points: A list of Point3d.
+            vectors: A list of Vector3d.
+            mesh: The mesh to test the rays against.
+            parallel: Set to True to shoot the rays of different points in parallel.
+        
+        Returns:
+            hitPoints: A list with a list of hit points for each point. The hit
+                point is None if the ray misses the mesh.
+        """
+        bb = mesh.GetBoundingBox(False)
+        bbMin, bbMax = (bb.Min.X, bb.Min.Y, bb.Min.Z), (bb.Max.X, bb.Max.Y, bb.Max.Z)
+        
+        def hitsBoundingBox(pt, v):
+            tNear, tFar = 0, float('inf')
+            for p, d, lo, hi in zip((pt.X, pt.Y, pt.Z), (v.X, v.Y, v.Z), bbMin, bbMax):
+                if abs(d) < 1e-12:
+                    if p < lo or p > hi: return False
+                    continue
+                t1, t2 = (lo - p) / d, (hi - p) / d
+                if t1 > t2: t1, t2 = t2, t1
+                tNear, tFar = max(tNear, t1), min(tFar, t2)
+                if tNear > tFar: return False
+            return True
+        
+        def shootRays(i):
+            pt = points[i]
+            ptHits = []
+            for v in vectors:
+                hit = None
+                if hitsBoundingBox(pt, v):
+                    ray = rc.Geometry.Ray3d(pt, v)
+                    t = rc.Geometry.Intersect.Intersection.MeshRay(mesh, ray)
+                    if t >= 0: hit = ray.PointAt(t)
+                ptHits.append(hit)
+            hitPoints[i] = ptHits
+        
+        hitPoints = [None] * len(points)
+        if parallel:
+            tasks.Parallel.ForEach(xrange(len(points)), shootRays)
+        else:
+            for i in range(len(points)):
+                shootRays(i)
+        return hitPoints
+    
     def flattenList(self, l):
         return list(chain.from_iterable(l))
     
@@ -1478,6 +1904,265 @@ class Preparation(object):
     def fahrenheitToCelsius(self, F):
         return (5/9)*(F-32)
 
+class DataCollection(object):
+    """A series of data with its Ladybug header kept as metadata.
+    
+    The header is the 7 items that Ladybug puts in front of the values of the
+    lists that go between the components (key, location, data type, units,
+    frequency, start and end). The values are kept in one buffer. Collections
+    that are taken from a continuous part of another collection (with a slice
+    or selectPeriod) share its buffer so the values are not copied.
+    
+    Args:
+        header: A list of the 7 header items.
+        values: A list of values. Floats are kept in an array and other values
+            are kept as they are so the collection converts back to the same list.
+    """
+    strToBeFound = 'key:location/dataType/units/frequency/startsAt/endsAt'
+    
+    def __init__(self, header, values):
+        self.header = list(header)
+        if all(type(value) is float for value in values): self.buffer = array.array('d', values)
+        else: self.buffer = list(values)
+        self.start, self.stop = 0, len(self.buffer)
+    
+    @classmethod
+    def fromLegacyList(cls, legacyList):
+        """Read the collections of a list with one or more headers and their values.
+        
+        Args:
+            legacyList: A list of data like the outputs of the Import EPW component.
+        
+        Returns:
+            collections: A list of DataCollections. A list without a header
+                makes one collection with a placeholder header.
+        """
+        keyIndices = [count for count, item in enumerate(legacyList) if item == cls.strToBeFound]
+        if len(keyIndices) == 0:
+            return [cls([cls.strToBeFound, 'somewhere','someData', 'someUnits', 'someTimeStep',(1, 1, 1),(12, 31, 24)], legacyList)]
+        
+        keyIndices.append(len(legacyList))
+        return [cls(legacyList[st:st + 7], legacyList[st + 7:end]) for st, end in zip(keyIndices[:-1], keyIndices[1:])]
+    
+    def toLegacyList(self):
+        """The header and the values as one list."""
+        return self.header + list(self)
+    
+    @property
+    def location(self): return self.header[1]
+    
+    @property
+    def dataType(self): return self.header[2]
+    
+    @property
+    def units(self): return self.header[3]
+    
+    @property
+    def frequency(self): return self.header[4]
+    
+    @property
+    def values(self): return list(self)
+    
+    def __len__(self):
+        return self.stop - self.start
+    
+    def __iter__(self):
+        return islice(self.buffer, self.start, self.stop)
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            st, end, step = key.indices(len(self))
+            if step == 1: return self.getSlice(st, max(st, end))
+            return DataCollection(self.header, list(self)[key])
+        if key < 0: key += len(self)
+        if not 0 <= key < len(self): raise IndexError("DataCollection index out of range")
+        return self.buffer[self.start + key]
+    
+    def getSlice(self, start, stop, header = None):
+        """A collection of a part of the values that shares the buffer of this collection.
+        
+        Args:
+            start: Index of the first value.
+            stop: Index after the last value.
+            header: An optional header for the new collection. Default is the
+                header of this collection.
+        """
+        collection = DataCollection(header or self.header, [])
+        collection.buffer, collection.start, collection.stop = self.buffer, self.start + start, self.start + stop
+        return collection
+    
+    def selectPeriod(self, analysisPeriod):
+        """Select the hours of an analysis period from an annual hourly collection.
+        
+        The hours are the same as the ones of Preparation.selectHourlyData. A
+        period that is not split by the hours of the day or the end of the year
+        shares the buffer of this collection.
+        
+        Args:
+            analysisPeriod: The analysis period as ((month, day, hour), (month, day, hour)).
+        
+        Returns:
+            selectedData: A DataCollection.
+        """
+        lb_preparation = Preparation()
+        stMonth, stDay, stHour, endMonth, endDay, endHour = lb_preparation.readRunPeriod(analysisPeriod, False)
+        header = self.header[:4] + ['Hourly', (stMonth, stDay, stHour), (endMonth, endDay, endHour)]
+        stAnnualHour = lb_preparation.date2Hour(stMonth, stDay, stHour)
+        endAnnualHour = lb_preparation.date2Hour(endMonth, endDay, endHour)
+        
+        # check it goes from the end of the year to the start of the year
+        if stAnnualHour < endAnnualHour:
+            if stHour == 1 and endHour == 24: return self.getSlice(stAnnualHour-1, endAnnualHour, header)
+            selValues = [item for i, item in enumerate(self[stAnnualHour-1:endAnnualHour]) if stHour-1 <= (i + stHour - 1)%24 <= endHour-1]
+        else:
+            selValues = [item for i, item in enumerate(self[stAnnualHour-1:]) if stHour-1 <= (i + stHour - 1)%24 <= endHour-1]
+            selValues.extend([item for i, item in enumerate(self[:endAnnualHour]) if stHour-1 <= i %24 <= endHour-1])
+        return DataCollection(header, selValues)
+
+
+class DegreeDays(object):
+    """Heating and cooling degree-days and degree-hours of hourly temperatures.
+    
+    The temperatures of every day are sorted once together with their cumulative
+    sums. The degree-hours of a day for any base temperature are then found with
+    one bisection instead of a loop over the hours, so many base temperatures
+    (or many weather files) can be evaluated from the same temperatures.
+    
+    Args:
+        hourlyTemperature: A list of hourly temperatures without the header.
+            Every 24 values are one day. 8784 values (e.g. the epw file of a
+            leap year) are 366 days with Feb 29.
+    """
+    def __init__(self, hourlyTemperature):
+        self.dailyMin, self.dailyMax, self.dailyMean = [], [], []
+        self.sortedDays, self.sortedSums = [], []
+        for day in range(int(len(hourlyTemperature)/24)):
+            dayHourlyTemp = [float(x) for x in hourlyTemperature[(day * 24):((day+1)*24)]]
+            sortedTemp = sorted(dayHourlyTemp)
+            cumSum = [0]
+            for temp in sortedTemp: cumSum.append(cumSum[-1] + temp)
+            self.sortedDays.append(sortedTemp)
+            self.sortedSums.append(cumSum)
+            self.dailyMin.append(sortedTemp[0])
+            self.dailyMax.append(sortedTemp[-1])
+            self.dailyMean.append(sum(dayHourlyTemp)/len(dayHourlyTemp))
+    
+    @classmethod
+    def fromEpw(cls, epwFile):
+        """Read the dry bulb temperature of an epw file.
+        
+        Returns:
+            locName: The name of the location in the epw file.
+            degreeDays: A DegreeDays of the dry bulb temperature.
+        """
+        with open(epwFile, "r") as epwfile:
+            headline = epwfile.readline().split(',')
+            locName = '_'.join([item for item in headline[1:4] if item != '-'])
+            for lineCount in range(7): epwfile.readline()
+            temperatures = [float(line.split(',')[6]) for line in epwfile if line.strip()]
+        return locName, cls(temperatures)
+    
+    def dailyDegreeDays(self, coolingBase, heatingBase, useDailyAvrMethod = False):
+        """Cooling and heating degree-days of every day.
+        
+        By default the degree-days are found from the minimum and maximum
+        temperature of each day (http://www.vesma.com/ddd/ddcalcs.htm).
+        
+        Args:
+            coolingBase: Base temperature for cooling.
+            heatingBase: Base temperature for heating.
+            useDailyAvrMethod: Set to True to use the difference between the base
+                temperature and the average temperature of each day.
+        
+        Returns:
+            coolingDegDays: A list of cooling degree-days for each day.
+            heatingDegDays: A list of heating degree-days for each day.
+        """
+        coolingDegDays, heatingDegDays = [], []
+        if useDailyAvrMethod:
+            for dayAvrTemp in self.dailyMean:
+                heatingDegDays.append(heatingBase - dayAvrTemp if dayAvrTemp < heatingBase else 0)
+                coolingDegDays.append(dayAvrTemp - coolingBase if coolingBase < dayAvrTemp else 0)
+            return coolingDegDays, heatingDegDays
+        
+        for minT, maxT in zip(self.dailyMin, self.dailyMax):
+            # heating degree days
+            if minT > heatingBase: heatingDegDays.append(0)
+            elif (maxT + minT)/2 > heatingBase: heatingDegDays.append((heatingBase-minT)/4)
+            elif maxT >= heatingBase: heatingDegDays.append((heatingBase-minT)/2-(maxT-heatingBase)/4)
+            else: heatingDegDays.append(heatingBase-(maxT+minT)/2)
+            
+            # cooling degree days
+            if maxT < coolingBase: coolingDegDays.append(0)
+            elif (maxT + minT)/2 < coolingBase: coolingDegDays.append((maxT-coolingBase)/4)
+            elif minT <= coolingBase: coolingDegDays.append((maxT-coolingBase)/2 - (coolingBase-minT)/4)
+            else: coolingDegDays.append((maxT + minT)/2 - coolingBase)
+        return coolingDegDays, heatingDegDays
+    
+    def dailyDegreeHours(self, coolingBase, heatingBase):
+        """Cooling and heating degree-hours summed for every day.
+        
+        Returns:
+            coolingDegHours: A list of cooling degree-hours for each day.
+            heatingDegHours: A list of heating degree-hours for each day.
+        """
+        coolingDegHours, heatingDegHours = [], []
+        for sortedTemp, cumSum in zip(self.sortedDays, self.sortedSums):
+            # hours up to count are colder than the base temperature
+            count = bisect.bisect_left(sortedTemp, heatingBase)
+            heatingDegHours.append(count * heatingBase - cumSum[count])
+            count = bisect.bisect_right(sortedTemp, coolingBase)
+            coolingDegHours.append((cumSum[-1] - cumSum[count]) - (len(sortedTemp) - count) * coolingBase)
+        return coolingDegHours, heatingDegHours
+    
+    @staticmethod
+    def monthlySums(dailyValues):
+        """Sum daily values for each month of the year.
+        
+        366 daily values are a leap year and Feb 29 is summed with February.
+        """
+        numOfDays = Preparation().numOfDays
+        if len(dailyValues) == 366: numOfDays = numOfDays[:2] + [days + 1 for days in numOfDays[2:]]
+        return [sum(dailyValues[numOfDays[month]:numOfDays[month + 1]]) for month in range(len(numOfDays) - 1)]
+    
+    def tableRows(self, location, baseTemperatures):
+        """Monthly and annual CDD, HDD, CDH and HDH for a list of base temperatures.
+        
+        Returns:
+            rows: A list of [location, base temperature, metric, period, value] rows.
+        """
+        monthList = Preparation().monthList
+        rows = []
+        for base in baseTemperatures:
+            coolingDegDays, heatingDegDays = self.dailyDegreeDays(base, base)
+            coolingDegHours, heatingDegHours = self.dailyDegreeHours(base, base)
+            for metric, dailyValues in (('CDD', coolingDegDays), ('HDD', heatingDegDays), ('CDH', coolingDegHours), ('HDH', heatingDegHours)):
+                monthlyValues = self.monthlySums(dailyValues)
+                rows.extend([[location, base, metric, month, value] for month, value in zip(monthList, monthlyValues)])
+                rows.append([location, base, metric, 'Annual', sum(monthlyValues)])
+        return rows
+    
+    @classmethod
+    def writeTable(cls, epwFiles, baseTemperatures, filePath):
+        """Write the degree-days and degree-hours of many epw files to one csv file.
+        
+        Args:
+            epwFiles: A list of epw file paths.
+            baseTemperatures: A list of base temperatures.
+            filePath: Path of the csv file.
+        
+        Returns:
+            filePath: Path of the csv file.
+        """
+        with open(filePath, "w") as tableFile:
+            tableFile.write("location,baseTemperature,metric,period,value\n")
+            for epwFile in epwFiles:
+                locName, degreeDays = cls.fromEpw(epwFile)
+                for row in degreeDays.tableRows(locName.replace(',', ' '), baseTemperatures):
+                    tableFile.write(','.join([str(item) for item in row]) + "\n")
+        return filePath
+
+
 class Sunpath(object):
     """
     The sun-path Class is a Python version of RADIANCE sun-path script by Greg Ward. RADIANCE source code can be accessed at:
@@ -2005,6 +2690,448 @@ class Sky:
         
         return self.colorAvg
 
+class MeshData(object):
+    """A mesh as plain lists of vertices, faces and vertex colors.
+    
+    The lists can be assembled and colored without Rhino (e.g. in a headless
+    run) and are handed to Rhino with a few bulk calls in toRhinoMesh instead
+    of adding the vertices, faces and colors one by one.
+    
+    Args:
+        vertices: A list of points as (x, y, z) tuples or Point3d.
+        faces: A list of faces as tuples of 3 or 4 vertex indices.
+        colors: An optional list of vertex colors as System.Drawing.Color or
+            ARGB integers (e.g. from ResultVisualization.gradientColorArgb).
+    """
+    def __init__(self, vertices = None, faces = None, colors = None):
+        self.vertices = list(vertices) if vertices else []
+        self.faces = list(faces) if faces else []
+        self.colors = list(colors) if colors else []
+    
+    def addGridFaces(self, u, v):
+        # quad faces of a grid of u rows of v vertices
+        for i in xrange(1,u):
+            for k in xrange(1,v):
+                self.faces.append((k-1+(i-1)*v, k-1+i*v, k-1+i*v+1, k-1+(i-1)*v+1))
+    
+    def colorFaces(self, faceColors):
+        """Give every face its own vertices and color them with the color of the face.
+        
+        Args:
+            faceColors: A list of colors with one color for each face.
+        
+        Returns:
+            coloredMesh: A new MeshData.
+        """
+        vertices, faces, colors = [], [], []
+        for face, color in zip(self.faces, faceColors):
+            k = len(vertices)
+            vertices.extend([self.vertices[i] for i in face])
+            faces.append(tuple(range(k, k + len(face))))
+            colors.extend([color] * len(face))
+        return MeshData(vertices, faces, colors)
+    
+    def toRhinoMesh(self):
+        mesh = rc.Geometry.Mesh()
+        if self.vertices:
+            if isinstance(self.vertices[0], rc.Geometry.Point3d): vertices = self.vertices
+            elif isinstance(self.vertices[0], (tuple, list)): vertices = [rc.Geometry.Point3d(*pt) for pt in self.vertices]
+            else: vertices = [rc.Geometry.Point3d(pt) for pt in self.vertices]
+            mesh.Vertices.AddVertices(List[rc.Geometry.Point3d](vertices))
+        if self.faces:
+            mesh.Faces.AddFaces(List[rc.Geometry.MeshFace]([rc.Geometry.MeshFace(*face) for face in self.faces]))
+        if self.colors:
+            if isinstance(self.colors[0], int): colors = [System.Drawing.Color.FromArgb(argb) for argb in self.colors]
+            else: colors = self.colors
+            mesh.VertexColors.SetColors(System.Array[System.Drawing.Color](colors))
+        return mesh
+
+
+class MeshTopology(object):
+    """The topology of a Rhino mesh that is needed to move its vertices by the values of its faces.
+    
+    Meshes with the same geometry have the same topology so the results of
+    new values on the same mesh only need the averages and offsets below.
+    
+    Args:
+        mesh: A Rhino mesh. Its normals are computed if it does not have them.
+    
+    Properties:
+        faceVertices: A list with the topology vertex indices of every face.
+        vertexFaceStart: Start of the faces of every topology vertex in
+            vertexFaceIds (plus the length of vertexFaceIds at the end).
+        vertexFaceIds: The faces around all of the topology vertices in one list.
+        vertexMeshIds: A list with the mesh vertex indices of every topology vertex.
+        vertexPoints: A Point3d for every topology vertex.
+        vertexNormals: The unitized sum of the mesh normals of every topology vertex.
+    """
+    def __init__(self, mesh):
+        if mesh.Normals.Count != mesh.Vertices.Count: mesh.Normals.ComputeNormals()
+        mtv = mesh.TopologyVertices
+        
+        self.vertexFaceStart = [0]
+        self.vertexFaceIds = []
+        self.vertexMeshIds = []
+        self.vertexPoints = []
+        for i in range(mtv.Count):
+            self.vertexFaceIds.extend(mtv.ConnectedFaces(i))
+            self.vertexFaceStart.append(len(self.vertexFaceIds))
+            ti = list(mtv.MeshVertexIndices(i))
+            self.vertexMeshIds.append(ti)
+            self.vertexPoints.append(rc.Geometry.Point3d(mesh.Vertices[ti[0]]))
+        
+        self.faceVertices = []
+        for i in range(mesh.Faces.Count):
+            tv = mesh.Faces.GetTopologicalVertices(i)
+            if tv[2] == tv[3]: self.faceVertices.append((tv[0], tv[1], tv[2]))
+            else: self.faceVertices.append((tv[0], tv[1], tv[2], tv[3]))
+        
+        self.vertexNormals = self.averageNormals(mesh.Normals)
+    
+    def averageNormals(self, normals):
+        # unitized sum of the normals of the mesh vertices of every topology vertex
+        vertexNormals = []
+        for ti in self.vertexMeshIds:
+            n = normals[ti[0]]
+            for t in ti[1:]:
+                n = rc.Geometry.Vector3d.Add(n ,normals[t])
+            n.Unitize()
+            vertexNormals.append((n.X, n.Y, n.Z))
+        return vertexNormals
+    
+    def averageFaceValues(self, faceValues):
+        # average of the values of the faces around every topology vertex
+        values = []
+        faceIds, start = self.vertexFaceIds, self.vertexFaceStart
+        for i in range(len(start) - 1):
+            v = 0
+            for j in range(start[i], start[i+1]):
+                v += faceValues[faceIds[j]]
+            v/=(start[i+1] - start[i])
+            values.append(v)
+        return values
+    
+    def offsetPoints(self, values, normals = None):
+        # move every topology vertex along its normal by its value
+        if normals is None: normals = self.vertexNormals
+        return [rc.Geometry.Point3d.Add(pt, rc.Geometry.Vector3d(v * nx, v * ny, v * nz)) \
+            for pt, v, (nx, ny, nz) in zip(self.vertexPoints, values, normals)]
+
+
+class MeshContour(object):
+    """Iso-lines and iso-bands of the values at the vertices of a mesh (marching triangles).
+    
+    Quad faces are split into two triangles and the values are linearly
+    interpolated over every triangle. All of the levels are found in a single
+    pass over the triangles and the points on the edges of the mesh are shared
+    by the neighbouring triangles, so the lines are joined and the bands are
+    welded without any tolerance. It does not need Rhino.
+    
+    Args:
+        vertices: A list of points as (x, y, z) tuples.
+        faces: A list of faces as tuples of 3 or 4 vertex indices.
+        values: A list of numbers with one value for each vertex.
+    """
+    def __init__(self, vertices, faces, values):
+        self.vertices = vertices
+        self.values = values
+        self.triangles = []
+        for face in faces:
+            self.triangles.append((face[0], face[1], face[2]))
+            if len(face) == 4 and face[3] != face[2]:
+                self.triangles.append((face[0], face[2], face[3]))
+    
+    def edgePoint(self, i, j, level):
+        # the point of an edge at a level is always calculated from its lower vertex index so neighbours get the same point
+        if i > j: i, j = j, i
+        (xi, yi, zi), (xj, yj, zj) = self.vertices[i], self.vertices[j]
+        t = (level - self.values[i]) / (self.values[j] - self.values[i])
+        return (xi + t * (xj - xi), yi + t * (yj - yi), zi + t * (zj - zi))
+    
+    def isoLines(self, levels):
+        """Polylines along which the values are equal to the levels.
+        
+        Args:
+            levels: A list of numbers.
+        
+        Returns:
+            lines: A list with a list of polylines for each level. Every polyline
+                is a list of (x, y, z) points. Closed polylines end with their
+                first point.
+        """
+        levels = list(levels)
+        sortedLevels = sorted(levels)
+        segments = dict((level, []) for level in levels)
+        for tri in self.triangles:
+            triValues = [self.values[i] for i in tri]
+            # levels between the lowest and the highest value of the triangle
+            for level in sortedLevels[bisect.bisect_right(sortedLevels, min(triValues)):bisect.bisect_right(sortedLevels, max(triValues))]:
+                crossedEdges = []
+                for k in range(3):
+                    i, j = tri[k], tri[(k + 1) % 3]
+                    if (self.values[i] >= level) != (self.values[j] >= level):
+                        crossedEdges.append((min(i, j), max(i, j)))
+                if len(crossedEdges) == 2: segments[level].append(crossedEdges)
+        
+        return [self.joinSegments(segments[level], level) for level in levels]
+    
+    def joinSegments(self, segments, level):
+        # join the segments that share a crossed edge into polylines
+        edgeSegments = {}
+        for s, (e1, e2) in enumerate(segments):
+            edgeSegments.setdefault(e1, []).append(s)
+            edgeSegments.setdefault(e2, []).append(s)
+        
+        used = [False] * len(segments)
+        def walk(s, edge):
+            segmentChain = [edge]
+            while s is not None and not used[s]:
+                used[s] = True
+                e1, e2 = segments[s]
+                edge = e2 if e1 == edge else e1
+                segmentChain.append(edge)
+                s = None
+                for nextS in edgeSegments[edge]:
+                    if not used[nextS]: s = nextS
+            return segmentChain
+        
+        segmentChains = []
+        # open polylines start from the edges with a single segment
+        for edge, segIds in edgeSegments.items():
+            if len(segIds) == 1 and not used[segIds[0]]: segmentChains.append(walk(segIds[0], edge))
+        for s in range(len(segments)):
+            if not used[s]: segmentChains.append(walk(s, segments[s][0]))
+        
+        polylines = []
+        for segmentChain in segmentChains:
+            polyline = []
+            for edge in segmentChain:
+                pt = self.edgePoint(edge[0], edge[1], level)
+                if not polyline or pt != polyline[-1]: polyline.append(pt)
+            if len(polyline) > 1: polylines.append(polyline)
+        return polylines
+    
+    def isoBands(self, levels):
+        """Meshes of the parts of the mesh between the levels.
+        
+        Args:
+            levels: A sorted list of numbers.
+        
+        Returns:
+            bands: A list of len(levels) + 1 MeshData. The first one has the part
+                below the first level, the next one the part between the first
+                and the second level and so on. The bands are empty if no part
+                of the mesh is in them.
+        """
+        bandVertices = [[] for count in range(len(levels) + 1)]
+        bandFaces = [[] for count in range(len(levels) + 1)]
+        bandIndices = [{} for count in range(len(levels) + 1)]
+        
+        for tri in self.triangles:
+            # walk around the triangle and collect its corners and the level crossings of its edges
+            boundary = []
+            for k in range(3):
+                i, j = tri[k], tri[(k + 1) % 3]
+                vi, vj = self.values[i], self.values[j]
+                boundary.append((('v', i), vi))
+                lo, hi = min(vi, vj), max(vi, vj)
+                crossings = range(bisect.bisect_right(levels, lo), bisect.bisect_left(levels, hi))
+                if vi > vj: crossings = reversed(crossings)
+                for l in crossings: boundary.append(((min(i, j), max(i, j), l), levels[l]))
+            
+            triValues = [self.values[i] for i in tri]
+            for band in range(bisect.bisect_right(levels, min(triValues)), bisect.bisect_right(levels, max(triValues)) + 1):
+                # the band inside the triangle is a convex polygon of the boundary points with values between its levels
+                lo = levels[band - 1] if band > 0 else None
+                hi = levels[band] if band < len(levels) else None
+                polygon = [key for key, value in boundary if (lo is None or value >= lo) and (hi is None or value <= hi)]
+                if len(polygon) < 3: continue
+                
+                indices = bandIndices[band]
+                faceIds = []
+                for key in polygon:
+                    if key not in indices:
+                        indices[key] = len(bandVertices[band])
+                        if key[0] == 'v': bandVertices[band].append(self.vertices[key[1]])
+                        else: bandVertices[band].append(self.edgePoint(key[0], key[1], levels[key[2]]))
+                    faceIds.append(indices[key])
+                if len(faceIds) == 4:
+                    bandFaces[band].append(tuple(faceIds))
+                else:
+                    for k in range(1, len(faceIds) - 1):
+                        bandFaces[band].append((faceIds[0], faceIds[k], faceIds[k + 1]))
+        
+        return [MeshData(vertices, faces) for vertices, faces in zip(bandVertices, bandFaces)]
+
+
+class TextGlyphs(object):
+    """Meshes of text characters that are composed into text without the Rhino document.
+    
+    Every character is meshed only once for each font at a text height of 1 and
+    the meshes are shared by all of the components. Text is made by copying the
+    cached characters along its lines. The cache can be saved to a file so the
+    characters don't need to be meshed again when Rhino is restarted.
+    
+    The document text is added at a height of 1 / DimensionScale, as the text
+    of the legends always was, so the characters are cached for each dimension
+    scale.
+    
+    Args:
+        outlineBackend: An optional function that takes a character, a font and
+            bold and returns the outline curves of the character at a text height
+            of 1 and the advance of the character. The advance of '\\n' is the
+            line spacing. By default the character is added to the Rhino document.
+    """
+    glyphCache = {}
+    loadedFiles = set()
+    
+    def __init__(self, outlineBackend = None):
+        if outlineBackend is None:
+            self.outlineBackend = self.documentOutlines
+            self.scale = self.dimensionScale()
+        else:
+            self.outlineBackend = outlineBackend
+            self.scale = 1
+    
+    @staticmethod
+    def dimensionScale():
+        try:
+            # exposed only in Rhino 6
+            scale = rc.RhinoDoc.ActiveDoc.DimStyles.CurrentDimensionStyle.DimensionScale
+        except AttributeError:
+            # Rhino 5
+            scale = 1
+        return float(scale or 1)  # ensure it is not 0
+    
+    def documentOutlines(self, char, font, bold):
+        textHeight = 1 / self.scale
+        
+        def textCurves(text):
+            textId = rc.RhinoDoc.ActiveDoc.Objects.AddText(text, rc.Geometry.Plane.WorldXY, textHeight, font, bold, False)
+            textObject = rc.RhinoDoc.ActiveDoc.Objects.Find(textId)
+            curves = textObject.Geometry.Explode()
+            rc.RhinoDoc.ActiveDoc.Objects.Delete(textObject, True) # find and delete the text
+            return curves
+        
+        def boundingBox(curves):
+            box = rc.Geometry.BoundingBox.Empty
+            for crv in curves: box.Union(crv.GetBoundingBox(True))
+            return box
+        
+        if char == '\n':
+            # the line spacing
+            return [], boundingBox(textCurves('I\nI')).Diagonal.Y - boundingBox(textCurves('I')).Diagonal.Y
+        
+        # the advance is measured between two letters to include the spacing of the character
+        advance = boundingBox(textCurves('I' + char + 'I')).Diagonal.X - boundingBox(textCurves('II')).Diagonal.X
+        if char.strip() == '': return [], advance
+        return textCurves(char), advance
+    
+    def glyph(self, char, font, bold):
+        """Get the mesh of a character at a text height of 1.
+        
+        Returns:
+            vertices: A list of (x, y) tuples.
+            faces: A list of faces as tuples of 3 or 4 vertex indices.
+            advance: The distance to the next character.
+        """
+        glyphKey = (char, font, bool(bold), self.scale)
+        if glyphKey in self.glyphCache: return self.glyphCache[glyphKey]
+        
+        curves, advance = self.outlineBackend(char, font, bold)
+        vertices, faces = [], []
+        if curves:
+            joinedCrvs = rc.Geometry.Curve.JoinCurves(curves)
+            srfs = rc.Geometry.Brep.CreatePlanarBreps(joinedCrvs)
+            # '=' and ':' have 2 surfaces
+            if not srfs or len(srfs) != (2 if char in '=:' else 1):
+                # project the curves to the plane in case the number of surfaces doesn't match the character
+                projectedCrvs = [rc.Geometry.Curve.ProjectToPlane(crv, rc.Geometry.Plane.WorldXY) for crv in joinedCrvs]
+                srfs = rc.Geometry.Brep.CreatePlanarBreps(projectedCrvs) or srfs or []
+            for srf in srfs:
+                srf.Flip()
+                try:
+                    meshSrf = rc.Geometry.Mesh.CreateFromBrep(srf, rc.Geometry.MeshingParameters.Coarse)[0]
+                except TypeError:
+                    # pass very small surfaces
+                    continue
+                k = len(vertices)
+                vertices.extend([(pt.X, pt.Y) for pt in meshSrf.Vertices])
+                for face in meshSrf.Faces:
+                    if face.IsQuad: faces.append((k + face.A, k + face.B, k + face.C, k + face.D))
+                    else: faces.append((k + face.A, k + face.B, k + face.C))
+            
+            # a character that could not be meshed is tried again the next time
+            if not faces: return vertices, faces, advance
+        
+        self.glyphCache[glyphKey] = vertices, faces, advance
+        return self.glyphCache[glyphKey]
+    
+    def textMesh(self, text, font = 'Verdana', bold = False, justificationIndex = 0):
+        """Compose the mesh of a text at a text height of 1 on the XY plane.
+        
+        Args:
+            text: The text. Lines are separated by '\\n'.
+            font: The name of the font.
+            bold: Set to True to use the bold font.
+            justificationIndex: The justification of the text as it is used in
+                ResultVisualization.textJustificationEnumeration.
+        
+        Returns:
+            textMesh: A MeshData.
+        """
+        if justificationIndex not in range(9): justificationIndex = 0
+        horizontal, vertical = justificationIndex % 3, justificationIndex // 3
+        
+        lines = text.split('\n')
+        lineSpacing = self.glyph('\n', font, bold)[2]
+        textHeight = 1 + (len(lines) - 1) * lineSpacing
+        baseY = [0, -textHeight / 2, -textHeight][vertical]
+        
+        vertices, faces = [], []
+        for lineCount, line in enumerate(lines):
+            glyphs = [self.glyph(char, font, bold) for char in line]
+            lineWidth = sum(glyph[2] for glyph in glyphs)
+            x = [0, -lineWidth / 2, -lineWidth][horizontal]
+            y = baseY + (len(lines) - 1 - lineCount) * lineSpacing
+            for glyphVertices, glyphFaces, advance in glyphs:
+                k = len(vertices)
+                vertices.extend([(x + u, y + v, 0) for u, v in glyphVertices])
+                faces.extend([tuple(k + i for i in face) for face in glyphFaces])
+                x += advance
+        
+        return MeshData(vertices, faces)
+    
+    def loadGlyphs(self, filePath):
+        """Add the characters that are saved in a file to the cache. Every file is only read once."""
+        if filePath in self.loadedFiles or not os.path.isfile(filePath): return
+        self.loadedFiles.add(filePath)
+        with open(filePath, 'r') as glyphFile:
+            for line in glyphFile:
+                try:
+                    char, font, bold, scale, advance, vertices, faces = line.rstrip('\n').split('\t')
+                    glyphKey = (unichr(int(char)), font, bold == '1', float(scale))
+                    vertices = [tuple(float(c) for c in vertex.split(',')) for vertex in vertices.split()]
+                    faces = [tuple(int(i) for i in face.split(',')) for face in faces.split()]
+                except ValueError:
+                    continue
+                if glyphKey not in self.glyphCache: self.glyphCache[glyphKey] = vertices, faces, float(advance)
+    
+    def saveGlyphs(self, filePath):
+        """Save all of the cached characters to a file."""
+        self.loadedFiles.add(filePath)
+        try:
+            with open(filePath, 'w') as glyphFile:
+                for (char, font, bold, scale), (vertices, faces, advance) in self.glyphCache.items():
+                    if not isinstance(font, basestring): continue
+                    glyphFile.write('\t'.join([str(ord(char)), font, str(int(bold)), repr(scale), repr(advance), \
+                        ' '.join(['%r,%r' % vertex for vertex in vertices]), \
+                        ' '.join([','.join(map(str, face)) for face in faces])]) + '\n')
+        except IOError:
+            # the folder is not writable. the cache still works for this session
+            pass
+
+
 class MeshPreparation(object):
     
     def joinMesh(self, meshList):
@@ -2160,19 +3287,204 @@ class MeshPreparation(object):
     
     def meshFromPoints(self, u, v, pts, meshColors=None):
         # creates a mesh from grid of points
-        mesh = rc.Geometry.Mesh()
-        if (meshColors == None) or (len(meshColors) == 0):
-            for pt in pts:
-                mesh.Vertices.Add(pt)
-        else:
-            for i,pt in enumerate(pts):
-                mesh.Vertices.Add(pt)
-                mesh.VertexColors.Add(meshColors[i])
-        for i in xrange(1,u):
-            for k in xrange(1,v):
-                mesh.Faces.AddFace(k-1+(i-1)*v, k-1+i*v, k-1+i*v+1, k-1+(i-1)*v+1)
+        if (meshColors == None) or (len(meshColors) == 0): meshColors = None
+        meshData = MeshData(pts, colors = meshColors)
+        meshData.addGridFaces(u, v)
         
-        return mesh
+        return meshData.toRhinoMesh()
+
+class RayTracer(object):
+    """Specular ray tracer over the faces of a mesh.
+    
+    The triangles of the mesh are kept in a bounding volume hierarchy so every
+    ray is only tested against the triangles of the boxes that it goes through.
+    Rays are traced together one bounce at a time and each bounce gives the hit
+    point and the normal of the face that is hit, so the rays are reflected
+    without looking for the surface again.
+    
+    Args:
+        mesh: A mesh (e.g. the joined context geometry). Quads are split into
+            two triangles.
+        leafSize: The largest number of triangles in a leaf box of the hierarchy.
+    """
+    
+    def __init__(self, mesh, leafSize = 4):
+        self.faceCount = mesh.Faces.Count
+        self.faceHits = []
+        self.faceEnergy = []
+        
+        # triangles are kept as a vertex, two edges, a unit normal and the index of their mesh face
+        self.triOrigins, self.triEdges1, self.triEdges2, self.triNormals, self.triFaces = [], [], [], [], []
+        vertices = [(v.X, v.Y, v.Z) for v in mesh.Vertices]
+        for faceIndex in range(mesh.Faces.Count):
+            face = mesh.Faces[faceIndex]
+            if face.IsQuad: corners = [face.A, face.B, face.C, face.D]
+            else: corners = [face.A, face.B, face.C]
+            for i in range(1, len(corners) - 1):
+                p0, p1, p2 = vertices[corners[0]], vertices[corners[i]], vertices[corners[i + 1]]
+                e1 = (p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2])
+                e2 = (p2[0] - p0[0], p2[1] - p0[1], p2[2] - p0[2])
+                n = (e1[1]*e2[2] - e1[2]*e2[1], e1[2]*e2[0] - e1[0]*e2[2], e1[0]*e2[1] - e1[1]*e2[0])
+                length = math.sqrt(n[0]*n[0] + n[1]*n[1] + n[2]*n[2])
+                if length == 0: continue
+                self.triOrigins.append(p0)
+                self.triEdges1.append(e1)
+                self.triEdges2.append(e2)
+                self.triNormals.append((n[0]/length, n[1]/length, n[2]/length))
+                self.triFaces.append(faceIndex)
+        
+        self.buildHierarchy(leafSize)
+    
+    def buildHierarchy(self, leafSize):
+        # the nodes are kept in flat lists and each leaf has a range of self.order
+        triCount = len(self.triOrigins)
+        boxes = []
+        for p0, e1, e2 in izip(self.triOrigins, self.triEdges1, self.triEdges2):
+            xs = (p0[0], p0[0] + e1[0], p0[0] + e2[0])
+            ys = (p0[1], p0[1] + e1[1], p0[1] + e2[1])
+            zs = (p0[2], p0[2] + e1[2], p0[2] + e2[2])
+            boxes.append((min(xs), min(ys), min(zs), max(xs), max(ys), max(zs)))
+        centers = [((b[0] + b[3]) / 2, (b[1] + b[4]) / 2, (b[2] + b[5]) / 2) for b in boxes]
+        
+        self.order = range(triCount)
+        self.nodeBoxes, self.nodeStart, self.nodeEnd, self.nodeChildren = [], [], [], []
+        stack = [(0, triCount, -1, 0)]
+        while stack:
+            start, end, parent, side = stack.pop()
+            nodeIndex = len(self.nodeBoxes)
+            if parent >= 0: self.nodeChildren[parent][side] = nodeIndex
+            
+            triangles = self.order[start:end]
+            if triangles: nodeBox = tuple([min(boxes[t][axis] for t in triangles) for axis in range(3)] + [max(boxes[t][axis] for t in triangles) for axis in range(3, 6)])
+            else: nodeBox = (0, 0, 0, -1, -1, -1)
+            self.nodeBoxes.append(nodeBox)
+            self.nodeStart.append(start)
+            self.nodeEnd.append(end)
+            self.nodeChildren.append([-1, -1])
+            if end - start <= leafSize: continue
+            
+            # split the triangles in half along the longest side of the box of their centers
+            extents = [max(centers[t][axis] for t in triangles) - min(centers[t][axis] for t in triangles) for axis in range(3)]
+            axis = extents.index(max(extents))
+            triangles.sort(key = lambda t: centers[t][axis])
+            self.order[start:end] = triangles
+            mid = (start + end) // 2
+            stack.append((start, mid, nodeIndex, 0))
+            stack.append((mid, end, nodeIndex, 1))
+    
+    def intersect(self, origin, direction, skipTriangle = -1, tMin = 1e-6):
+        """Find the closest triangle that a ray hits.
+        
+        Args:
+            origin: The (x, y, z) start of the ray.
+            direction: The (x, y, z) direction of the ray.
+            skipTriangle: A triangle to be ignored (e.g. the one that the ray
+                is reflected from).
+            tMin: Hits that are closer than this to the origin are ignored.
+        
+        Returns:
+            t: The distance to the hit in lengths of the direction or None
+                if nothing is hit.
+            triangle: The index of the triangle that is hit or -1.
+        """
+        ox, oy, oz = origin
+        dx, dy, dz = direction
+        closest, hitTriangle = None, -1
+        nodeBoxes, nodeChildren = self.nodeBoxes, self.nodeChildren
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            
+            # slab test of the box of the node
+            box = nodeBoxes[node]
+            tNear, tFar = tMin, closest
+            missed = False
+            for o, d, lo, hi in ((ox, dx, box[0], box[3]), (oy, dy, box[1], box[4]), (oz, dz, box[2], box[5])):
+                if d == 0:
+                    if o < lo or o > hi: missed = True; break
+                    continue
+                t1, t2 = (lo - o) / d, (hi - o) / d
+                if t1 > t2: t1, t2 = t2, t1
+                if t1 > tNear: tNear = t1
+                if tFar is None or t2 < tFar: tFar = t2
+                if tNear > tFar: missed = True; break
+            if missed: continue
+            
+            children = nodeChildren[node]
+            if children[0] >= 0:
+                stack.extend(children)
+                continue
+            
+            for t in self.order[self.nodeStart[node]:self.nodeEnd[node]]:
+                if t == skipTriangle: continue
+                # Moller-Trumbore ray triangle intersection
+                e1, e2 = self.triEdges1[t], self.triEdges2[t]
+                px, py, pz = dy*e2[2] - dz*e2[1], dz*e2[0] - dx*e2[2], dx*e2[1] - dy*e2[0]
+                det = e1[0]*px + e1[1]*py + e1[2]*pz
+                if abs(det) < 1e-12: continue
+                invDet = 1 / det
+                p0 = self.triOrigins[t]
+                sx, sy, sz = ox - p0[0], oy - p0[1], oz - p0[2]
+                u = (sx*px + sy*py + sz*pz) * invDet
+                if u < 0 or u > 1: continue
+                qx, qy, qz = sy*e1[2] - sz*e1[1], sz*e1[0] - sx*e1[2], sx*e1[1] - sy*e1[0]
+                v = (dx*qx + dy*qy + dz*qz) * invDet
+                if v < 0 or u + v > 1: continue
+                dist = (e2[0]*qx + e2[1]*qy + e2[2]*qz) * invDet
+                if dist > tMin and (closest is None or dist < closest):
+                    closest, hitTriangle = dist, t
+        return closest, hitTriangle
+    
+    def traceRays(self, origins, directions, numOfBounce, reflectance = 1, accumulate = False):
+        """Trace rays through the mesh with specular reflections.
+        
+        Args:
+            origins: A list of (x, y, z) start points of the rays.
+            directions: A list of (x, y, z) unit directions of the rays.
+            numOfBounce: The largest number of bounces of each ray.
+            reflectance: The fraction of the energy of a ray that is reflected
+                at each bounce.
+            accumulate: Set to True to count the hits and the energy (1 for each
+                ray before its first bounce) that reach every face of the mesh
+                in self.faceHits and self.faceEnergy.
+        
+        Returns:
+            hitPoints: A list with a list of the (x, y, z) hit points of each ray.
+            hitNormals: A list with a list of the unit normals of the faces at the
+                hit points of each ray. The normals face the incoming rays.
+            lastDirections: The direction of each ray after its last bounce.
+        """
+        if accumulate:
+            self.faceHits = [0] * self.faceCount
+            self.faceEnergy = [0] * self.faceCount
+        
+        hitPoints = [[] for origin in origins]
+        hitNormals = [[] for origin in origins]
+        lastDirections = list(directions)
+        # the rays that are still bouncing with the triangle they left from and their energy
+        activeRays = [(rayCount, origin, direction, -1, 1) for rayCount, (origin, direction) in enumerate(izip(origins, directions))]
+        for bounce in range(numOfBounce):
+            nextRays = []
+            for rayCount, origin, d, lastTriangle, energy in activeRays:
+                dist, triangle = self.intersect(origin, d, lastTriangle)
+                if dist is None: continue
+                hitPt = (origin[0] + dist*d[0], origin[1] + dist*d[1], origin[2] + dist*d[2])
+                n = self.triNormals[triangle]
+                dDotN = d[0]*n[0] + d[1]*n[1] + d[2]*n[2]
+                if dDotN > 0: n = (-n[0], -n[1], -n[2]); dDotN = -dDotN
+                reflected = (d[0] - 2*dDotN*n[0], d[1] - 2*dDotN*n[1], d[2] - 2*dDotN*n[2])
+                
+                hitPoints[rayCount].append(hitPt)
+                hitNormals[rayCount].append(n)
+                lastDirections[rayCount] = reflected
+                if accumulate:
+                    self.faceHits[self.triFaces[triangle]] += 1
+                    self.faceEnergy[self.triFaces[triangle]] += energy
+                nextRays.append((rayCount, hitPt, reflected, triangle, energy * reflectance))
+            activeRays = nextRays
+            if not activeRays: break
+        
+        return hitPoints, hitNormals, lastDirections
 
 class RunAnalysisInsideGH(object):
     #
@@ -2497,6 +3809,11 @@ class ExportAnalysis2Radiance(object):
     pass
 
 class ResultVisualization(object):
+    # legend color tables and colors are shared by all of the components
+    colorTableCache = {}
+    colorCache = {}
+    meshTopologyCache = {}
+    
     # This wasn't agood idea since multiple studies have different Bounding boxes
     def __init__(self):
         self.BoundingBoxPar = None
@@ -2557,13 +3874,9 @@ class ResultVisualization(object):
         
         if meshStruct == 0:
             try:
-                for face in range(meshList[0].Faces.Count):
-                    joinedMesh.Append(meshList[0].Faces[face]) #join the mesh
+                for face in meshList: joinedMesh.Append(face) #join the mesh
             except:
-                try:
-                    for face in meshList: joinedMesh.Append(face)
-                except:
-                    joinedMesh.Append(meshList)
+                joinedMesh.Append(meshList)
             if unweld: joinedMesh.Unweld(0, False)
         elif meshStruct == 1:
             try:
@@ -2589,21 +3902,38 @@ class ResultVisualization(object):
                 print 'number of mesh:' + `joinedMesh.Vertices.Count` + ' != number of values:' + `len(colors)`
                 return -1
         
-        # make a monotonemesh
-        joinedMesh.VertexColors.CreateMonotoneMesh(System.Drawing.Color.White)
         #color the mesh based on the results
         if meshStruct == 0:
-            for srfCount in range (joinedMesh.Faces.Count):
-                joinedMesh.VertexColors[joinedMesh.Faces[srfCount].A] = colors[srfCount]
-                joinedMesh.VertexColors[joinedMesh.Faces[srfCount].B] = colors[srfCount]
-                joinedMesh.VertexColors[joinedMesh.Faces[srfCount].C] = colors[srfCount]
-                joinedMesh.VertexColors[joinedMesh.Faces[srfCount].D] = colors[srfCount]
+            # set the colors of all of the vertices in one call instead of four calls per face
+            faceVertices = joinedMesh.Faces.ToIntArray(True)
+            vertexColors = [System.Drawing.Color.White] * joinedMesh.Vertices.Count
+            for srfCount, color in enumerate(colors):
+                k = 4 * srfCount
+                vertexColors[faceVertices[k]] = vertexColors[faceVertices[k+1]] = vertexColors[faceVertices[k+2]] = vertexColors[faceVertices[k+3]] = color
         elif meshStruct == 1:
-            for count, color in enumerate(colors):
-                joinedMesh.VertexColors[count] = color
+            vertexColors = list(colors)
+        joinedMesh.VertexColors.SetColors(System.Array[System.Drawing.Color](vertexColors))
         
         return joinedMesh
     
+    def getMeshTopology(self, mesh):
+        """Get the MeshTopology of a mesh from the cache or calculate it.
+        
+        The cache is keyed by the number of vertices and faces and an md5 hash
+        of their coordinates and indices so copies of the same mesh (e.g. from
+        a new Grasshopper solution) share a topology.
+        """
+        vertices = mesh.Vertices.ToFloatArray()
+        faces = mesh.Faces.ToIntArray(False)
+        data = System.Array.CreateInstance(System.Byte, 4 * (len(vertices) + len(faces)))
+        System.Buffer.BlockCopy(vertices, 0, data, 0, 4 * len(vertices))
+        System.Buffer.BlockCopy(faces, 0, data, 4 * len(vertices), 4 * len(faces))
+        meshKey = mesh.Vertices.Count, mesh.Faces.Count, System.BitConverter.ToString(System.Security.Cryptography.MD5.Create().ComputeHash(data))
+        if meshKey not in self.meshTopologyCache:
+            if len(self.meshTopologyCache) >= 8: self.meshTopologyCache.clear()
+            self.meshTopologyCache[meshKey] = MeshTopology(mesh)
+        return self.meshTopologyCache[meshKey]
+    
     def create3DColoredMesh(self, inputMesh, analysisResult, domain, colors, meshStruct=0, meshNormals=[]):
         """
         Creates a new 3D mesh based on input values
@@ -2625,65 +3955,31 @@ class ResultVisualization(object):
         inputMesh.Normals.ComputeNormals()
         inputMesh.FaceNormals.UnitizeFaceNormals()
         if meshStruct == 0:
-            mtv = inputMesh.TopologyVertices
             inputMesh.FaceNormals.ComputeFaceNormals()
-        values = []
-        
-        if meshStruct == 0:
+            # the topology of the same mesh is reused when it is colored with new results
+            topology = self.getMeshTopology(inputMesh)
             # collect the values and average  them for each vertices
-            for i in range(mtv.Count):
-                faceIds = mtv.ConnectedFaces(i) #always an array of 4
-                
-                v = 0
-                for j in range(faceIds.Count):
-                    v += mappedValues[faceIds[j]]
-                v/=(faceIds.Count) #average the value
-                values.append(v)
+            values = topology.averageFaceValues(mappedValues)
+            
+            #average normals
+            if meshNormals == []: normals = topology.vertexNormals
+            else: normals = topology.averageNormals(meshNormals)
+            offsetPts = topology.offsetPoints(values, normals)
             
             vo = []
             fo = []
             vc = []
             
             k = 0
-            for i in range(inputMesh.Faces.Count):
-                tv = inputMesh.Faces.GetTopologicalVertices(i)
-                
-                if tv[2] == tv[3]: count=3
-                else: count = 4
-                
-                for j in range(count):
-                    ti = mtv.MeshVertexIndices(tv[j])
-                    
-                    #average normals
-                    if meshNormals == []:
-                        n = inputMesh.Normals[ti[0]]
-                        for t in ti[1:]:
-                            n = rc.Geometry.Vector3d.Add(n ,inputMesh.Normals[t])
-                    else:
-                        n = meshNormals[ti[0]]
-                        for t in ti[1:]:
-                            n = rc.Geometry.Vector3d.Add(n ,meshNormals[t])
-                    
-                    n.Unitize()
-                    
-                    v = values[tv[j]]
-                    n = rc.Geometry.Vector3d(v * n.X, v * n.Y, v * n.Z)
-                    vo.append(rc.Geometry.Point3d.Add(inputMesh.Vertices[ti[0]], n))
-                    vc.append(colors[i])
-                
-                if count == 3:
-                    fo.append(rc.Geometry.MeshFace(k, k + 1, k + 2))    
-                else:
-                    fo.append(rc.Geometry.MeshFace(k, k + 1, k + 2, k + 3))
+            for i, tv in enumerate(topology.faceVertices):
+                count = len(tv)
+                vo.extend([offsetPts[t] for t in tv])
+                vc.extend([colors[i]] * count)
+                fo.append(tuple(range(k, k + count)))
                 k += count
             
             # construct mesh using vertices and faces
-            mo = rc.Geometry.Mesh()
-            for ver in vo: mo.Vertices.Add(ver)
-            for c in vc: mo.VertexColors.Add(c)
-            mo.Faces.AddFaces(fo)
-            
-            return mo
+            return MeshData(vo, fo, vc).toRhinoMesh()
         
         elif meshStruct == 1:
             for count, ver in enumerate(inputMesh.Vertices):
@@ -2699,64 +3995,82 @@ class ResultVisualization(object):
             return inputMesh
     
     def gradientColor(self, values, lowB, highB, colors,lowBoundColor = None,highBoundColor = None):
-        # make a deep copy of colors so colors isn't popped twice once for legend colors and once for mesh colors
-        copyColors = list(colors)
+        # this function inputs values, and custom colors and outputs gradient colors
+        return [self.argbToColor(argb) for argb in self.gradientColorArgb(values, lowB, highB, colors, lowBoundColor, highBoundColor)]
+    
+    def gradientColorArgb(self, values, lowB, highB, colors, lowBoundColor = None, highBoundColor = None):
+        """Gradient colors of a list of values as packed ARGB integers (the same as Color.ToArgb()).
+        
+        The bounds and the color steps of the legend are calculated once and
+        cached for the next calls with the same colors. The color range of
+        each value is found with a binary search instead of checking all of
+        the ranges.
+        
+        Args:
+            values: A list of numbers.
+            lowB: Lower bound of the legend or 'min'.
+            highB: Upper bound of the legend or 'max'.
+            colors: A list of System.Drawing.Color.
+            lowBoundColor: Optional color for the values at or below lowB.
+            highBoundColor: Optional color for the values at or above highB.
+        
+        Returns:
+            argbColors: A list of ARGB integers. Use argbToColor to get the
+                System.Drawing.Color of each one.
+        """
         if highB == 'max': highB = max(values)
         if lowB == 'min': lowB = min(values)
         
-        # this function inputs values, and custom colors and outputs gradient colors
-        def parNum(num, lowB, highB):
-            """This function normalizes all the values"""
+        colorBounds, colorSteps = self.colorTable(colors)
+        lastBound = len(colorBounds)
+        
+        if lowBoundColor != None: lowBoundArgb = lowBoundColor.ToArgb()
+        if highBoundColor != None: highBoundArgb = highBoundColor.ToArgb()
+        
+        argbColors = []
+        for num in values:
+            # normalize the value
             if num > highB: numP = 1
             elif num < lowB: numP = 0
             elif highB == lowB: numP = 0
             else: numP = (num - lowB)/(highB - lowB)
-            return numP
-    
-        def calColor(valueP, rangeMinP, rangeMaxP, minColor, maxColor):
-            # range is between 0 and 1
-            rangeP = rangeMaxP - rangeMinP
-            red = round(((valueP - rangeMinP)/rangeP) * (maxColor.R - minColor.R) + minColor.R)
-            blue = round(((valueP - rangeMinP)/rangeP) * (maxColor.B - minColor.B) + minColor.B)
-            green = round(((valueP - rangeMinP)/rangeP) * (maxColor.G - minColor.G) + minColor.G) 
-            color = System.Drawing.Color.FromArgb(red, green, blue)
-            return color
-        
-        # Calculate num of colors
-        if (highBoundColor != None):
-            # Subtract a color to make room for the highBoundColor
-            copyColors.pop()
-    
-        if (lowBoundColor != None):
-            # Subtract a color to make room for the lowBoundColor
-            copyColors.pop()
+            
+            if (numP == 1) and (highBoundColor != None):
+                argbColors.append(highBoundArgb)
+            elif (numP == 0) and (lowBoundColor != None):
+                argbColors.append(lowBoundArgb)
+            else:
+                # the first range with colorBounds[i] <= numP <= colorBounds[i + 1]
+                i = bisect.bisect_left(colorBounds, numP, 1, lastBound) - 1
+                rangeMinP, rangeP, minR, minG, minB, dR, dG, dB = colorSteps[i]
+                valueP = (numP - rangeMinP)/rangeP
+                argbColors.append(-16777216 | (int(round(valueP * dR + minR)) << 16) | (int(round(valueP * dG + minG)) << 8) | int(round(valueP * dB + minB)))
         
-        numofColors = len(colors)
+        return argbColors
+    
+    def colorTable(self, colors):
+        # bounds and color steps of the ranges of a legend
+        legendKey = tuple([color.ToArgb() for color in colors])
+        if legendKey in self.colorTableCache: return self.colorTableCache[legendKey]
         
+        numofColors = len(colors)
         colorBounds = rs.frange(0, 1, round(1/(numofColors-1),6))
         if len(colorBounds) != numofColors: colorBounds.append(1)
         colorBounds = [round(x,3) for x in colorBounds]
         
-        numP = []
-        for num in values: numP.append(parNum(num, lowB, highB))
-            
-        colorTemp = []
+        colorSteps = []
+        for i in range(min(numofColors, len(colorBounds)) - 1):
+            minColor, maxColor = colors[i], colors[i + 1]
+            colorSteps.append((colorBounds[i], colorBounds[i + 1] - colorBounds[i], minColor.R, minColor.G, minColor.B, \
+                maxColor.R - minColor.R, maxColor.G - minColor.G, maxColor.B - minColor.B))
         
-        for num in numP:
-            for i in range(numofColors):
-                if  colorBounds[i] <= num <= colorBounds[i + 1]:
-                    if (num == 1) and (highBoundColor != None) :
-                        colorTemp.append(highBoundColor)
-                        break
-                    elif (num == 0) and (lowBoundColor != None):
-                        colorTemp.append(lowBoundColor)
-                        break
-                    else:
-                        colorTemp.append(calColor(num, colorBounds[i], colorBounds[i+1], colors[i], colors[i+1]))
-                        break
-        color = colorTemp
-        
-        return color
+        self.colorTableCache[legendKey] = colorBounds, colorSteps
+        return colorBounds, colorSteps
+    
+    def argbToColor(self, argb):
+        # share one System.Drawing.Color for every ARGB value
+        if argb not in self.colorCache: self.colorCache[argb] = System.Drawing.Color.FromArgb(argb)
+        return self.colorCache[argb]
         
     def calculateBB(self, geometries, restricted = False):
         bbox = None
@@ -2960,71 +4274,31 @@ class ResultVisualization(object):
     
     def text2srf(self, text, textPt, font = 'Verdana', textHeight = 20, bold = False, plane = None, justificationIndex = 0):
         # Thanks to Giulio Piacentino for his version of text to curve
+        # the characters are meshed once and cached in TextGlyphs so the text doesn't go through the Rhino document
         textSrfs = []
-        textJustification = self.textJustificationEnumeration(justificationIndex)
         planeCheck = False
-
-        try:
-            # exposed only in Rhino 6
-            scale = rc.RhinoDoc.ActiveDoc.DimStyles.CurrentDimensionStyle.DimensionScale
-        except AttributeError:
-            # Rhino 5
-            pass
-        else:
-            scale = scale or 1  # ensure it is not 0
-            textHeight = textHeight / scale
-
+        textGlyphs = TextGlyphs()
+        defaultFolder = sc.sticky["Ladybug_DefaultFolder"] if sc.sticky.has_key("Ladybug_DefaultFolder") else ""
+        glyphFile = os.path.join(defaultFolder, "textGlyphs.txt") if os.path.isdir(defaultFolder) else None
+        if glyphFile: textGlyphs.loadGlyphs(glyphFile)
+        glyphCount = len(textGlyphs.glyphCache)
+        
         for n in range(len(text)):
             if plane == None or planeCheck == True:
                 plane = rc.Geometry.Plane(textPt[n], rc.Geometry.Vector3d(0,0,1))
                 planeCheck = True
-            if type(text[n]) is not str:
-                preText = rc.RhinoDoc.ActiveDoc.Objects.AddText(`text[n]`, plane, textHeight, font, bold, False, textJustification)
-            else:
-                preText = rc.RhinoDoc.ActiveDoc.Objects.AddText( text[n], plane, textHeight, font, bold, False, textJustification)
-                
-            postText = rc.RhinoDoc.ActiveDoc.Objects.Find(preText)
-            TG = postText.Geometry
-            crvs = TG.Explode()
-            
-            # join the curves
-            joindCrvs = rc.Geometry.Curve.JoinCurves(crvs)
-            
-            # create the surface
-            srfs = rc.Geometry.Brep.CreatePlanarBreps(joindCrvs)
-            
-            
-            extraSrfCount = 0
-            # = generate 2 surfaces
-            if "=" in text[n]: extraSrfCount += -1
-            if ":" in text[n]: extraSrfCount += -1
-            
-            if srfs:
-                if len(text[n].strip()) != len(srfs) + extraSrfCount:
-                    # project the curves to the place in case number of surfaces
-                    # doesn't match the text
-                    projectedCrvs = []
-                    for crv in joindCrvs:
-                        projectedCrvs.append(rc.Geometry.Curve.ProjectToPlane(crv, plane))
-                    srfs = rc.Geometry.Brep.CreatePlanarBreps(projectedCrvs)
-                
-                #Mesh the surfcaes.
-                meshSrfs = []
-                for srf in srfs:
-                    srf.Flip()
-                    try:
-                        meshSrf = rc.Geometry.Mesh.CreateFromBrep(srf, rc.Geometry.MeshingParameters.Coarse)[0]
-                    except TypeError:
-                        # pass very small surfaces
-                        continue
-                    else:
-                        meshSrf.VertexColors.CreateMonotoneMesh(System.Drawing.Color.Black)
-                        meshSrfs.append(meshSrf)
-                
-                textSrfs.append(meshSrfs)
-            
-            rc.RhinoDoc.ActiveDoc.Objects.Delete(postText, True) # find and delete the text
+            if type(text[n]) is not str: textString = `text[n]`
+            else: textString = text[n]
             
+            textMesh = textGlyphs.textMesh(textString, font, bold, justificationIndex)
+            if textMesh.faces:
+                textMesh.colors = [System.Drawing.Color.Black.ToArgb()] * len(textMesh.vertices)
+                meshSrf = textMesh.toRhinoMesh()
+                meshSrf.Transform(rc.Geometry.Transform.PlaneToPlane(rc.Geometry.Plane.WorldXY, plane) * rc.Geometry.Transform.Scale(rc.Geometry.Point3d.Origin, textHeight))
+                textSrfs.append([meshSrf])
+        
+        if glyphFile and len(textGlyphs.glyphCache) > glyphCount: textGlyphs.saveGlyphs(glyphFile)
+        
         return textSrfs
     
     def createTitle(self, listInfo, boundingBoxPar, legendScale = 1, Heading = None, shortVersion = False, font = None, fontSize = None, fontBold = False):
@@ -5392,111 +6666,97 @@ class ComfortModels(object):
             # skin temperatures
             for j in range(1,7):
                 self.tsk = 34.0
-                self.count1 = 0
                 self.tcl = (self.ta + self.tmrt + self.tsk) / 3.0
-                self.enbal2 = 0.0
-                while True:
-                    for count2 in range(1,100):
-                        self.acl = self.adu * self.facl + self.adu * (self.fcl - 1.0)
-                        rclo2 = self.emcl * self.sigm * (math.pow(self.tcl + 273.2, 4.0) - math.pow(self.tmrt + 273.2, 4.0)) * self.feff
-                        htcl = 6.28 * self.ht * y * di / (rcl * math.log(r2 / r1) * self.acl)
-                        self.tsk = 1.0 / htcl * (self.hc * (self.tcl - self.ta) + rclo2) + self.tcl
-                        # radiation balance
-                        self.aeff = self.adu * self.feff
-                        self.rbare = self.aeff * (1.0 - self.facl) * self.emsk * self.sigm * (math.pow(self.tmrt + 273.2, 4.0) - math.pow(self.tsk + 273.2, 4.0))
-                        self.rclo = self.feff * self.acl * self.emcl * self.sigm * (math.pow(self.tmrt + 273.2, 4.0) - math.pow(self.tcl + 273.2, 4.0))
-                        self.rsum = self.rbare + self.rclo
-                        # convection
-                        self.cbare = self.hc * (self.ta - self.tsk) * self.adu * (1.0 - self.facl)
-                        self.cclo = self.hc * (self.ta - self.tcl) * self.acl
-                        self.csum = self.cbare + self.cclo
-                        # core temperature
-                        c[0] = self.h + self.ere
-                        c[1] = self.adu * self.rob * self.cb
-                        c[2] = 18.0 - 0.5 * self.tsk
-                        c[3] = 5.28 * self.adu * c[2]
-                        c[4] = 13.0 / 625.0 * c[1]
-                        c[5] = 0.76075 * c[1]
-                        c[6] = c[3] - c[5] - self.tsk * c[4]
-                        c[7] = -c[0] * c[2] - self.tsk * c[3] + self.tsk * c[5]
-                        c[8] = c[6] * c[6] - 4.0 * c[4] * c[7]
-                        c[9] = 5.28 * self.adu - c[5] - c[4] * self.tsk
-                        c[10] = c[9] * c[9] - 4.0 * c[4] * (c[5] * self.tsk - c[0] - 5.28 * self.adu * self.tsk)
-                        if self.tsk == 36.0:
-                            self.tsk = 36.01
-                        tcore[6] = c[0] / (5.28 * self.adu + c[1] * 6.3 / 3600.0) + self.tsk
-                        tcore[2] = c[0] / (5.28 * self.adu + c[1] * 6.3 / 3600.0 / (1.0 + 0.5 * (34.0 - self.tsk))) + self.tsk
-                        if c[10] >= 0.0:
-                            tcore[5] = (-c[9] - math.pow(c[10], 0.5)) / (2.0 * c[4])
-                            tcore[0] = (-c[9] + math.pow(c[10], 0.5)) / (2.0 * c[4])
-                        if c[8] >= 0.0:
-                            tcore[1] = (-c[6] + math.pow(abs(c[8]), 0.5)) / (2.0 * c[4])
-                            tcore[4] = (-c[6] - math.pow(abs(c[8]), 0.5)) / (2.0 * c[4])
-                        tcore[3] = c[0] / (5.28 * self.adu + c[1] * 1.0 / 40.0) + self.tsk
-                        # transpiration
-                        tbody = 0.1 * self.tsk + 0.9 * tcore[j - 1]
-                        swm = 304.94 * (tbody - 36.6) * self.adu / 3600000.0
-                        self.vpts = 6.11 * math.pow(10.0, 7.45 * self.tsk / (235.0 + self.tsk))
-                        if tbody <= 36.6:
-                            swm = 0.0
-                        swf = 0.7 * swm
-                        if self.sex == 1:
-                            sw = swm
-                        if self.sex == 2:
-                            sw = swf
-                        if self.sex == 3:
-                            sw = (swm + swf)/2
-                        eswphy = -sw * self.evap
-                        he = 0.633 * self.hc / (self.p * self.cair)
-                        fec = 1.0 / (1.0 + 0.92 * self.hc * rcl)
-                        eswpot = he * (self.vpa - self.vpts) * self.adu * self.evap * fec
-                        self.wetsk = eswphy / eswpot
-                        if self.wetsk > 1.0:
-                            self.wetsk = 1.0
-                        eswdif = eswphy - eswpot
-                        if eswdif <= 0.0:
-                            self.esw = eswpot
-                        if eswdif > 0.0:
-                            self.esw = eswphy
-                        if self.esw > 0.0:
-                            self.esw = 0.0
-                        # diffusion
-                        self.rdsk = 0.79 * math.pow(10.0, 7.0)
-                        self.rdcl = 0.0
-                        self.ed = self.evap / (self.rdsk + self.rdcl) * self.adu * (1.0 - self.wetsk) * (self.vpa - self.vpts)
-                        # max vb
-                        vb1 = 34.0 - self.tsk
-                        vb2 = tcore[j - 1] - 36.6
-                        if vb2 < 0.0:
-                            vb2 = 0.0
-                        if vb1 < 0.0:
-                            vb1 = 0.0
-                        vb = (6.3 + 75.0 * vb2) / (1.0 + 0.5 * vb1)
-                        # energy balance
-                        self.enbal = self.h + self.ed + self.ere + self.esw + self.csum + self.rsum + self.food
-                        # clothing temperature
-                        if self.count1 == 0:
-                            self.xx = 1.0
-                        if self.count1 == 1:
-                            self.xx = 0.1
-                        if self.count1 == 2:
-                            self.xx = 0.01
-                        if self.count1 == 3:
-                            self.xx = 0.001
-                        if self.enbal > 0.0:
-                            self.tcl = self.tcl + self.xx
-                        if self.enbal < 0.0:
-                            self.tcl = self.tcl - self.xx
-                        if (self.enbal > 0.0 or self.enbal2 <= 0.0) and (self.enbal < 0.0 or self.enbal2 >= 0.0):
-                            self.enbal2 = self.enbal
-                            count2 += 1
-                        else:
-                            break
-                    if self.count1 == 0.0 or self.count1 == 1.0 or self.count1 == 2.0:
-                        self.count1 = self.count1 + 1
-                        self.enbal2 = 0.0
-                    else:
-                        break
+                
+                def clothingBalance(tcl):
+                    self.tcl = tcl
+                    self.acl = self.adu * self.facl + self.adu * (self.fcl - 1.0)
+                    rclo2 = self.emcl * self.sigm * (math.pow(self.tcl + 273.2, 4.0) - math.pow(self.tmrt + 273.2, 4.0)) * self.feff
+                    htcl = 6.28 * self.ht * y * di / (rcl * math.log(r2 / r1) * self.acl)
+                    self.tsk = 1.0 / htcl * (self.hc * (self.tcl - self.ta) + rclo2) + self.tcl
+                    # radiation balance
+                    self.aeff = self.adu * self.feff
+                    self.rbare = self.aeff * (1.0 - self.facl) * self.emsk * self.sigm * (math.pow(self.tmrt + 273.2, 4.0) - math.pow(self.tsk + 273.2, 4.0))
+                    self.rclo = self.feff * self.acl * self.emcl * self.sigm * (math.pow(self.tmrt + 273.2, 4.0) - math.pow(self.tcl + 273.2, 4.0))
+                    self.rsum = self.rbare + self.rclo
+                    # convection
+                    self.cbare = self.hc * (self.ta - self.tsk) * self.adu * (1.0 - self.facl)
+                    self.cclo = self.hc * (self.ta - self.tcl) * self.acl
+                    self.csum = self.cbare + self.cclo
+                    # core temperature
+                    c[0] = self.h + self.ere
+                    c[1] = self.adu * self.rob * self.cb
+                    c[2] = 18.0 - 0.5 * self.tsk
+                    c[3] = 5.28 * self.adu * c[2]
+                    c[4] = 13.0 / 625.0 * c[1]
+                    c[5] = 0.76075 * c[1]
+                    c[6] = c[3] - c[5] - self.tsk * c[4]
+                    c[7] = -c[0] * c[2] - self.tsk * c[3] + self.tsk * c[5]
+                    c[8] = c[6] * c[6] - 4.0 * c[4] * c[7]
+                    c[9] = 5.28 * self.adu - c[5] - c[4] * self.tsk
+                    c[10] = c[9] * c[9] - 4.0 * c[4] * (c[5] * self.tsk - c[0] - 5.28 * self.adu * self.tsk)
+                    if self.tsk == 36.0:
+                        self.tsk = 36.01
+                    tcore[6] = c[0] / (5.28 * self.adu + c[1] * 6.3 / 3600.0) + self.tsk
+                    tcore[2] = c[0] / (5.28 * self.adu + c[1] * 6.3 / 3600.0 / (1.0 + 0.5 * (34.0 - self.tsk))) + self.tsk
+                    if c[10] >= 0.0:
+                        tcore[5] = (-c[9] - math.pow(c[10], 0.5)) / (2.0 * c[4])
+                        tcore[0] = (-c[9] + math.pow(c[10], 0.5)) / (2.0 * c[4])
+                    if c[8] >= 0.0:
+                        tcore[1] = (-c[6] + math.pow(abs(c[8]), 0.5)) / (2.0 * c[4])
+                        tcore[4] = (-c[6] - math.pow(abs(c[8]), 0.5)) / (2.0 * c[4])
+                    tcore[3] = c[0] / (5.28 * self.adu + c[1] * 1.0 / 40.0) + self.tsk
+                    # transpiration
+                    tbody = 0.1 * self.tsk + 0.9 * tcore[j - 1]
+                    swm = 304.94 * (tbody - 36.6) * self.adu / 3600000.0
+                    self.vpts = 6.11 * math.pow(10.0, 7.45 * self.tsk / (235.0 + self.tsk))
+                    if tbody <= 36.6:
+                        swm = 0.0
+                    swf = 0.7 * swm
+                    if self.sex == 1:
+                        sw = swm
+                    if self.sex == 2:
+                        sw = swf
+                    if self.sex == 3:
+                        sw = (swm + swf)/2
+                    eswphy = -sw * self.evap
+                    he = 0.633 * self.hc / (self.p * self.cair)
+                    fec = 1.0 / (1.0 + 0.92 * self.hc * rcl)
+                    eswpot = he * (self.vpa - self.vpts) * self.adu * self.evap * fec
+                    self.wetsk = eswphy / eswpot
+                    if self.wetsk > 1.0:
+                        self.wetsk = 1.0
+                    eswdif = eswphy - eswpot
+                    if eswdif <= 0.0:
+                        self.esw = eswpot
+                    if eswdif > 0.0:
+                        self.esw = eswphy
+                    if self.esw > 0.0:
+                        self.esw = 0.0
+                    # diffusion
+                    self.rdsk = 0.79 * math.pow(10.0, 7.0)
+                    self.rdcl = 0.0
+                    self.ed = self.evap / (self.rdsk + self.rdcl) * self.adu * (1.0 - self.wetsk) * (self.vpa - self.vpts)
+                    # max vb
+                    vb1 = 34.0 - self.tsk
+                    vb2 = tcore[j - 1] - 36.6
+                    if vb2 < 0.0:
+                        vb2 = 0.0
+                    if vb1 < 0.0:
+                        vb1 = 0.0
+                    bodyState['sw'] = sw
+                    bodyState['vb'] = (6.3 + 75.0 * vb2) / (1.0 + 0.5 * vb1)
+                    # energy balance
+                    self.enbal = self.h + self.ed + self.ere + self.esw + self.csum + self.rsum + self.food
+                    return self.enbal
+                
+                # clothing temperature
+                bodyState = {}
+                tclBefore, tclAfter = self.findRoot(clothingBalance, self.tcl, increasing = False)
+                clothingBalance(tclAfter)
+                self.tcl = tclBefore
+                sw, vb = bodyState['sw'], bodyState['vb']
+                self.count1 = 3
                 for k in range(20):
                     if self.count1 == 3.0 and (j != 2 and j != 5):
                         if j != 6 and j != 1:
@@ -5552,48 +6812,80 @@ class ComfortModels(object):
                 
                 return tcore[index], self.rsum, self.csum, self.ed
         
+        def findRoot(self, balance, x0, increasing = True, step = 1.0, resolution = 0.001, maxSteps = 98):
+            """Find where an energy balance function changes sign on the grid of the original search.
+            
+            The original search walked from x0 with steps of 1, 0.1, 0.01 and 0.001
+            degrees and stopped at the last temperature before the sign of the
+            balance changed. The change is bracketed with the same steps of 1
+            degree and then found on the 0.001 degree grid with a bisection of the
+            grid points, so the result is the same with fewer evaluations.
+            
+            Args:
+                balance: A function of one temperature that returns the energy balance.
+                x0: The starting temperature.
+                increasing: True if the balance increases with the temperature.
+                step: The step of the bracket.
+                resolution: The step of the grid of the result.
+                maxSteps: The largest number of steps of the bracket.
+            
+            Returns:
+                before: The last temperature of the grid before the sign changes.
+                after: The first temperature of the grid after the sign changes.
+                    The original search evaluated the balance at this temperature last.
+            """
+            def sameSign(f1, f2): return (f1 > 0.0 and f2 > 0.0) or (f1 < 0.0 and f2 < 0.0)
+            
+            fa = balance(x0)
+            if fa == 0.0: return x0, x0
+            if (fa < 0.0) != increasing: step = -step
+            
+            a = x0
+            for count in range(maxSteps):
+                b = a + step
+                if not sameSign(fa, balance(b)): break
+                a = b
+            else:
+                return b, b
+            
+            # the first point of the fine grid between a and b with the other sign
+            lo, hi = 0, int(round(abs(step) / resolution))
+            gridStep = resolution if step > 0 else -resolution
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if sameSign(fa, balance(a + mid * gridStep)): lo = mid
+                else: hi = mid
+            return a + lo * gridStep, a + hi * gridStep
+        
         def pet(self):
-            self.tx = self.ta
-            self.enbal2 = 0.0
-            self.count1 = 0
-            while self.count1 != 4:
-                self.hc = 2.67 + 6.5 * math.pow(0.1, 0.67)
-                self.hc = self.hc * math.pow(self.p / self.po, 0.55)
+            self.hc = 2.67 + 6.5 * math.pow(0.1, 0.67)
+            self.hc = self.hc * math.pow(self.p / self.po, 0.55)
+            self.aeff = self.adu * self.feff
+            
+            def petBalance(tx):
                 # radiation saldo
-                self.aeff = self.adu * self.feff
-                self.rbare = self.aeff * (1.0 - self.facl) * self.emsk * self.sigm * (math.pow(self.tx + 273.2, 4.0) - math.pow(self.tsk + 273.2, 4.0))
-                self.rclo = self.feff * self.acl * self.emcl * self.sigm * (math.pow(self.tx + 273.2, 4.0) - math.pow(self.tcl + 273.2, 4.0))
+                self.rbare = self.aeff * (1.0 - self.facl) * self.emsk * self.sigm * (math.pow(tx + 273.2, 4.0) - math.pow(self.tsk + 273.2, 4.0))
+                self.rclo = self.feff * self.acl * self.emcl * self.sigm * (math.pow(tx + 273.2, 4.0) - math.pow(self.tcl + 273.2, 4.0))
                 self.rsum = self.rbare + self.rclo
                 # convection
-                self.cbare = self.hc * (self.tx - self.tsk) * self.adu * (1.0 - self.facl)
-                self.cclo = self.hc * (self.tx - self.tcl) * self.acl
+                self.cbare = self.hc * (tx - self.tsk) * self.adu * (1.0 - self.facl)
+                self.cclo = self.hc * (tx - self.tcl) * self.acl
                 self.csum = self.cbare + self.cclo
                 # diffusion
                 self.ed = self.evap / (self.rdsk + self.rdcl) * self.adu * (1.0 - self.wetsk) * (12.0 - self.vpts)
                 # breathing
-                self.tex = 0.47 * self.tx + 21.0
-                self.eres = self.cair * (self.tx - self.tex) * self.rtv
+                self.tex = 0.47 * tx + 21.0
+                self.eres = self.cair * (tx - self.tex) * self.rtv
                 self.vpex = 6.11 * math.pow(10.0, 7.45 * self.tex / (235.0 + self.tex))
                 self.erel = 0.623 * self.evap / self.p * (12.0 - self.vpex) * self.rtv
                 self.ere = self.eres + self.erel
                 # energy balance
                 self.enbal = self.h + self.ed + self.ere + self.esw + self.csum + self.rsum
-                if self.count1 == 0:
-                    self.xx = 1.0
-                if self.count1 == 1:
-                    self.xx = 0.1
-                if self.count1 == 2:
-                    self.xx = 0.01
-                if self.count1 == 3:
-                    self.xx = 0.001
-                if self.enbal > 0.0:
-                    self.tx = self.tx - self.xx
-                if self.enbal < 0.0:
-                    self.tx = self.tx + self.xx
-                if (self.enbal > 0.0 or self.enbal2 <= 0.0) and (self.enbal < 0.0 or self.enbal2 >= 0.0):
-                    self.enbal2 = self.enbal
-                else:
-                    self.count1 = self.count1 + 1
+                return self.enbal
+            
+            txBefore, txAfter = self.findRoot(petBalance, self.ta, increasing = True)
+            petBalance(txAfter)
+            self.tx = txBefore
             
             return
         
@@ -5663,6 +6955,166 @@ class ComfortModels(object):
             return effectPET, comfortablePET
 
 
+class AdaptiveComfort(object):
+    """Adaptive comfort of a series of hours with the ASHRAE 55 or the EN-15251 model.
+    
+    The operative temperatures and the cooling effects of elevated air speed are
+    found once for all of the hours and the target temperatures are kept for
+    each level of conditioning. The hours can then be evaluated for any comfort
+    class and level of conditioning (e.g. in a parametric sweep) without going
+    through the hourly conditions again. The results are the same as the ones
+    of ComfortModels.comfAdaptiveComfortASH55 and comfAdaptiveComfortEN15251.
+    
+    Args:
+        airTemp: A list of air temperatures in C.
+        radTemp: A list of mean radiant temperatures in C.
+        prevailTemp: A list of prevailing outdoor temperatures in C.
+        windSpeed: A list of wind speeds in m/s.
+        ASHRAEorEN: True to use ASHRAE 55 and False to use EN-15251.
+    """
+    
+    def __init__(self, airTemp, radTemp, prevailTemp, windSpeed, ASHRAEorEN = True):
+        self.prevailTemp = prevailTemp
+        self.ASHRAEorEN = ASHRAEorEN
+        self.operativeTemp = [(ta + tr) / 2 for ta, tr in izip(airTemp, radTemp)]
+        
+        # the elevated air speed does not cool people when it is too cold for the adaptive model
+        self.coolingEffect = []
+        for to, vel, runningMean in izip(self.operativeTemp, windSpeed, prevailTemp):
+            coolingEffect = 0
+            if runningMean < 10.0: pass
+            elif ASHRAEorEN == True:
+                if vel >= 0.6 and to >= 25:
+                    if vel < 0.9: coolingEffect = 1.2
+                    elif vel < 1.2: coolingEffect = 1.8
+                    else: coolingEffect = 2.2
+            elif vel >= 0.2 and to >= 25: coolingEffect = 1.7856 * math.log(vel) + 2.9835
+            self.coolingEffect.append(coolingEffect)
+        
+        self.comfortTempCache = {}
+    
+    @staticmethod
+    def prevailingTemperature(outdoorTemperature, avgMonthOrRunMean = True):
+        """Prevailing outdoor temperature of each hour of a year.
+        
+        Args:
+            outdoorTemperature: A list of 8760 hourly outdoor temperatures without the header.
+            avgMonthOrRunMean: True to use the average temperature of each month
+                and False to use a running mean of the daily mean temperatures
+                (with an alpha of 0.8).
+        
+        Returns:
+            prevailTemp: A list of 8760 prevailing outdoor temperatures.
+            coldTimes: A list of the months (1 to 12) or the days (0 to 364)
+                with a prevailing temperature below 10 C.
+        """
+        prevailTemp = []
+        coldTimes = []
+        if avgMonthOrRunMean == True:
+            numOfHours = Preparation().numOfHours
+            for month in range(12):
+                monthTemp = outdoorTemperature[numOfHours[month]:numOfHours[month+1]]
+                monthPrevailTemp = float(sum(monthTemp)/len(monthTemp))
+                prevailTemp.extend([monthPrevailTemp] * len(monthTemp))
+                if monthPrevailTemp < 10: coldTimes.append(month+1)
+        else:
+            dailyMeans = [sum(outdoorTemperature[startHour:startHour+24])/24 for startHour in range(0, 8760, 24)]
+            dailyRunMeans = Preparation().exponentialRunningMean(dailyMeans, 0.8, 6)
+            for dayCount, dailyRunMeanTemp in enumerate(dailyRunMeans):
+                if dailyRunMeanTemp < 10: coldTimes.append(dayCount)
+                prevailTemp.extend([dailyRunMeanTemp] * 24)
+        return prevailTemp, coldTimes
+    
+    def comfortTemperatures(self, levelOfConditioning = 0):
+        """Adaptive target temperature of each hour for a level of conditioning."""
+        if levelOfConditioning in self.comfortTempCache: return self.comfortTempCache[levelOfConditioning]
+        
+        if self.ASHRAEorEN == True: slope, intercept, upperLimit, coldBase, coldOffset = 0.31, 17.8, 33.5, 24.024, 2.6
+        else: slope, intercept, upperLimit, coldBase, coldOffset = 0.33, 18.8, 30.0, 25.224, 1.4
+        condSlope = (0.09*levelOfConditioning)+(slope*(1-levelOfConditioning))
+        condIntercept = (22.6*levelOfConditioning)+(intercept*(1-levelOfConditioning))
+        
+        comfortTemp = []
+        for runningMean in self.prevailTemp:
+            if runningMean >= 10.0 and runningMean <= upperLimit:
+                if levelOfConditioning == 0: tComf = slope * runningMean + intercept
+                elif levelOfConditioning == 1: tComf = 0.09 * runningMean + 22.6
+                else: tComf = condSlope * runningMean + condIntercept
+            elif runningMean < 10.0:
+                # correlation from adaptive-style surveys of conditioned buildings
+                coldCorrelation = (0.295*(runningMean - 22.0)) * math.exp((-1)*(((runningMean-22)/(33.941125))*((runningMean-22)/(33.941125))))
+                if levelOfConditioning == 0: tComf = coldBase + coldCorrelation
+                else: tComf = coldOffset*levelOfConditioning + coldBase + coldCorrelation
+            else:
+                # use the model at its hottest limit
+                if levelOfConditioning == 0: tComf = slope * upperLimit + intercept
+                else: tComf = condSlope * upperLimit + condIntercept
+            comfortTemp.append(tComf)
+        
+        self.comfortTempCache[levelOfConditioning] = comfortTemp
+        return comfortTemp
+    
+    def evaluate(self, comfortClass, levelOfConditioning = 0):
+        """Evaluate all of the hours for a comfort class and a level of conditioning.
+        
+        Args:
+            comfortClass: For ASHRAE 55, True for 80 percent and False for 90
+                percent acceptability. For EN-15251, the comfort class (1, 2 or 3).
+            levelOfConditioning: A number between 0 (free-running) and 1 (conditioned).
+        
+        Returns:
+            comfortTemp: The adaptive target temperature of each hour.
+            degreesTarget: The operative temperature minus the target temperature.
+            lowerTemp: The lower comfort temperature of each hour.
+            upperTemp: The upper comfort temperature of each hour.
+            comfOrNot: 1 for the comfortable hours and 0 for the others.
+            condition: -1 for cold, 0 for comfortable and 1 for hot hours.
+        """
+        comfortTemp = self.comfortTemperatures(levelOfConditioning)
+        if self.ASHRAEorEN == True:
+            if comfortClass == True: offset = 3.5
+            else: offset = 2.5
+        elif comfortClass == 1: offset = 2
+        elif comfortClass == 2: offset = 3
+        else: offset = 4
+        
+        degreesTarget, lowerTemp, upperTemp, comfOrNot, condition = [], [], [], [], []
+        for to, tComf, runningMean, coolingEffect in izip(self.operativeTemp, comfortTemp, self.prevailTemp, self.coolingEffect):
+            tComfLower = tComf - offset
+            tComfUpper = tComf + offset + coolingEffect
+            # EN-15251 keeps the lower limit at the one of 15 C for cooler free-running buildings
+            if self.ASHRAEorEN != True and 10.0 <= runningMean <= 15 and levelOfConditioning == 0:
+                tComfLower = 23.75 - offset
+                if (runningMean <= 12.73 or runningMean == 15) and comfortClass == 1: tComfUpper = tComf + offset
+            
+            degreesTarget.append(to - tComf)
+            lowerTemp.append(tComfLower)
+            upperTemp.append(tComfUpper)
+            if to > tComfLower and to < tComfUpper:
+                comfOrNot.append(1)
+                condition.append(0)
+            else:
+                comfOrNot.append(0)
+                if to > tComfUpper: condition.append(1)
+                else: condition.append(-1)
+        return list(comfortTemp), degreesTarget, lowerTemp, upperTemp, comfOrNot, condition
+    
+    def sweep(self, comfortClasses, levelsOfConditioning):
+        """Percent of the hours that are comfortable, hot and cold for combinations of comfort classes and levels of conditioning.
+        
+        Returns:
+            percentages: A dictionary of [percentComfortable, percentHot, percentCold]
+                for each (comfortClass, levelOfConditioning).
+        """
+        percentages = {}
+        hourCount = len(self.operativeTemp)
+        for levelOfConditioning in levelsOfConditioning:
+            for comfortClass in comfortClasses:
+                condition = self.evaluate(comfortClass, levelOfConditioning)[-1]
+                percentages[(comfortClass, levelOfConditioning)] = [condition.count(0)*100/hourCount, condition.count(1)*100/hourCount, condition.count(-1)*100/hourCount]
+        return percentages
+
+
 class WindSpeed(object):
     def readTerrainType(self, terrainType, powerOrLog = 0):
         # Function that reads terrain type and returns the following paremeters used to calculate wind speed above the ground:
@@ -7282,6 +8734,297 @@ class Photovoltaics(object):
         return dec, dip, ti, bx, by, bz, time
 
 
+class TileService(object):
+    """Elevations and map images from web services with an on-disk cache.
+    
+    Each request is saved in cacheFolder in a file whose name is the md5 hash of
+    the kind of the request and its quantized latitudes, longitudes and zoom,
+    so a repeated terrain job reads everything from the disk and does not go to
+    the web at all. Requests that are not in the cache are fetched in parallel
+    with at most maxConnections at the same time. Only valid responses are
+    kept in the cache.
+    
+    Args:
+        cacheFolder: The folder for the cached files.
+        fetch: A function that gets (url, filePath) and writes the response to
+            filePath. The default downloads the url with a WebClient. Use
+            TileService.folderFetch(folder) to work offline from a folder of
+            saved responses, or pass another function to test.
+        maxConnections: The largest number of requests at the same time.
+        precision: The number of decimals of the latitudes and longitudes in the
+            requests and in the cache keys.
+        elevationUrl: The url of the elevation service.
+        mapUrl: The url of the static map service.
+    """
+    maxLocations = 256
+    
+    def __init__(self, cacheFolder, fetch = None, maxConnections = 4, precision = 6,
+                 elevationUrl = 'http://maps.googleapis.com/maps/api/elevation/json',
+                 mapUrl = 'http://maps.googleapis.com/maps/api/staticmap'):
+        self.cacheFolder = cacheFolder
+        if not os.path.isdir(cacheFolder): os.makedirs(cacheFolder)
+        self.fetch = fetch or self.downloadUrl
+        self.maxConnections = maxConnections
+        self.precision = precision
+        self.elevationUrl = elevationUrl
+        self.mapUrl = mapUrl
+        self.networkRequests = 0
+    
+    @staticmethod
+    def downloadUrl(url, filePath):
+        client = System.Net.WebClient()
+        client.DownloadFile(url, filePath)
+    
+    @staticmethod
+    def folderFetch(root):
+        """A fetch function that copies the responses from a local folder.
+        
+        Args:
+            root: The folder of the saved responses. The file of each url is
+                named with the md5 hash of the url (no extension).
+        
+        Returns:
+            fetch: A function of (url, filePath) for the fetch input. It fails
+                for the urls that are not in the folder.
+        """
+        def fetch(url, filePath):
+            shutil.copyfile(os.path.join(root, hashlib.md5(url).hexdigest()), filePath)
+        return fetch
+    
+    def quantize(self, value):
+        return '%.*f' % (self.precision, value)
+    
+    def cachePath(self, key, extension):
+        return os.path.join(self.cacheFolder, hashlib.md5(key).hexdigest() + extension)
+    
+    def fetchAll(self, requests, isValid):
+        """Fetch the (url, filePath) requests that are not in the cache.
+        
+        Requests for the same file are only fetched once.
+        
+        Returns:
+            failed: A list of the urls that could not be fetched.
+        """
+        jobs, jobPaths = [], set()
+        for url, filePath in requests:
+            if filePath in jobPaths or os.path.isfile(filePath): continue
+            jobPaths.add(filePath)
+            jobs.append((url, filePath))
+        failed = []
+        
+        def fetchJob(i):
+            url, filePath = jobs[i]
+            # the process id keeps the files of other Rhino instances that share the cache apart
+            tempPath = '%s.part%d_%d' % (filePath, os.getpid(), i)
+            try:
+                self.fetch(url, tempPath)
+                if not isValid(tempPath): raise ValueError('Invalid response from ' + url)
+                if os.path.isfile(filePath): os.remove(tempPath)
+                else: os.rename(tempPath, filePath)
+            except:
+                if os.path.isfile(tempPath): os.remove(tempPath)
+                # the file can be saved by another run at the same time
+                if not (os.path.isfile(filePath) and isValid(filePath)): failed.append(url)
+        
+        self.networkRequests += len(jobs)
+        if len(jobs) > 1 and self.maxConnections > 1:
+            System.Net.ServicePointManager.DefaultConnectionLimit = max(System.Net.ServicePointManager.DefaultConnectionLimit, self.maxConnections)
+            options = tasks.ParallelOptions()
+            options.MaxDegreeOfParallelism = self.maxConnections
+            tasks.Parallel.ForEach(xrange(len(jobs)), options, fetchJob)
+        else:
+            for i in range(len(jobs)): fetchJob(i)
+        return failed
+    
+    @staticmethod
+    def readElevations(filePath):
+        with open(filePath, 'r') as elevationFile:
+            response = json.load(elevationFile)
+        if response.get('status', 'OK') != 'OK': raise ValueError(response.get('error_message', response['status']))
+        return [float(result['elevation']) for result in response['results']]
+    
+    def elevations(self, latLons):
+        """Elevations of a list of (latitude, longitude) in meters.
+        
+        The unique locations are requested in batches of maxLocations.
+        
+        Returns:
+            elevations: A list of elevations or None if a request failed.
+        """
+        keys = ['%s,%s' % (self.quantize(lat), self.quantize(lon)) for lat, lon in latLons]
+        uniqueKeys = sorted(set(keys))
+        batches = [uniqueKeys[i:i + self.maxLocations] for i in range(0, len(uniqueKeys), self.maxLocations)]
+        
+        requests = []
+        for batch in batches:
+            locations = '|'.join(batch)
+            requests.append((self.elevationUrl + '?locations=' + locations + '&sensor=false', self.cachePath('elevation|' + locations, '.json')))
+        
+        def isValid(filePath):
+            try: return len(self.readElevations(filePath)) > 0
+            except: return False
+        
+        if self.fetchAll(requests, isValid): return None
+        
+        elevationsByKey = {}
+        for batch, (url, filePath) in zip(batches, requests):
+            batchElevations = self.readElevations(filePath)
+            if len(batchElevations) != len(batch): return None
+            elevationsByKey.update(zip(batch, batchElevations))
+        return [elevationsByKey[key] for key in keys]
+    
+    def mapImages(self, mapRequests):
+        """Static map images.
+        
+        Args:
+            mapRequests: A list of (latitude, longitude, zoom, width, height, mapType)
+                for the center of each image.
+        
+        Returns:
+            filePaths: A list of the paths of the cached images. The path is
+                None if the image could not be fetched.
+        """
+        requests = []
+        for lat, lon, zoom, width, height, mapType in mapRequests:
+            params = 'center=%s,%%20%s&zoom=%d&size=%dx%d&maptype=%s' % (self.quantize(lat), self.quantize(lon), zoom, width, height, mapType)
+            requests.append((self.mapUrl + '?' + params + '&sensor=false', self.cachePath('map|' + params, '.png')))
+        
+        def isValid(filePath):
+            # the service answers errors with text instead of an image
+            with open(filePath, 'rb') as imageFile:
+                return imageFile.read(8) == '\x89PNG\r\n\x1a\n'
+        
+        failed = set(self.fetchAll(requests, isValid))
+        return [filePath if url not in failed else None for url, filePath in requests]
+
+
+class ElevationRaster(object):
+    """Elevations on a regular grid.
+    
+    The grid is kept like a GeoTIFF raster: row 0 is the north (largest Y) edge,
+    the columns go to the east and the values are kept row by row in one array.
+    Rasters can be saved to and loaded from a local file, resampled to another
+    cell size with bilinear interpolation and turned into a single mesh in
+    which the tiles that the elevations came from share their edge vertices.
+    
+    Args:
+        originX: The X of the north-west corner of the grid.
+        originY: The Y of the north-west corner of the grid.
+        cellSize: The distance between the grid points.
+        rows: The number of rows of points.
+        cols: The number of points in each row.
+        values: A list or array of rows * cols elevations.
+        metadata: An optional dictionary (e.g. the location of the raster).
+    """
+    
+    def __init__(self, originX, originY, cellSize, rows, cols, values, metadata = None):
+        self.originX = originX
+        self.originY = originY
+        self.cellSize = cellSize
+        self.rows = rows
+        self.cols = cols
+        self.values = values if isinstance(values, array.array) else array.array('d', values)
+        self.metadata = metadata or {}
+    
+    @classmethod
+    def fromGridPoints(cls, points, elevations, cellSize, metadata = None):
+        """Make a raster from points on a regular grid (e.g. the points of several tiles).
+        
+        The points are put in their cells by their X and Y so the points that
+        are shared by neighbouring tiles are only kept once.
+        
+        Args:
+            points: A list of points with X and Y.
+            elevations: A list of elevations for the points.
+            cellSize: The distance between the grid points.
+        """
+        originX = min(pt.X for pt in points)
+        originY = max(pt.Y for pt in points)
+        indices = [(int(round((originY - pt.Y) / cellSize)), int(round((pt.X - originX) / cellSize))) for pt in points]
+        rows = max(row for row, col in indices) + 1
+        cols = max(col for row, col in indices) + 1
+        
+        values = array.array('d', [float('nan')]) * (rows * cols)
+        for (row, col), elevation in izip(indices, elevations):
+            values[row * cols + col] = elevation
+        return cls(originX, originY, cellSize, rows, cols, values, metadata)
+    
+    def save(self, filePath):
+        # a header line followed by the values as doubles
+        header = {'originX': self.originX, 'originY': self.originY, 'cellSize': self.cellSize,
+                  'rows': self.rows, 'cols': self.cols, 'metadata': self.metadata}
+        with open(filePath, 'wb') as rasterFile:
+            rasterFile.write(json.dumps(header) + '\n')
+            self.values.tofile(rasterFile)
+    
+    @classmethod
+    def load(cls, filePath):
+        with open(filePath, 'rb') as rasterFile:
+            header = json.loads(rasterFile.readline())
+            values = array.array('d')
+            values.fromfile(rasterFile, header['rows'] * header['cols'])
+        return cls(header['originX'], header['originY'], header['cellSize'], header['rows'], header['cols'], values, header['metadata'])
+    
+    def gridWeights(self, coordinates, origin, step, count):
+        # the index of the cell before each coordinate and the weight of the next point
+        weights = []
+        for coordinate in coordinates:
+            position = min(max((coordinate - origin) / step, 0), count - 1)
+            index = min(int(position), max(count - 2, 0))
+            weights.append((index, position - index))
+        return weights
+    
+    def elevationAt(self, x, y):
+        """Elevation at a point with bilinear interpolation. Points out of the grid get the elevation of its edge."""
+        (col, fx), = self.gridWeights([x], self.originX, self.cellSize, self.cols)
+        (row, fy), = self.gridWeights([y], self.originY, -self.cellSize, self.rows)
+        return self.interpolate(row, fy, col, fx)
+    
+    def interpolate(self, row, fy, col, fx):
+        values, cols = self.values, self.cols
+        i = row * cols + col
+        z = values[i]
+        if fx: z += (values[i + 1] - values[i]) * fx
+        if fy:
+            below = values[i + cols]
+            if fx: below += (values[i + cols + 1] - below) * fx
+            z += (below - z) * fy
+        return z
+    
+    def resample(self, cellSize):
+        """A new raster over the same area with another cell size (bilinear interpolation)."""
+        width = (self.cols - 1) * self.cellSize
+        height = (self.rows - 1) * self.cellSize
+        cols = int(width / cellSize + 1e-9) + 1
+        rows = int(height / cellSize + 1e-9) + 1
+        colWeights = self.gridWeights([self.originX + col * cellSize for col in range(cols)], self.originX, self.cellSize, self.cols)
+        rowWeights = self.gridWeights([self.originY - row * cellSize for row in range(rows)], self.originY, -self.cellSize, self.rows)
+        
+        values = array.array('d')
+        for row, fy in rowWeights:
+            values.extend([self.interpolate(row, fy, col, fx) for col, fx in colWeights])
+        return ElevationRaster(self.originX, self.originY, cellSize, rows, cols, values, dict(self.metadata))
+    
+    def points(self, scale = 1):
+        # the grid points row by row
+        points = []
+        for row in range(self.rows):
+            y = (self.originY - row * self.cellSize) * scale
+            start = row * self.cols
+            points.extend([((self.originX + col * self.cellSize) * scale, y, self.values[start + col] * scale) for col in range(self.cols)])
+        return points
+    
+    def toMeshData(self, scale = 1):
+        """One mesh of the whole grid with the faces facing up.
+        
+        Args:
+            scale: A factor for the coordinates (e.g. to change the units).
+        """
+        meshData = MeshData(self.points(scale))
+        meshData.addGridFaces(self.rows, self.cols)
+        return meshData
+
+
 try:
     checkIn.checkForUpdates(LB= True, HB= False, OpenStudio = False, template = False)
 except:
@@ -7318,7 +9061,12 @@ if checkIn.letItFly:
     #if not sc.sticky.has_key("ladybug_release"):
     sc.sticky["ladybug_release"] = versionCheck()       
     sc.sticky["ladybug_Preparation"] = Preparation
+    sc.sticky["ladybug_DataCollection"] = DataCollection
+    sc.sticky["ladybug_DegreeDays"] = DegreeDays
     sc.sticky["ladybug_Mesh"] = MeshPreparation
+    sc.sticky["ladybug_MeshData"] = MeshData
+    sc.sticky["ladybug_MeshContour"] = MeshContour
+    sc.sticky["ladybug_RayTracer"] = RayTracer
     sc.sticky["ladybug_RunAnalysis"] = RunAnalysisInsideGH
     sc.sticky["ladybug_Export2Radiance"] = ExportAnalysis2Radiance
     sc.sticky["ladybug_ResultVisualization"] = ResultVisualization
@@ -7326,8 +9074,11 @@ if checkIn.letItFly:
     sc.sticky["ladybug_SkyColor"] = Sky
     sc.sticky["ladybug_Vector"] = Vector
     sc.sticky["ladybug_ComfortModels"] = ComfortModels
+    sc.sticky["ladybug_AdaptiveComfort"] = AdaptiveComfort
     sc.sticky["ladybug_WindSpeed"] = WindSpeed
     sc.sticky["ladybug_Photovoltaics"] = Photovoltaics
+    sc.sticky["ladybug_TileService"] = TileService
+    sc.sticky["ladybug_ElevationRaster"] = ElevationRaster
         
     if sc.sticky.has_key("ladybug_release") and sc.sticky["ladybug_release"]:
         now = time.localtime()